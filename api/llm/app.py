@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from api.utils.flask_json import use_fast_json
 from time import sleep
 import os
 import requests
@@ -10,6 +11,8 @@ from api.utils.console import print_to_console
 def create_app() -> Flask:
     app = Flask(__name__)
     CORS(app)
+    # parse requests and encode responses with the fast JSON backend
+    use_fast_json(app)
 
     config = get_config()
 
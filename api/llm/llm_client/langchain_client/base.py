@@ -11,11 +11,22 @@ from langchain.vectorstores import Chroma
 from langchain.chains import LLMChain
 from langchain.agents import Tool, ZeroShotAgent, AgentExecutor
 
-from api.nes.read import read_addresses_tool
-from api.nes.write import write_addresses_tool
-from api.nes.bestiary import get_monsters_by_location_tool, get_locations_by_monster_tool
-from api.nes.names import get_names_tool
-from api.nes.order import order_party_tool
+from api.nes.tools import (
+    read_addresses_tool,
+    write_addresses_tool,
+    get_monsters_by_location_tool,
+    get_locations_by_monster_tool,
+    get_names_tool,
+    get_party_tool,
+    get_enemies_tool,
+    get_monsters_here_tool,
+    order_party_tool,
+    block_operation_tool,
+    call_procedure_tool,
+    history_tool,
+    batch_tool,
+)
+from api.nes.cadence import hold_fast_cadence
 from api.utils.console import print_to_console
 
 # Defaults for vector DB retrieval used to assemble instructions.
@@ -75,6 +86,10 @@ class LangchainLlmClient(LlmClient):
                     Input: `List[str] addresses`: The requested RAM addresses. Must always be
                         in hex format with six characters following the '0x'. Example:
                         ["0x00001C", "0x006110"]
+                        A range such as "0x006102-0x006105" returns the raw bytes of every
+                        address in it, under "ranges", as one array.
+                        To read values back right after write_addresses, pass its ticket:
+                        {{"addresses": ["0x006110"], "min_version": 17}}
 
                     Output: `Dict[str,str] result`: The key is the memory address requested and the value 
                         is its meaningful, human readable value. Example:
@@ -94,32 +109,42 @@ class LangchainLlmClient(LlmClient):
                         Values must always be integers. Example:
 	                    '[{{"0x006BE4": 50}}, {{"0x006BE5": 0}}]'
 
-                    Output: `str result`: A string confirming a file has been written. Example:
-                        'execute.lua written successfully'
+                    Output: A JSON object confirming the writes have been queued, with a ticket
+                        that can be passed to read_addresses as `min_version`. Example:
+                        '{{"message": "2 address writes queued", "ticket": 17}}'
                 """
             ),
             Tool(
                 name="get_monsters_by_location",
                 func=get_monsters_by_location_tool,
                 description="""
-                    Retrieves the list of monsters present at a given location.
+                    Retrieves the list of monsters present at a given location, or at several locations at once.
+                    Location names are matched loosely (case, punctuation, floor spelling, partial names), and the
+                    bestiary location that was matched is returned.
 
-                    Input: a JSON string containing either a single string or an object with key `location`.
-                      Example: '{{"location":"(Some Location)"}}'
+                    Input: a JSON string containing either a single string or an object with key `location`
+                      (or `locations` with an array of them).
+                      Example: '{{"location":"(castle_of_ordeal,2f)"}}'
+                      Example: '{{"locations":["(4,4)","(marsh_cave,b2)"]}}'
 
-                    Output: JSON string: '{{"monsters": ["Imp","Goblin"]}}'
+                    Output: JSON string: '{{"monsters": ["Imp","Goblin"], "location": "(castle_of_ordeal,2f)"}}'
+                      For several locations: '{{"monsters": {{"(4,4)": ["Imp"]}}, "locations": {{"(4,4)": "(4,4)"}}}}'
                 """
             ),
             Tool(
                 name="get_locations_by_monster",
                 func=get_locations_by_monster_tool,
                 description="""
-                    Retrieves locations for one or more monsters.
+                    Retrieves locations for one or more monsters. Names are matched approximately, so
+                    plurals, misspellings and full names ("Frost Giant" for "FrGiant") are accepted.
 
                     Input: a JSON string containing either an array of monster names or an object with key `monsters`.
-                      Example: '{{"monsters":["Goblin","Imps"]}}'
+                      Example: '{{"monsters":["Frost Giant","Imps"]}}'
 
-                    Output: JSON string: '{{"locations": {{"Goblin": ["(Loc1)"], "Imp": ["(Loc2)"]}}}}'
+                    Output: JSON string with the locations of the closest monster for each name, and the
+                      ranked candidate monsters it was matched against:
+                      '{{"locations": {{"Frost Giant": ["(0,0)"], "Imp": ["(4,4)"]}},
+                        "matches": {{"Frost Giant": [{{"monster": "FrGiant", "distance": 1}}], "Imp": [{{"monster": "Imp", "distance": 0}}]}}}}'
                 """
             ),
             Tool(
@@ -134,6 +159,52 @@ class LangchainLlmClient(LlmClient):
                     Output: JSON string: '{{"character_1":"ABCD","character_2":"EFGH", ...}}'
                 """
             ),
+            Tool(
+                name="get_party",
+                func=get_party_tool,
+                description="""
+                    Retrieves every character in the party in one call: slot, class, status
+                    (e.g. ["dead"]), name, hp, max_hp, strength, agility, intelligence,
+                    vitality, luck, damage, hit_percentage, absorb and evade_percentage.
+                    Prefer it to reading the character stat addresses one by one.
+
+                    Input: optional JSON (ignored).
+
+                    Output: JSON string: '{{"party": [{{"slot": 1, "class": "Fighter", "name": "ABCD", "hp": 35, ...}}, ...]}}'
+                """
+            ),
+            Tool(
+                name="get_enemies",
+                func=get_enemies_tool,
+                description="""
+                    Retrieves every enemy in the current battle in one call: slot, type,
+                    status, hp, max_hp, absorb, critical_hit_rate, morale, evade_percentage,
+                    damage, experience and gold. Returns an empty list outside of battle.
+
+                    Input: optional JSON (ignored).
+
+                    Output: JSON string: '{{"enemies": [{{"slot": 1, "type": "Imp", "hp": 8, ...}}, ...]}}'
+                """
+            ),
+            Tool(
+                name="get_monsters_here",
+                func=get_monsters_here_tool,
+                description="""
+                    Retrieves the monsters that can be encountered where the adventurers are right
+                    now, in one step: reads the current position (overworld cell, ship, canoe, or
+                    dungeon floor) and looks it up in the bestiary. Use it instead of reading the
+                    position and calling get_monsters_by_location.
+
+                    Input: optional JSON (ignored).
+
+                    Output: JSON string: '{{"location": "(4,4)", "monsters": ["Imp", "GrImp"],
+                      "position": {{"area": "outside on the overworld map", "transport": "on land", "x": 145, "y": 150, "cell": [4, 4]}}}}'
+                      `location` is null with ["no monsters here"] in towns and in the airship.
+                      Inside a dungeon floor the game memory catalog does not name (Mirage Tower,
+                      Sky Castle, the past Temple of Fiends) it returns an "Unknown floor" error
+                      instead: the monsters there are unknown, not absent.
+                """
+            ),
             Tool(
                 name="order_party",
                 func=order_party_tool,
@@ -143,6 +214,84 @@ class LangchainLlmClient(LlmClient):
 
                     Output: JSON string containing a message about the write operation.
                 """
+            ),
+            Tool(
+                name="block_operation",
+                func=block_operation_tool,
+                description="""
+                    Copies, swaps or permutes contiguous blocks of RAM in a single step.
+                    Accepts a JSON object with an `op` of "copy", "swap" or "permute". Examples:
+                    '{{"op": "copy", "src": "0x006100", "dst": "0x006140", "length": 64}}'
+                    '{{"op": "swap", "a": "0x006100", "b": "0x006140", "length": 64}}'
+                    '{{"op": "permute", "bases": ["0x006100", "0x006140", "0x006180"], "length": 64, "order": [3, 1, 2]}}'
+                    For permute, block number order[i] (1-based) moves to bases[i].
+
+                    Output: JSON string with a message and a ticket that can be passed to
+                        read_addresses as `min_version`.
+                """
+            ),
+            Tool(
+                name="call_procedure",
+                func=call_procedure_tool,
+                description="""
+                    Runs a named game procedure, which is simpler and safer than writing the
+                    RAM addresses yourself. Accepts a JSON object with the procedure `name` and
+                    its `args`. Procedures:
+                    - set_hp(slot, hp): slot 1-4, hp 0-999
+                    - heal_party(): restores living characters to max HP
+                    - give_item(item, count): item is a consumable (tent, cabin, house, heal,
+                      pure, soft) or key item (e.g. canoe, floater); a negative count removes
+                    Examples:
+                    '{{"name": "set_hp", "args": {{"slot": 2, "hp": 150}}}}'
+                    '{{"name": "give_item", "args": {{"item": "heal", "count": 5}}}}'
+
+                    Output: JSON string with a message and a ticket that can be passed to
+                        read_addresses as `min_version`.
+                """
+            ),
+            Tool(
+                name="history",
+                func=history_tool,
+                description="""
+                    Answers questions about how RAM values changed over the last few minutes,
+                    e.g. how much HP was lost in a battle or when the battle flag changed.
+                    Accepts a JSON object with a `query`, the `addresses` to combine into one
+                    value (raw byte times catalog weight, summed, so HP low and high bytes give
+                    the HP), and optionally `since_version` and/or `last_seconds`.
+                    - "changes": every point where the value changed
+                    - "stats": first, last, min, max and net change
+                    - "first": first snapshot where the value compares to `value` with `op`
+                      (== != < <= > >=); a lookup address can be compared to its text value
+                    Examples:
+                    '{{"query": "first", "addresses": ["0x00001C"], "op": "==", "value": "in battle"}}'
+                    '{{"query": "stats", "addresses": ["0x00610A", "0x00610B"], "since_version": 40}}'
+
+                    Output: JSON string with the result; each point has a `version` that can be
+                        passed back as `since_version`.
+                """
+            ),
+            Tool(
+                name="batch",
+                func=batch_tool,
+                description="""
+                    Runs several NES operations in one step; use it instead of calling
+                    read_addresses, get_names and the bestiary tools one after another.
+                    Accepts a JSON list of operations, each with an `op`:
+                    - {{"op": "read", "addresses": [...]}}
+                    - {{"op": "names"}}
+                    - {{"op": "party"}} / {{"op": "enemies"}}
+                    - {{"op": "monsters_here"}}
+                    - {{"op": "monsters_by_location", "location": "..."}}
+                    - {{"op": "locations_by_monster", "monsters": [...]}}
+                    - {{"op": "write", "addresses": [{{"0x...": value}}]}}
+                    Reads all see the same moment of the game; writes in the batch are not
+                    visible to its reads.
+                    Example:
+                    '[{{"op": "names"}}, {{"op": "read", "addresses": ["0x00610A", "0x00610B"]}}]'
+
+                    Output: JSON string with one result per operation, in order; a failed
+                        operation has an `error` instead of a `result`.
+                """
             )
         ]
         return tools
@@ -393,7 +542,9 @@ class LangchainLlmClient(LlmClient):
             self._vectordb_addresses = Chroma(persist_directory=CHROMA_PERSIST_DIRECTORY + '/addresses', embedding_function=embedding)
             print_to_console('Vector databases loaded.', 'yellow')
 
-        return self._chat(messages)
+        # keep the LUA daemon at its fast cadence while the agent may be calling tools
+        with hold_fast_cadence():
+            return self._chat(messages)
 
     # Complete the Template Method Pattern by defining the abstract
     # method the concrete classes are forced to implement
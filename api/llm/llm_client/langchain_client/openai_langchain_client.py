@@ -1,13 +1,13 @@
 from typing import Any, Dict, List
 import threading
 import time
-import json
 import os
 
 from pydantic import BaseModel, Field
 
 from .base import LangchainLlmClient
 from api.utils.console import print_to_console
+from api.utils import fastjson
 from api.utils.math import safe_int
 from langchain_community.callbacks import get_openai_callback
 
@@ -134,7 +134,7 @@ class OpenAILangchainLlmClient(LangchainLlmClient):
             print_to_console(time_string, color='yellow')
 
         # Return answer in JSON format expected by the front end.
-        # Use json.dumps to ensure all characters (quotes, backslashes, newlines,
+        # Use fastjson.dumps to ensure all characters (quotes, backslashes, newlines,
         # and other control characters) are properly escaped.
-        return json.dumps({"answer": str(result)})
+        return fastjson.dumps({"answer": str(result)})
     
\ No newline at end of file
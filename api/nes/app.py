@@ -1,17 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from api.utils.flask_json import use_fast_json
 import os
 from .config import get_config
 from .write_lua import write_lua_script
 from .write import write_addresses
-from .read import read_addresses
+from .read import read_addresses, resolve_snapshot
 from .bestiary import get_monsters_by_location
 from .bestiary import get_locations_by_monster
 from .names import get_names
+from .blocks import block_operation
+from .procedures import call_procedure
+from .cadence import note_activity
+from .history import history, start_history_recorder
+from .watch import add_watch, list_watches, remove_watch, watch_event_stream
+from .batch import run_batch
+from .layout import get_enemies, get_party
+from .zones import get_monsters_here
+from .conditional import SNAPSHOT_VERSION_HEADER, not_modified, snapshot_etag, tag_response
+from .reloadable import reload_static_data, static_data_status
 
 def create_app() -> Flask:
     app = Flask(__name__)
-    CORS(app)
+    # let browser clients read the conditional-read headers (see conditional.py)
+    CORS(app, expose_headers=["ETag", SNAPSHOT_VERSION_HEADER])
+    # parse requests and encode responses with the fast JSON backend
+    use_fast_json(app)
 
     @app.route('/nes/write-lua', methods=['POST', 'OPTIONS'])
     def _write_lua_route():
@@ -28,7 +42,10 @@ def create_app() -> Flask:
     def _write_route():
         if request.method == 'OPTIONS':
             return ('', 200)
-        
+
+        # reads, writes, block operations and batches speed the LUA daemon up
+        # for a few seconds (see cadence.py); polls, preflights and 304s do not
+        note_activity()
         payload = request.get_json(silent=True) or {}
         addresses = payload.get('addresses')
         message, status = write_addresses(addresses)
@@ -42,20 +59,117 @@ def create_app() -> Flask:
         
         payload = request.get_json(silent=True) or {}
         addresses = payload.get('addresses')
-        result, status = read_addresses(addresses)
+        since = payload.get('since')
+        snapshot, status = resolve_snapshot(payload.get('min_version'))
+        if status != 200:
+            return (jsonify({"error": snapshot}), status)
+
+        # unchanged snapshot: answer If-None-Match before decoding anything
+        etag = snapshot_etag(snapshot, 'read', addresses, since)
+        unchanged = not_modified(etag, snapshot)
+        if unchanged is not None:
+            return unchanged
+
+        note_activity()
+        result, status = read_addresses(addresses, snapshot=snapshot, since=since)
 
         if status != 200:
             return (jsonify({"error": result}), status)
         
+        return tag_response(jsonify(result), etag, snapshot)
+
+    @app.route('/nes/blocks', methods=['POST', 'OPTIONS'])
+    def _blocks_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        note_activity()
+        payload = request.get_json(silent=True) or {}
+        result, status = block_operation(payload)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
         return (jsonify(result), 200)
 
+    @app.route('/nes/procedures/call', methods=['POST', 'OPTIONS'])
+    def _call_procedure_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        payload = request.get_json(silent=True) or {}
+        result, status = call_procedure(payload.get('name'), payload.get('args'))
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/history', methods=['POST', 'OPTIONS'])
+    def _history_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        payload = request.get_json(silent=True) or {}
+        result, status = history(payload)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/watch', methods=['GET', 'POST', 'OPTIONS'])
+    def _watch_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        if request.method == 'GET':
+            result, status = list_watches()
+        else:
+            payload = request.get_json(silent=True) or {}
+            result, status = add_watch(payload)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/watch/<int:watch_id>', methods=['DELETE', 'OPTIONS'])
+    def _remove_watch_route(watch_id):
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        result, status = remove_watch(watch_id)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/watch/events', methods=['GET'])
+    def _watch_events_route():
+        # optional ?watch=1,2 limits the stream to those watches
+        watch_ids = None
+        if request.args.get('watch'):
+            try:
+                watch_ids = {int(watch_id) for watch_id in request.args['watch'].split(',')}
+            except ValueError:
+                return (jsonify({"error": "watch must be a comma separated list of watch ids"}), 400)
+
+        return Response(
+            stream_with_context(watch_event_stream(watch_ids)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
     @app.route('/nes/bestiary/get-monsters-by-location', methods=['POST', 'OPTIONS'])
     def _get_monsters_by_location_route():
         if request.method == 'OPTIONS':
             return ('', 200)
 
         payload = request.get_json(silent=True) or {}
-        location = payload.get('location')
+        # one location, or a list of them under either key
+        location = payload.get('location', payload.get('locations'))
         result, status = get_monsters_by_location(location)
 
         if status != 200:
@@ -63,6 +177,27 @@ def create_app() -> Flask:
 
         return (jsonify(result), 200)
 
+    @app.route('/nes/bestiary/here', methods=['GET', 'POST', 'OPTIONS'])
+    def _monsters_here_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        snapshot, status = resolve_snapshot()
+        if status != 200:
+            return (jsonify({"error": snapshot}), status)
+
+        etag = snapshot_etag(snapshot, 'here')
+        unchanged = not_modified(etag, snapshot)
+        if unchanged is not None:
+            return unchanged
+
+        result, status = get_monsters_here(snapshot=snapshot)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return tag_response(jsonify(result), etag, snapshot)
+
     @app.route('/nes/bestiary/get-locations-by-monster', methods=['POST', 'OPTIONS'])
     def _get_locations_by_monster_route():
         if request.method == 'OPTIONS':
@@ -77,13 +212,80 @@ def create_app() -> Flask:
 
         return (jsonify(result), 200)
 
+    @app.route('/nes/party', methods=['GET', 'POST', 'OPTIONS'])
+    def _party_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        result, status = get_party()
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/enemies', methods=['GET', 'POST', 'OPTIONS'])
+    def _enemies_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        payload = request.get_json(silent=True) or {}
+        include_empty = bool(payload.get('include_empty') or request.args.get('include_empty'))
+        result, status = get_enemies(include_empty=include_empty)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
+    @app.route('/nes/batch', methods=['POST', 'OPTIONS'])
+    def _batch_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        note_activity()
+        payload = request.get_json(silent=True) or {}
+        operations = payload.get('operations')
+        min_version = payload.get('min_version')
+        result, status = run_batch(operations, min_version)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return (jsonify(result), 200)
+
     @app.route('/nes/names/get', methods=['POST', 'OPTIONS'])
     def _get_names_route():
         if request.method == 'OPTIONS':
             return ('', 200)
 
         # No payload required; simply return the four character names
-        result, status = get_names()
+        snapshot, status = resolve_snapshot()
+        if status != 200:
+            return (jsonify({"error": snapshot}), status)
+
+        etag = snapshot_etag(snapshot, 'names')
+        unchanged = not_modified(etag, snapshot)
+        if unchanged is not None:
+            return unchanged
+
+        result, status = get_names(snapshot=snapshot)
+
+        if status != 200:
+            return (jsonify({"error": result}), status)
+
+        return tag_response(jsonify(result), etag, snapshot)
+
+    @app.route('/nes/admin/reload', methods=['GET', 'POST', 'OPTIONS'])
+    def _reload_route():
+        if request.method == 'OPTIONS':
+            return ('', 200)
+
+        # GET reports the cached static data; POST rebuilds it from the RAMDisk now
+        if request.method == 'GET':
+            return (jsonify({"files": static_data_status()}), 200)
+
+        result, status = reload_static_data()
 
         if status != 200:
             return (jsonify({"error": result}), status)
@@ -95,5 +297,8 @@ def create_app() -> Flask:
 app = create_app()
 
 if __name__ == '__main__':
+    # keep the last RAM_HISTORY_SIZE snapshots for /nes/history. Started only when
+    # serving, so importing the app (benchmarks, tests) starts no poller thread
+    start_history_recorder()
     port = int(os.environ.get('NES_API_PORT', str(get_config().get('NES_API_PORT', 5000))))
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,401 @@
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, TypeVar
+import numpy as np
+from api.utils import fastjson
+
+"""
+Precompiled static data artifacts.
+
+ram_catalog.json and bestiary.json are turned into indexes (the compiled
+catalog, the reverse bestiary, trigram and location indexes) by every
+process that uses them. `scripts/python/compile_static_data.py` (run by
+ffbot.sh) does that work once and saves the result next to each JSON file
+as an artifact (ram_catalog.bin, bestiary.bin), which processes load instead.
+
+An artifact is one file:
+
+    magic b"FFBOTART" | format version (u32) | header length (u32)
+    header (JSON):  {"kind", "source", "source_signature", "arrays": {name: {dtype, shape, offset}}, "objects"}
+    array data, each array 64-byte aligned
+
+`read_artifact()` memory-maps the file read-only and returns its arrays as
+numpy views of the mapping, so every process (and worker) that loads the
+artifact shares one copy of them in the page cache. Indexes are stored as
+arrays too, through the packed containers below, and searched in place:
+
+- `StringTable`: strings in one UTF-8 blob, found through an offsets array
+- `RaggedTable`: lists of ints (or of rows of a `StringTable`), the same way
+- `PackedMap`: a read-only mapping from a `StringTable` of keys, found
+  through an array of hash slots, to one value per key
+
+`objects` in the header holds the little that is not worth packing (such as
+the catalog's address strings); it is the only part parsed on load.
+
+The header records the SHA-256 of the JSON file the artifact was compiled
+from, and its [mtime_ns, size]. While the JSON still has that signature the
+artifact is used without reading the JSON at all; otherwise the JSON is
+hashed and the artifact is only used if the digest still matches. After the
+JSON is edited (see reloadable.py), or when the artifact is missing or from
+another ARTIFACT_VERSION, callers fall back to building from the JSON.
+
+Artifacts are always written to a temporary file and renamed into place, as
+overwriting a mapped file in place would change (or truncate) arrays other
+processes are reading.
+"""
+
+# bump whenever the layout of the file or of any artifact kind changes
+ARTIFACT_VERSION = 2
+
+ARTIFACT_SUFFIX = '.bin'
+
+_MAGIC = b'FFBOTART'
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGNMENT = 64
+
+V = TypeVar('V')
+
+
+class ArtifactError(Exception):
+    """The artifact cannot be used: wrong format or version, wrong kind, or out of date."""
+
+
+class Artifact(NamedTuple):
+    arrays: Dict[str, np.ndarray]
+    objects: Dict[str, Any]
+    # SHA-256 and [mtime_ns, size] of the JSON file it was compiled from
+    source: str
+    source_signature: Optional[List[int]]
+
+
+def artifact_path(source_path: str) -> str:
+    """The artifact compiled from `source_path`: "bestiary.json" -> "bestiary.bin"."""
+    return os.path.splitext(source_path)[0] + ARTIFACT_SUFFIX
+
+
+def source_digest(source_path: str) -> str:
+    """SHA-256 of the file an artifact is compiled from."""
+    with open(source_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_signature(source_path: str) -> List[int]:
+    """[mtime_ns, size] of the file an artifact is compiled from."""
+    st = os.stat(source_path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class StringTable(Sequence[str]):
+    """Strings packed by `pack_strings`: string i is the UTF-8 `blob[offsets[i]:offsets[i + 1]]`."""
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        # memoryviews slice and index without numpy scalars or copies
+        self._blob = blob.data
+        self._offsets = offsets.data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def encoded(self, i: int) -> memoryview:
+        """String `i` as UTF-8, a view of the blob."""
+        offsets = self._offsets
+        return self._blob[offsets[i]:offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        # offsets has one more entry than there are strings: i + 1 checks the bound
+        offsets = self._offsets
+        return str(self._blob[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def decode(self, rows: Iterable[int]) -> List[str]:
+        """Strings `rows`, in order."""
+        blob, offsets = self._blob, self._offsets
+        return [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in rows]
+
+
+class RaggedTable(Sequence[List[Any]]):
+    """
+    Lists packed by `pack_lists`: list i is `values[offsets[i]:offsets[i + 1]]`,
+    as ints, or as the strings of `strings` they number when it is given.
+    """
+    def __init__(self, values: np.ndarray, offsets: np.ndarray, strings: Optional[StringTable] = None):
+        self._values = values.data
+        self._offsets = offsets.data
+        self._strings = strings
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        offsets = self._offsets
+        values = self._values[offsets[i]:offsets[i + 1]].tolist()
+        if self._strings is None:
+            return values
+        return self._strings.decode(values)
+
+
+class PackedMap(Mapping[str, V]):
+    """
+    Read-only mapping packed by `pack_map`: `keys` in their original (and
+    iteration) order, `values` any sequence holding the value of each key's
+    row, and `slots` an open-addressing hash table of rows (-1 when empty),
+    probed linearly from the CRC-32 of the key.
+    """
+    def __init__(self, keys: StringTable, slots: np.ndarray, values: Sequence[V]):
+        self._keys = keys
+        self._slots = slots.data
+        self._mask = len(slots) - 1
+        self._values = values
+
+    def row(self, key: Any) -> Optional[int]:
+        """The row of `key`, or None if it is not a key."""
+        if not isinstance(key, str):
+            return None
+        wanted = key.encode('utf-8')
+        slot = zlib.crc32(wanted) & self._mask
+        while True:
+            row = self._slots[slot]
+            if row < 0:
+                return None
+            if self._keys.encoded(row) == wanted:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, key: str) -> V:
+        row = self.row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._values[row]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        row = self.row(key)
+        return default if row is None else self._values[row]
+
+    def __contains__(self, key: Any) -> bool:
+        return self.row(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def pack_strings(arrays: Dict[str, np.ndarray], name: str, strings: Iterable[str]) -> None:
+    """Add `strings` to `arrays` as the arrays of the `StringTable` `name`."""
+    encoded = [string.encode('utf-8') for string in strings]
+    arrays[f"{name}.blob"] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    arrays[f"{name}.offsets"] = np.cumsum([0] + [len(e) for e in encoded], dtype=np.int64)
+
+
+def unpack_strings(arrays: Dict[str, np.ndarray], name: str) -> StringTable:
+    """The `StringTable` `name` added by `pack_strings`."""
+    return StringTable(arrays[f"{name}.blob"], arrays[f"{name}.offsets"])
+
+
+def pack_lists(arrays: Dict[str, np.ndarray], name: str, lists: Iterable[Iterable[int]]) -> None:
+    """Add lists of ints to `arrays` as the arrays of the `RaggedTable` `name`."""
+    lists = [list(values) for values in lists]
+    arrays[f"{name}.values"] = np.array([value for values in lists for value in values], dtype=np.int32)
+    arrays[f"{name}.offsets"] = np.cumsum([0] + [len(values) for values in lists], dtype=np.int64)
+
+
+def unpack_lists(arrays: Dict[str, np.ndarray], name: str, strings: Optional[StringTable] = None) -> RaggedTable:
+    """The `RaggedTable` `name` added by `pack_lists`, translated through `strings` if given."""
+    return RaggedTable(arrays[f"{name}.values"], arrays[f"{name}.offsets"], strings)
+
+
+def pack_map(arrays: Dict[str, np.ndarray], name: str, keys: Iterable[str]) -> None:
+    """
+    Add the (distinct) keys of the `PackedMap` `name` to `arrays`. The caller
+    packs its values, in the same order as `keys`.
+    """
+    keys = list(keys)
+    pack_strings(arrays, name, keys)
+    # a power of two at least twice the keys: probes stay short
+    size = 2
+    while size < 2 * len(keys):
+        size *= 2
+    slots = np.full(size, -1, dtype=np.int32)
+    for row, key in enumerate(keys):
+        slot = zlib.crc32(key.encode('utf-8')) & (size - 1)
+        while slots[slot] >= 0:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = row
+    arrays[f"{name}.slots"] = slots
+
+
+def unpack_map(arrays: Dict[str, np.ndarray], name: str, values: Sequence[V]) -> PackedMap[V]:
+    """The `PackedMap` `name` added by `pack_map`, with the given `values`."""
+    return PackedMap(unpack_strings(arrays, name), arrays[f"{name}.slots"], values)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_artifact(
+    path: str,
+    kind: str,
+    digest: str,
+    signature: Optional[List[int]],
+    arrays: Dict[str, np.ndarray],
+    objects: Dict[str, Any],
+) -> None:
+    """
+    Write an artifact of `kind` compiled from a source with SHA-256 `digest`
+    and [mtime_ns, size] `signature`, atomically replacing `path`.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # array offsets depend on the header length, which depends on the offsets:
+    # lay out arrays after a first estimate and grow until the header fits
+    start = 0
+    while True:
+        layout: Dict[str, Dict[str, Any]] = {}
+        offset = start
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _aligned(offset + array.nbytes)
+        header = fastjson.dumps_bytes({
+            "kind": kind,
+            "source": digest,
+            "source_signature": signature,
+            "arrays": layout,
+            "objects": objects,
+        })
+        needed = _aligned(_PREAMBLE.size + len(header))
+        if needed <= start:
+            break
+        start = needed
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREAMBLE.pack(_MAGIC, ARTIFACT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(layout[name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_artifact(path: str, kind: str) -> Artifact:
+    """
+    Memory-map the artifact at `path` (see module doc).
+
+    Raises FileNotFoundError if there is none, and ArtifactError if it is not
+    an artifact of this ARTIFACT_VERSION and `kind`.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            raise ArtifactError(f"{path} is not an artifact")
+
+    if len(mapped) < _PREAMBLE.size:
+        raise ArtifactError(f"{path} is not an artifact")
+    magic, version, header_length = _PREAMBLE.unpack_from(mapped)
+    if magic != _MAGIC:
+        raise ArtifactError(f"{path} is not an artifact")
+    if version != ARTIFACT_VERSION:
+        raise ArtifactError(f"{path} has format version {version}, expected {ARTIFACT_VERSION}")
+
+    try:
+        header = fastjson.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        if header.get("kind") != kind:
+            raise ArtifactError(f"{path} holds {header.get('kind')}, expected {kind}")
+
+        arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            count = int(np.prod(shape, dtype=np.int64))
+            # read-only views: the mapping stays open as long as any of them is alive
+            arrays[name] = np.frombuffer(mapped, dtype=np.dtype(spec["dtype"]), count=count, offset=spec["offset"]).reshape(shape)
+        artifact = Artifact(
+            arrays=arrays,
+            objects=header["objects"],
+            source=header["source"],
+            source_signature=header["source_signature"],
+        )
+    except ArtifactError:
+        raise
+    except Exception as e:
+        # truncated or hand-edited: never trust a partly readable artifact
+        raise ArtifactError(f"{path} is corrupt: {e}")
+    return artifact
+
+
+def compile_artifact(
+    source_path: str,
+    kind: str,
+    split: Callable[[Any], Tuple[Dict[str, np.ndarray], Dict[str, Any]]],
+) -> str:
+    """
+    Parse the JSON file `source_path`, turn it into (arrays, objects) with
+    `split` and write them as the artifact of `kind` next to it. Returns the
+    artifact path.
+    """
+    # stat before reading: if the file changes in between, the recorded
+    # signature goes stale and the digest decides
+    signature = source_signature(source_path)
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    arrays, objects = split(fastjson.loads(data))
+    path = artifact_path(source_path)
+    write_artifact(path, kind, hashlib.sha256(data).hexdigest(), signature, arrays, objects)
+    return path
+
+
+def load_artifact(source_path: str, kind: str) -> Optional[Artifact]:
+    """
+    The artifact compiled from the current contents of `source_path`, or None
+    if there is no usable one (missing, another version, or out of date).
+    `source_path` is only read when its signature changed since compiling.
+    """
+    try:
+        signature = source_signature(source_path)
+        artifact = read_artifact(artifact_path(source_path), kind)
+        if artifact.source_signature != signature and artifact.source != source_digest(source_path):
+            return None
+        return artifact
+    except (OSError, ArtifactError):
+        return None
+
+
+__all__ = [
+    "ARTIFACT_VERSION",
+    "ARTIFACT_SUFFIX",
+    "ArtifactError",
+    "Artifact",
+    "StringTable",
+    "RaggedTable",
+    "PackedMap",
+    "artifact_path",
+    "source_digest",
+    "source_signature",
+    "pack_strings",
+    "unpack_strings",
+    "pack_lists",
+    "unpack_lists",
+    "pack_map",
+    "unpack_map",
+    "write_artifact",
+    "read_artifact",
+    "compile_artifact",
+    "load_artifact",
+]
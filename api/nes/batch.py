@@ -0,0 +1,147 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .command_queue import DEFAULT_WAIT_TIMEOUT, wait_for
+from .read import read_addresses
+from .write import write_addresses
+from .names import get_names
+from .bestiary import get_monsters_by_location, get_locations_by_monster
+from .layout import get_enemies, get_party
+from .zones import get_monsters_here
+from .snapshot import RamSnapshot, get_ram_snapshot
+
+
+"""
+Batch requests.
+
+Runs a list of NES operations in one call, so a client that needs names,
+party stats and a bestiary lookup makes one round trip instead of several:
+
+    {"min_version": 12, "operations": [
+        {"op": "names"},
+        {"op": "party"},
+        {"op": "read", "addresses": ["0x00610A", "0x00610B"], "since": 340},
+        {"op": "monsters_by_location", "location": "coneria"},
+        {"op": "monsters_here"},
+        {"op": "locations_by_monster", "monsters": ["imps"]},
+        {"op": "write", "addresses": [{"0x006039": 5}]}
+    ]}
+
+Every read-type operation (read, names, party, enemies, monsters_here) sees
+the same RAM snapshot, taken once when the first of them runs, so their
+results are consistent with each other. Writes are queued in order like /nes/write; they are not visible to
+reads in the same batch (pass the returned ticket as `min_version` of the
+next batch to read them back).
+
+Each operation gets its own `{"status": ..., "result": ...}` or
+`{"status": ..., "error": ...}` entry, so one failing operation does not fail
+the others.
+"""
+
+# most operations accepted in one batch
+MAX_OPERATIONS = 32
+
+
+class _PinnedSnapshot:
+    """Loads the current snapshot on first use and returns the same one afterwards."""
+    def __init__(self):
+        self.snapshot: Optional[RamSnapshot] = None
+
+    def get(self) -> RamSnapshot:
+        if self.snapshot is None:
+            self.snapshot = get_ram_snapshot()
+        return self.snapshot
+
+
+def _read(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    addresses = operation.get('addresses')
+    # validate before loading the snapshot, so a bad request does not touch the RAMdisk
+    if not isinstance(addresses, list):
+        return ("addresses must be a list of address strings", 400)
+    return read_addresses(addresses, snapshot=pinned.get(), since=operation.get('since'))
+
+
+def _names(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_names(snapshot=pinned.get())
+
+
+def _party(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_party(snapshot=pinned.get())
+
+
+def _enemies(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_enemies(snapshot=pinned.get(), include_empty=bool(operation.get('include_empty')))
+
+
+def _monsters_here(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_monsters_here(snapshot=pinned.get())
+
+
+def _monsters_by_location(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_monsters_by_location(operation.get('location'))
+
+
+def _locations_by_monster(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return get_locations_by_monster(operation.get('monsters'))
+
+
+def _write(operation: Dict[str, Any], pinned: _PinnedSnapshot) -> Tuple[Any, int]:
+    return write_addresses(operation.get('addresses'))
+
+
+OPERATIONS: Dict[str, Callable[[Dict[str, Any], _PinnedSnapshot], Tuple[Any, int]]] = {
+    "read": _read,
+    "names": _names,
+    "party": _party,
+    "enemies": _enemies,
+    "monsters_here": _monsters_here,
+    "monsters_by_location": _monsters_by_location,
+    "locations_by_monster": _locations_by_monster,
+    "write": _write,
+}
+
+
+def run_batch(operations: List[Dict[str, Any]], min_version: Optional[int] = None) -> Tuple[Any, int]:
+    """
+    Run `operations` in order (see module doc).
+
+    Input: `Optional[int] min_version`: A write ticket; wait until the daemon
+        has applied it before taking the snapshot, as in `read_addresses`.
+
+    Returns (result, status) where result is
+    `{"snapshot_version": v, "results": [...]}` with one entry per operation
+    (`snapshot_version` is None if no operation read RAM), or an error message
+    string if the batch itself is invalid.
+    """
+    if not isinstance(operations, list):
+        return ("operations must be a list", 400)
+    if not operations:
+        return ("operations must not be empty", 400)
+    if len(operations) > MAX_OPERATIONS:
+        return (f"At most {MAX_OPERATIONS} operations per batch", 400)
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            return (f"each operation must be an object with op one of: {', '.join(OPERATIONS)}", 400)
+
+    if min_version is not None and (isinstance(min_version, bool) or not isinstance(min_version, int)):
+        return ("min_version must be an integer write ticket", 400)
+    if min_version is not None and not wait_for(min_version, DEFAULT_WAIT_TIMEOUT):
+        return (f"Timed out waiting for write {min_version} to be applied", 504)
+
+    pinned = _PinnedSnapshot()
+    results = []
+    for operation in operations:
+        try:
+            result, status = OPERATIONS[operation['op']](operation, pinned)
+        except FileNotFoundError as e:
+            result, status = (f"RAM snapshot not found: {e}", 500)
+        except Exception as e:
+            result, status = (f"Error running {operation['op']}: {e}", 500)
+        if status == 200:
+            results.append({"status": status, "result": result})
+        else:
+            results.append({"status": status, "error": result})
+
+    snapshot_version = pinned.snapshot.version if pinned.snapshot is not None else None
+    return ({"snapshot_version": snapshot_version, "results": results}, 200)
+
+
+__all__ = ["MAX_OPERATIONS", "OPERATIONS", "run_batch"]
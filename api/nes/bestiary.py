@@ -1,27 +1,59 @@
-import json
 from .config import get_config
-from typing import Dict, Any, List, Tuple
-from langchain.tools import tool
+from .fuzzy import Match, TrigramIndex
+from .artifacts import compile_artifact, load_artifact, pack_lists, pack_map, pack_strings, unpack_lists, unpack_map, unpack_strings
+from .location_index import LocationIndex
+from .reloadable import reloadable_file
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional, Tuple, Union
+import numpy as np
 
-from api.utils.console import print_to_console
+from api.utils import fastjson
 
 """
 Bestiary loader.
 
-Provides `_load_bestiary()` which returns a tuple `(bestiary, reverse_bestiary)`:
-- `bestiary`: Dict[str, List[str]] mapping location -> list of monster names
-- `reverse_bestiary`: Dict[str, List[str]] mapping normalized monster name -> list of locations
-
-The function caches the parsed bestiary for the lifetime of the process.
+Provides `_load_bestiary()` which returns a `BestiaryIndex` tuple:
+- `bestiary`: Mapping[str, List[str]] mapping location -> list of monster names
+- `reverse_bestiary`: Mapping[str, List[str]] mapping normalized monster name -> list of locations
+- `monster_names`: Mapping[str, str] mapping normalized monster name -> name as spelled in bestiary.json
+- `monster_index`: a `TrigramIndex` over the normalized monster names (see fuzzy.py),
+  so misspelled, plural or spelled-out names ("Wolves", "Frost Giant") still
+  resolve to the closest monster
+- `location_index`: a `LocationIndex` over the bestiary keys (see location_index.py),
+  so "Castle of Ordeal 2F" or "marsh cave" resolve to "(castle_of_ordeal,2f)"
+  and "(marsh_cave,b1)"
+
+The index is loaded from bestiary.bin, the artifact compiled from bestiary.json
+by `compile_bestiary_artifact()` (see artifacts.py), whose packed maps and
+indexes are searched in place, falling back to building it from bestiary.json
+when there is no up-to-date artifact. It is cached and
+rebuilt when bestiary.json changes (see reloadable.py).
 """
 
 _config = get_config()
 _RAMDISK_DIR = _config['RAMDISK_DIR']
 _BESTIARY_PATH = _RAMDISK_DIR + 'bestiary.json'
 
-def _load_bestiary() -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+BESTIARY_ARTIFACT_KIND = 'bestiary'
+
+# ranked candidates returned per monster by get_locations_by_monster
+MAX_MONSTER_MATCHES = 5
+
+
+class BestiaryIndex(NamedTuple):
+    # dicts when built from the JSON, `PackedMap`s when loaded from bestiary.bin
+    bestiary: Mapping[str, List[str]]
+    reverse_bestiary: Mapping[str, List[str]]
+    monster_names: Mapping[str, str]
+    monster_index: TrigramIndex
+    location_index: LocationIndex
+
+
+def _normalize(name: str) -> str:
+    return ''.join([c for c in name.lower() if c.isalnum()])
+
+def _index_bestiary(bestiary_data: Any) -> BestiaryIndex:
     """
-    Load and return the bestiary and reverse bestiary maps built from bestiary.json.
+    Build the bestiary and reverse bestiary maps from the parsed bestiary.json.
 
     The bestiary file is expected to be a JSON object whose keys are location
     strings and whose values are arrays of monster names. Example:
@@ -30,65 +62,171 @@ def _load_bestiary() -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
       "(Another Place)": ["Cerebus"]
     }
 
-    Returns (bestiary, reverse_bestiary)
+    Returns BestiaryIndex(bestiary, reverse_bestiary, monster_names, monster_index, location_index)
     """
-    # Cache parsed entries for lifetime of process — the bestiary is static.
-    global _BESTIARY_CACHE, _REVERSE_BESTIARY_CACHE
-    try:
-        if _BESTIARY_CACHE is not None and _REVERSE_BESTIARY_CACHE is not None:
-            return (_BESTIARY_CACHE, _REVERSE_BESTIARY_CACHE)
-    except NameError:
-        _BESTIARY_CACHE = None
-        _REVERSE_BESTIARY_CACHE = None
-
-    with open(_BESTIARY_PATH, 'r') as f:
-        bestiary_data = json.load(f)
-
     bestiary: Dict[str, List[str]] = bestiary_data or {}
     reverse_bestiary: Dict[str, List[str]] = {}
-
-    def normalize(name: str) -> str:
-        return ''.join([c for c in name.lower() if c.isalnum()])
+    monster_names: Dict[str, str] = {}
 
     for loc, monsters in bestiary.items():
         # ensure monsters is a list
         if not isinstance(monsters, list):
             continue
         for monster in monsters:
-            key = normalize(monster)
+            key = _normalize(monster)
             if key not in reverse_bestiary:
                 reverse_bestiary[key] = []
+                monster_names[key] = monster
             reverse_bestiary[key].append(loc)
 
-    _BESTIARY_CACHE = bestiary
-    _REVERSE_BESTIARY_CACHE = reverse_bestiary
-    return (_BESTIARY_CACHE, _REVERSE_BESTIARY_CACHE)
+    return BestiaryIndex(
+        bestiary=bestiary,
+        reverse_bestiary=reverse_bestiary,
+        monster_names=monster_names,
+        monster_index=TrigramIndex(reverse_bestiary),
+        location_index=LocationIndex(bestiary),
+    )
+
+
+def _split_bestiary(bestiary_data: Any) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    The (arrays, objects) of a bestiary artifact (see artifacts.py): every map
+    and index packed into arrays, monster and location names numbered in the
+    `names` and `locations` string tables.
+    """
+    index = _index_bestiary(bestiary_data)
+    # the JSON path skips non-list entries when indexing too
+    bestiary = {loc: monsters if isinstance(monsters, list) else [] for loc, monsters in index.bestiary.items()}
+    locations = {loc: i for i, loc in enumerate(bestiary)}
+    names = {name: i for i, name in enumerate(dict.fromkeys(name for monsters in bestiary.values() for name in monsters))}
+
+    arrays: Dict[str, np.ndarray] = {}
+    pack_map(arrays, "locations", bestiary)
+    pack_lists(arrays, "bestiary", ([names[name] for name in monsters] for monsters in bestiary.values()))
+    pack_strings(arrays, "names", names)
+    pack_map(arrays, "monsters", index.reverse_bestiary)
+    pack_lists(arrays, "reverse_bestiary", ([locations[loc] for loc in locs] for locs in index.reverse_bestiary.values()))
+    pack_strings(arrays, "monster_names", (index.monster_names[key] for key in index.reverse_bestiary))
+    index.monster_index.to_arrays(arrays, "monster_index")
+    index.location_index.to_arrays(arrays, "location_index")
+    return (arrays, {})
+
+
+def compile_bestiary_artifact(path: str = _BESTIARY_PATH) -> str:
+    """Compile bestiary.json at `path` into bestiary.bin next to it; returns the artifact path."""
+    return compile_artifact(path, BESTIARY_ARTIFACT_KIND, _split_bestiary)
+
+
+def _build_bestiary(path: str) -> BestiaryIndex:
+    """
+    The `BestiaryIndex` of bestiary.json at `path`: loaded from bestiary.bin
+    when it was compiled from the file as it is now, else built from the JSON.
+    """
+    artifact = load_artifact(path, BESTIARY_ARTIFACT_KIND)
+    if artifact is not None:
+        arrays = artifact.arrays
+        names = unpack_strings(arrays, "names")
+        locations = unpack_strings(arrays, "locations")
+        return BestiaryIndex(
+            bestiary=unpack_map(arrays, "locations", unpack_lists(arrays, "bestiary", names)),
+            reverse_bestiary=unpack_map(arrays, "monsters", unpack_lists(arrays, "reverse_bestiary", locations)),
+            monster_names=unpack_map(arrays, "monsters", unpack_strings(arrays, "monster_names")),
+            monster_index=TrigramIndex.from_arrays(arrays, "monster_index"),
+            location_index=LocationIndex.from_arrays(arrays, "location_index"),
+        )
+
+    with open(path, 'rb') as f:
+        return _index_bestiary(fastjson.load(f))
+
+_BESTIARY = reloadable_file('bestiary', _BESTIARY_PATH, _build_bestiary)
+
+def _load_bestiary() -> BestiaryIndex:
+    """
+    Return the current `BestiaryIndex`, loading it (see `_build_bestiary`) on first use.
+
+    The index is rebuilt in the background when bestiary.json changes (see
+    reloadable.py); a whole new `BestiaryIndex` replaces the old one, so call
+    this once per request and use the returned index throughout.
+    """
+    return _BESTIARY.get()
 
 
-def get_monsters_by_location(location: str) -> Tuple[Dict[str, List[str]], int]:
+def get_monsters_by_location(location: Union[str, List[str]]) -> Tuple[Dict[str, Any], int]:
     """
-    Return the monsters list for the given `location` key from the cached bestiary.
+    Return the monsters list for the given `location` from the cached bestiary.
 
     Ensures the bestiary cache is loaded by calling `_load_bestiary()` first.
+    The location is resolved through the location index, so case, punctuation,
+    floor spelling ("2F", "b3", "3rd floor"), partial names ("marsh cave") and
+    misspellings are accepted; the bestiary key it matched is returned.
+
+    Input: `location`: one location name, or a list of them to answer in one call.
 
     Returns a tuple `(result, status)` where `result` is a dict of the form
-    `{"monsters": [...]}` on success, or an error message string on failure.
+    `{"monsters": [...], "location": "(marsh_cave,b1)"}` on success (for a list,
+    `{"monsters": {name: [...]}, "locations": {name: key}}`), or an error message
+    string on failure. The key is None for a location that matched nothing.
     """
-    if not isinstance(location, str):
+    if isinstance(location, list):
+        if not all(isinstance(name, str) for name in location):
+            return ("location must be a string or a list of strings", 400)
+    elif not isinstance(location, str):
         return ("location must be a string", 400)
 
     try:
-        bestiary, _ = _load_bestiary()
+        index = _load_bestiary()
     except FileNotFoundError:
         return (f"bestiary.json not found at {_BESTIARY_PATH}", 500)
     except Exception as e:
         return (f"Error loading bestiary.json: {e}", 500)
 
-    monsters = bestiary.get(location) or ["no monsters here"]
-    return ({"monsters": monsters}, 200)
-
-
-__all__ = ["_load_bestiary", "get_monsters_by_location"]
+    def monsters_at(name: str) -> Tuple[List[str], Optional[str]]:
+        key = index.location_index.lookup(name)
+        return (index.bestiary.get(key) or ["no monsters here"], key)
+
+    if isinstance(location, str):
+        monsters, key = monsters_at(location)
+        return ({"monsters": monsters, "location": key}, 200)
+
+    monsters_obj: Dict[str, List[str]] = {}
+    locations_obj: Dict[str, Optional[str]] = {}
+    for name in location:
+        monsters_obj[name], locations_obj[name] = monsters_at(name)
+    return ({"monsters": monsters_obj, "locations": locations_obj}, 200)
+
+
+__all__ = ["MAX_MONSTER_MATCHES", "BestiaryIndex", "_load_bestiary", "compile_bestiary_artifact", "get_monsters_by_location"]
+
+
+def _singular_forms(key: str) -> List[str]:
+    """`key` followed by the singulars it could be the plural of ("wolves" -> "wolve", "wolv", "wolf")."""
+    forms = [key]
+    if key.endswith('s'):
+        forms.append(key[:-1])
+        if key.endswith('es'):
+            forms.append(key[:-2])
+        if key.endswith('ves'):
+            forms.append(key[:-3] + 'f')
+        if key.endswith('ies'):
+            forms.append(key[:-3] + 'y')
+    if key.endswith('men'):
+        forms.append(key[:-3] + 'man')
+    return forms
+
+def _match_monster(name: str, index: BestiaryIndex) -> List[Match]:
+    """Closest monsters to `name` over all its singular forms, best first."""
+    forms = _singular_forms(_normalize(name))
+    # exact names (the common case) skip the fuzzy search
+    for form in forms:
+        if form in index.reverse_bestiary:
+            return [Match(form, 0, 1.0)]
+    best: Dict[str, Match] = {}
+    for form in forms:
+        for match in index.monster_index.search(form, MAX_MONSTER_MATCHES):
+            if match.key not in best or match[1:] < best[match.key][1:]:
+                best[match.key] = match
+    ranked = sorted(best.values(), key=lambda m: (m.distance, -m.similarity, m.key))
+    return ranked[:MAX_MONSTER_MATCHES]
 
 
 def get_locations_by_monster(monsters: List[str]) -> Tuple[Dict[str, Dict[str, List[str]]], int]:
@@ -96,17 +234,22 @@ def get_locations_by_monster(monsters: List[str]) -> Tuple[Dict[str, Dict[str, L
     Given a list of monster names, return a mapping from each (possibly-singularized)
     monster string to a list of locations where that monster appears.
 
-    This mirrors `requestLocationsByMonster` in the frontend hook: it will strip a
-    trailing 's' from monster names (except 'cerebus' and 'chaos') before lookup.
+    This mirrors `requestLocationsByMonster` in the frontend hook: the result is
+    keyed by the monster name with a trailing 's' stripped (except 'cerebus' and
+    'chaos'). Each name is resolved through the fuzzy monster index, so plurals
+    ("Wolves"), misspellings ("Cockatrice") and spelled-out names ("Frost Giant")
+    return the locations of the closest monster; its ranked candidates are
+    returned under "matches".
 
-    Returns (result, status) where `result` is of the form {"locations": {monster: [locs]}}
+    Returns (result, status) where `result` is of the form
+    {"locations": {monster: [locs]}, "matches": {monster: [{"monster": name, "distance": n}, ...]}}
     on success, or an error message string and HTTP status on failure.
     """
     if not isinstance(monsters, list):
         return ("monsters must be a list", 400)
 
     try:
-        _, reverse_bestiary = _load_bestiary()
+        index = _load_bestiary()
     except FileNotFoundError:
         return (f"bestiary.json not found at {_BESTIARY_PATH}", 500)
     except Exception as e:
@@ -118,103 +261,24 @@ def get_locations_by_monster(monsters: List[str]) -> Tuple[Dict[str, Dict[str, L
             return name[:-1]
         return name
 
-    def normalize(name: str) -> str:
-        return ''.join([c for c in name.lower() if c.isalnum()])
-
     locations_obj: Dict[str, List[str]] = {}
+    matches_obj: Dict[str, List[Dict[str, Any]]] = {}
     for m in monsters:
         if not isinstance(m, str):
             locations_obj[str(m)] = ["monster not found"]
+            matches_obj[str(m)] = []
             continue
 
         singular = singularize(m)
-        key = normalize(singular)
-        locations = reverse_bestiary.get(key) or ["monster not found"]
+        matches = _match_monster(m, index)
+        locations = index.reverse_bestiary[matches[0].key] if matches else ["monster not found"]
         locations_obj[singular] = locations
+        matches_obj[singular] = [
+            {"monster": index.monster_names[match.key], "distance": match.distance}
+            for match in matches
+        ]
 
-    return ({"locations": locations_obj}, 200)
+    return ({"locations": locations_obj, "matches": matches_obj}, 200)
 
 
 __all__.append("get_locations_by_monster")
-
-
-# Provide LangChain tool wrappers while keeping the core functions plain for Flask/other usage.
-@tool
-def get_monsters_by_location_tool(arg_str: str) -> str:
-    """
-    LangChain tool wrapper around `get_monsters_by_location` that accepts a JSON string
-    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
-
-    Input examples:
-      '"(Some Location)"'
-      '{"location": "(Some Location)"}'
-
-    Output example: '{"monsters": ["Imp", "Goblin"]}'
-    """
-    print_to_console()
-    print_to_console('Calling get_monsters_by_location tool:', color='yellow')
-    print_to_console('arg_str = ' + arg_str)
-
-    # Parse location from the LLM-provided JSON string
-    try:
-        parsed = json.loads(arg_str)
-        if isinstance(parsed, dict) and 'location' in parsed:
-            location = parsed['location']
-        else:
-            # assume the parsed value itself is the location string
-            location = parsed
-    except Exception as e:
-        print_to_console(f'error = {e}', 'red')
-        return '{"error": "Failed to parse tool input: ' + str(e) + '"}'
-
-    result, status = get_monsters_by_location(location)
-    if status != 200:
-        print_to_console('error = ' + str(result), 'red')
-        return '{"error": "' + str(result) + '"}'
-
-    try:
-        print_to_console('result = ' + json.dumps(result))
-        return json.dumps(result)
-    except Exception as e:
-        print_to_console('error = ' + str(e), 'red')
-        return '{"error": "' + str(e) + '"}'
-
-
-@tool
-def get_locations_by_monster_tool(arg_str: str) -> str:
-    """
-    LangChain tool wrapper around `get_locations_by_monster` that accepts a JSON string
-    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
-
-    Input examples:
-      '["Goblin","Imps"]'
-      '{"monsters": ["Goblin","Imps"]}'
-
-    Output example: '{"locations": {"Goblin": ["(Loc1)"], "Imp": ["(Loc2)"]}}'
-    """
-    print_to_console()
-    print_to_console('Calling get_locations_by_monster tool:', color='yellow')
-    print_to_console('arg_str = ' + arg_str)
-
-    try:
-        parsed = json.loads(arg_str)
-        if isinstance(parsed, dict) and 'monsters' in parsed:
-            monsters = parsed['monsters']
-        else:
-            monsters = parsed
-    except Exception as e:
-        print_to_console(f'error = {e}', 'red')
-        return '{"error": "Failed to parse tool input: ' + str(e) + '"}'
-
-    result, status = get_locations_by_monster(monsters)
-    if status != 200:
-        print_to_console('error = ' + str(result), 'red')
-        return '{"error": "' + str(result) + '"}'
-
-    try:
-        print_to_console('result = ' + json.dumps(result))
-        return json.dumps(result)
-    except Exception as e:
-        print_to_console('error = ' + str(e), 'red')
-        return '{"error": "' + str(e) + '"}'
-
@@ -0,0 +1,187 @@
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+"""
+Binary RAM snapshot format.
+
+An alternative to ram_contents.json selected with RAM_SNAPSHOT_FORMAT=binary.
+The daemon copies whole RAM regions with `memory.readbyterange` and writes
+them behind a small little-endian header:
+
+    magic         4s   b"FFRS"
+    version       u16  format version (SNAPSHOT_FORMAT_VERSION)
+    region_count  u16
+    sequence      u32  daemon tick counter
+    frame         u32  emulator frame counter
+    region_count x (base u32, length u32)
+    raw bytes for each region, in table order
+
+Each snapshot is written to a temporary file and renamed into place, so a
+mapped snapshot is never modified underneath a reader: a new tick produces a
+new inode, which the snapshot cache notices and maps afresh.
+"""
+
+SNAPSHOT_MAGIC = b"FFRS"
+SNAPSHOT_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHII')
+_REGION = struct.Struct('<II')
+
+# NES internal RAM ($0000-$07FF) and cartridge SRAM ($6000-$7FFF). The PPU/APU
+# register space in between is deliberately skipped: reading it has side effects.
+SNAPSHOT_REGIONS: Tuple[Tuple[int, int], ...] = ((0x0000, 0x0800), (0x6000, 0x2000))
+
+
+class BinaryRamContents(Mapping):
+    """
+    Read-only, zero-copy view over a mapped binary snapshot.
+
+    Behaves like the dict parsed from ram_contents.json (address string ->
+    "0xNN" hex string) so it can be used anywhere that dict is, and adds
+    `byte()` for direct integer access without any string formatting.
+    """
+    def __init__(self, buffer: memoryview, regions: List[Tuple[int, int, int]], sequence: int, frame: int):
+        self._buffer = buffer
+        # (base, length, offset into buffer)
+        self._regions = regions
+        # zero-copy uint8 arrays over each region for batched access
+        self._region_arrays = [
+            (base, np.frombuffer(buffer, dtype=np.uint8, count=length, offset=offset))
+            for base, length, offset in regions
+        ]
+        self.sequence = sequence
+        self.frame = frame
+
+    def _offset(self, address: int) -> Optional[int]:
+        for base, length, offset in self._regions:
+            if base <= address < base + length:
+                return offset + address - base
+        return None
+
+    def byte(self, address: str) -> Optional[int]:
+        """Return the raw byte at `address` (e.g. "0x006110"), or None if not captured."""
+        try:
+            offset = self._offset(int(address, 16))
+        except (TypeError, ValueError):
+            return None
+        if offset is None:
+            return None
+        return self._buffer[offset]
+
+    def gather(self, addresses: np.ndarray) -> np.ndarray:
+        """
+        Return the raw bytes at the integer `addresses` as an int32 array, with
+        -1 for addresses outside the captured regions.
+        """
+        raw = np.full(len(addresses), -1, dtype=np.int32)
+        for base, region in self._region_arrays:
+            inside = (addresses >= base) & (addresses < base + len(region))
+            if inside.any():
+                raw[inside] = region[addresses[inside] - base]
+        return raw
+
+    def get(self, address: str, default: Optional[str] = None) -> Optional[str]:
+        # overridden so lookups of uncaptured addresses don't go through KeyError
+        value = self.byte(address)
+        if value is None:
+            return default
+        return "0x%02X" % value
+
+    def __getitem__(self, address: str) -> str:
+        value = self.byte(address)
+        if value is None:
+            raise KeyError(address)
+        return "0x%02X" % value
+
+    def __iter__(self) -> Iterator[str]:
+        for base, length, _ in self._regions:
+            for address in range(base, base + length):
+                yield "0x%06X" % address
+
+    def __len__(self) -> int:
+        return sum(length for _, length, _ in self._regions)
+
+
+def load_binary_snapshot(path: str) -> BinaryRamContents:
+    """
+    Memory-map the binary snapshot at `path` and return a view over it.
+
+    Raises FileNotFoundError if the file is missing and ValueError if it is
+    empty, truncated or not a snapshot of a supported format version.
+    """
+    with open(path, 'rb') as f:
+        # mmap rejects empty files with ValueError, matching the JSON path
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(mapped)
+    if len(buffer) < _HEADER.size:
+        raise ValueError("binary snapshot is truncated")
+
+    magic, version, region_count, sequence, frame = _HEADER.unpack_from(buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("binary snapshot has an unexpected header")
+    if version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"unsupported binary snapshot version {version}")
+
+    regions: List[Tuple[int, int, int]] = []
+    offset = _HEADER.size + region_count * _REGION.size
+    for i in range(region_count):
+        base, length = _REGION.unpack_from(buffer, _HEADER.size + i * _REGION.size)
+        regions.append((base, length, offset))
+        offset += length
+
+    if offset > len(buffer):
+        raise ValueError("binary snapshot is truncated")
+
+    return BinaryRamContents(buffer, regions, sequence, frame)
+
+
+def write_binary_snapshot(path: str, regions: Sequence[Tuple[int, bytes]], sequence: int = 0, frame: int = 0) -> None:
+    """
+    Pure-Python stand-in for the daemon's binary writer.
+
+    `regions` is a sequence of (base address, raw bytes). The snapshot is
+    written to a temporary file and atomically renamed over `path`, exactly as
+    the Lua daemon does.
+    """
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(regions), sequence & 0xFFFFFFFF, frame & 0xFFFFFFFF)]
+    for base, data in regions:
+        parts.append(_REGION.pack(base, len(data)))
+    for _, data in regions:
+        parts.append(bytes(data))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(parts))
+    os.replace(tmp_path, path)
+
+
+def regions_from_ram_contents(ram_contents: Mapping) -> List[Tuple[int, bytes]]:
+    """
+    Build SNAPSHOT_REGIONS byte strings from a ram_contents.json style dict.
+    Addresses that are absent from `ram_contents` are filled with zero.
+    """
+    regions: List[Tuple[int, bytes]] = []
+    for base, length in SNAPSHOT_REGIONS:
+        data = bytearray(length)
+        for address, raw in ram_contents.items():
+            addr = int(address, 16)
+            if base <= addr < base + length:
+                data[addr - base] = int(raw, 16) if isinstance(raw, str) else int(raw)
+        regions.append((base, bytes(data)))
+    return regions
+
+
+__all__ = [
+    "SNAPSHOT_MAGIC",
+    "SNAPSHOT_FORMAT_VERSION",
+    "SNAPSHOT_REGIONS",
+    "BinaryRamContents",
+    "load_binary_snapshot",
+    "write_binary_snapshot",
+    "regions_from_ram_contents",
+]
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .command_queue import CallArgument, enqueue_call, format_call, parse_address
+
+from api.utils.console import print_to_console
+
+"""
+Block memory operations.
+
+Instead of expanding a block move into one `memory.writebyte` per byte, these
+queue a single procedure call that the daemon runs as a loop over
+`memory.readbyterange` / `memory.writebyte` (see scripts/lua/blocks.lua):
+
+- `copy_block(src, dst, length)`
+- `swap_blocks(a, b, length)`
+- `permute_blocks(bases, length, order)`: block order[i] moves to bases[i]
+
+Each operation reads every source byte before writing, so the whole move is
+applied within one frame. Like `write_addresses`, each returns
+({"message", "ticket"}, 200) on success.
+"""
+
+# largest block accepted; the NES has 2KB of internal RAM and 8KB of SRAM
+MAX_BLOCK_LENGTH = 0x2000
+
+
+def _parse_block(base: Any, length: int, name: str) -> Tuple[Optional[int], Optional[str]]:
+    addr = parse_address(base)
+    if addr is None:
+        return (None, f"Invalid {name} address: {base}")
+    if addr + length > 0x10000:
+        return (None, f"{name} block runs past the end of memory")
+    return (addr, None)
+
+
+def _parse_length(length: Any) -> Tuple[Optional[int], Optional[str]]:
+    if isinstance(length, bool) or not isinstance(length, int):
+        return (None, "length must be an integer")
+    if not 1 <= length <= MAX_BLOCK_LENGTH:
+        return (None, f"length must be between 1 and {MAX_BLOCK_LENGTH}")
+    return (length, None)
+
+
+def _overlaps(bases: Sequence[int], length: int) -> bool:
+    ordered = sorted(bases)
+    return any(b - a < length for a, b in zip(ordered, ordered[1:]))
+
+
+def _queue(procedure: str, args: List[CallArgument], message: str) -> Tuple[Any, int]:
+    print_to_console()
+    print_to_console(format_call(procedure, args))
+    print_to_console()
+    try:
+        ticket = enqueue_call(procedure, args)
+        return ({"message": message, "ticket": ticket}, 200)
+    except Exception as e:
+        return (f"Error queueing block operation: {e}", 500)
+
+
+def copy_block(src: Any, dst: Any, length: int) -> Tuple[Any, int]:
+    """Copy `length` bytes from `src` to `dst` (overlapping blocks are fine)."""
+    length, error = _parse_length(length)
+    if error:
+        return (error, 400)
+    src_addr, error = _parse_block(src, length, "source")
+    if error:
+        return (error, 400)
+    dst_addr, error = _parse_block(dst, length, "destination")
+    if error:
+        return (error, 400)
+
+    return _queue(
+        "copy_block",
+        [src_addr, dst_addr, length],
+        f"Copy of {length} bytes queued",
+    )
+
+
+def swap_blocks(a: Any, b: Any, length: int) -> Tuple[Any, int]:
+    """Exchange the `length` byte blocks at `a` and `b`, which must not overlap."""
+    length, error = _parse_length(length)
+    if error:
+        return (error, 400)
+    a_addr, error = _parse_block(a, length, "first")
+    if error:
+        return (error, 400)
+    b_addr, error = _parse_block(b, length, "second")
+    if error:
+        return (error, 400)
+    if _overlaps([a_addr, b_addr], length):
+        return ("Blocks to swap must not overlap", 400)
+
+    return _queue(
+        "swap_blocks",
+        [a_addr, b_addr, length],
+        f"Swap of {length} byte blocks queued",
+    )
+
+
+def permute_blocks(bases: List[Any], length: int, order: List[int]) -> Tuple[Any, int]:
+    """
+    Rearrange the `length` byte blocks starting at each of `bases`, moving
+    block number order[i] (1-based) into bases[i]. For example bases
+    [A, B, C] with order [3, 1, 2] moves C -> A, A -> B and B -> C.
+    """
+    if not isinstance(bases, list) or not isinstance(order, list) or not bases:
+        return ("bases and order must be non-empty lists", 400)
+    if len(bases) != len(order):
+        return ("bases and order must be the same length", 400)
+    length, error = _parse_length(length)
+    if error:
+        return (error, 400)
+
+    base_addrs: List[int] = []
+    for base in bases:
+        addr, error = _parse_block(base, length, "block")
+        if error:
+            return (error, 400)
+        base_addrs.append(addr)
+    if _overlaps(base_addrs, length):
+        return ("Blocks to permute must not overlap", 400)
+    if any(isinstance(o, bool) or not isinstance(o, int) for o in order) or sorted(order) != list(range(1, len(bases) + 1)):
+        return (f"order must be a permutation of 1..{len(bases)}", 400)
+
+    return _queue(
+        "permute_blocks",
+        [base_addrs, length, order],
+        f"Permutation of {len(bases)} blocks of {length} bytes queued",
+    )
+
+
+def block_operation(payload: Dict[str, Any]) -> Tuple[Any, int]:
+    """
+    Dispatch a block operation payload, as accepted by /nes/blocks:
+      {"op": "copy", "src": "0x006100", "dst": "0x006140", "length": 64}
+      {"op": "swap", "a": "0x006100", "b": "0x006140", "length": 64}
+      {"op": "permute", "bases": ["0x006100", "0x006140"], "length": 64, "order": [2, 1]}
+    """
+    if not isinstance(payload, dict):
+        return ("payload must be an object", 400)
+
+    op = payload.get('op')
+    length = payload.get('length')
+    if op == 'copy':
+        return copy_block(payload.get('src'), payload.get('dst'), length)
+    if op == 'swap':
+        return swap_blocks(payload.get('a'), payload.get('b'), length)
+    if op == 'permute':
+        return permute_blocks(payload.get('bases'), length, payload.get('order'))
+    return ("op must be one of: copy, swap, permute", 400)
+
+
+__all__ = [
+    "MAX_BLOCK_LENGTH",
+    "copy_block",
+    "swap_blocks",
+    "permute_blocks",
+    "block_operation",
+]
@@ -0,0 +1,171 @@
+import fcntl
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+from .config import get_config
+
+"""
+Adaptive daemon cadence.
+
+The Lua daemon snapshots RAM and runs queued scripts once every N frames.
+N is chosen here and published to daemon_cadence.txt on the RAMdisk as three
+integers:
+
+    <fast frames> <idle frames> <fast until, unix seconds>
+
+The daemon polls the file a few times a second and uses the fast cadence
+until the deadline passes, then falls back to the idle cadence. Keeping the
+deadline in the file (rather than a "fast"/"idle" flag) means the daemon
+slows down on its own if the API goes away mid-conversation.
+
+- `note_activity()` is called for NES API reads, writes, block operations
+  and batches (not for 304 revalidations, CORS preflights or the UI's
+  polls of names and the bestiary) and keeps the daemon fast for
+  DAEMON_ACTIVE_SECONDS after the last one
+- `hold_fast_cadence()` keeps it fast for the duration of an agent run,
+  however long the LLM takes between tool calls
+
+The NES API and the LLM API (which holds the cadence during agent runs)
+share the file, so a controller never moves the deadline earlier than what
+the file already says, except when releasing a hold whose deadline is still
+the one in the file. Updates are made under an exclusive `flock` on
+daemon_cadence.txt.lock.
+"""
+
+_config = get_config()
+CADENCE_FILENAME = "daemon_cadence.txt"
+CADENCE_PATH = _config['RAMDISK_DIR'] + CADENCE_FILENAME
+
+# upper bound on a hold, in case the process holding it dies without releasing
+_HOLD_LIMIT_SECONDS = 600
+
+
+class CadenceController:
+    """
+    Publishes the daemon cadence to `path`.
+
+    The file is only rewritten when the fast deadline moves by at least a
+    second (the daemon compares against `os.time()`), so a burst of requests
+    costs a handful of writes rather than one per request. Other processes
+    may publish to the same file (see module doc).
+    """
+    def __init__(
+        self,
+        path: str,
+        fast_frames: int,
+        idle_frames: int,
+        active_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.fast_frames = fast_frames
+        self.idle_frames = idle_frames
+        self.active_seconds = active_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._holds = 0
+        # latest deadline this process asked for, so repeats within the second skip the file
+        self._requested_until: Optional[int] = None
+        # deadline this process last wrote to the file
+        self._published_until: Optional[int] = None
+
+    def note_activity(self) -> None:
+        """Keep the fast cadence for `active_seconds` from now."""
+        with self._lock:
+            if self._holds:
+                return
+            self._extend(self._clock() + self.active_seconds)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """Keep the fast cadence until the block exits (nested holds are fine)."""
+        with self._lock:
+            self._holds += 1
+            self._extend(self._clock() + _HOLD_LIMIT_SECONDS)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._holds -= 1
+                if not self._holds:
+                    self._release()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        try:
+            lock_file = open(self.path + '.lock', 'a')
+        except OSError:
+            # no RAMdisk: nothing to share the file with
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_until(self) -> Optional[int]:
+        """The fast deadline currently in the file, or None if there is none."""
+        try:
+            with open(self.path, 'r') as f:
+                return int(f.read().split()[2])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _extend(self, until: float) -> None:
+        until = math.ceil(until)
+        if self._requested_until is not None and until <= self._requested_until:
+            return
+        self._requested_until = until
+        with self._file_lock():
+            current = self._read_until()
+            if current is not None and current >= until:
+                # another process (e.g. a hold in the LLM API) already keeps it fast for longer
+                return
+            self._publish(until)
+
+    def _release(self) -> None:
+        """Drop this process's hold deadline back to the normal idle timeout."""
+        until = math.ceil(self._clock() + self.active_seconds)
+        self._requested_until = until
+        with self._file_lock():
+            # leave a later deadline published by another process in place
+            if self._read_until() == self._published_until:
+                self._publish(until)
+
+    def _publish(self, until: int) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(f"{self.fast_frames} {self.idle_frames} {until}\n")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # no RAMdisk (e.g. running scripts offline): the daemon keeps its
+            # default cadence, which is always safe
+            return
+        self._published_until = until
+
+
+_CONTROLLER = CadenceController(
+    CADENCE_PATH,
+    _config['DAEMON_FAST_CADENCE'],
+    _config['DAEMON_IDLE_CADENCE'],
+    _config['DAEMON_ACTIVE_SECONDS'],
+)
+
+
+def note_activity() -> None:
+    """Record NES API activity; the daemon runs at its fast cadence for a few seconds."""
+    _CONTROLLER.note_activity()
+
+
+def hold_fast_cadence():
+    """Context manager keeping the daemon at its fast cadence, e.g. for an agent run."""
+    return _CONTROLLER.hold()
+
+
+__all__ = ["CADENCE_FILENAME", "CADENCE_PATH", "CadenceController", "note_activity", "hold_fast_cadence"]
@@ -0,0 +1,273 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .artifacts import pack_strings, unpack_strings
+
+"""
+Compiled RAM catalog.
+
+`compile_catalog()` turns the parsed ram_catalog.json into flat arrays so a
+whole snapshot (or any subset of it) can be decoded in one batched pass:
+
+- `addresses` / `index`: catalog address strings and their row numbers
+- `offsets`:     integer RAM address of each row
+- `kinds`:       KIND_NUMBER, KIND_LOOKUP or KIND_UNKNOWN per row
+- `weights`:     multiplier for number rows (1 when the catalog omits it)
+- `lookup_ids`:  row into `lookup_tables` for lookup rows
+- `lookup_tables`: one 257-entry row per lookup (`char`, `monster_type`, ...);
+  column N numbers the translation of raw byte N in `lookup_values` and
+  column 256 the default used when the byte is unavailable. `lookup_table()`
+  gives a row as translations.
+
+Entries with an empty/unknown type, or whose lookup key does not exist, are
+compiled as KIND_UNKNOWN and rejected when decoded.
+
+Raw values are passed around as int32 arrays where -1 means "not present in
+the snapshot".
+"""
+
+KIND_UNKNOWN = 0
+KIND_NUMBER = 1
+KIND_LOOKUP = 2
+
+# column in a lookup table row used when the raw byte is missing/out of range
+_DEFAULT_COLUMN = 256
+
+
+class CompiledCatalog:
+    def __init__(
+        self,
+        addresses: List[str],
+        descriptions: Sequence[str],
+        offsets: np.ndarray,
+        kinds: np.ndarray,
+        weights: np.ndarray,
+        lookup_ids: np.ndarray,
+        lookup_keys: List[str],
+        lookup_tables: np.ndarray,
+        lookup_values: np.ndarray,
+    ):
+        self.addresses = addresses
+        self.descriptions = descriptions
+        self.index: Dict[str, int] = {address: row for row, address in enumerate(addresses)}
+        self.offsets = offsets
+        self.kinds = kinds
+        self.weights = weights
+        self.lookup_ids = lookup_ids
+        self.lookup_keys = lookup_keys
+        self.lookup_tables = lookup_tables
+        self.lookup_values = lookup_values
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def __contains__(self, address: Any) -> bool:
+        return address in self.index
+
+    def lookup_table(self, lookup_id: int) -> np.ndarray:
+        """The 257 translations of lookup `lookup_id` (see module doc), as an object array."""
+        return self.lookup_values[self.lookup_tables[lookup_id]]
+
+    def rows(self, addresses: Sequence[str]) -> np.ndarray:
+        """Row numbers for `addresses`, with -1 for addresses not in the catalog."""
+        get = self.index.get
+        return np.array([get(a, -1) for a in addresses], dtype=np.intp)
+
+    def find_invalid(self, rows: np.ndarray, raw: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        Return (position, kind) of the first row that cannot be decoded, or None.
+
+        A row cannot be decoded when its catalog entry has an unknown type
+        (kind KIND_UNKNOWN) or when it is a number entry whose raw byte is
+        missing from the snapshot (kind KIND_NUMBER).
+        """
+        kinds = self.kinds[rows]
+        invalid = (kinds == KIND_UNKNOWN) | ((kinds == KIND_NUMBER) & (raw < 0))
+        if not invalid.any():
+            return None
+        position = int(np.argmax(invalid))
+        return (position, int(kinds[position]))
+
+    def decode(self, rows: np.ndarray, raw: np.ndarray) -> List[Optional[str]]:
+        """
+        Translate raw bytes into human readable values for the given rows.
+
+        Number rows become str(raw * weight); lookup rows are translated through
+        their lookup table. Rows that `find_invalid` would report decode to None.
+        """
+        kinds = self.kinds[rows]
+        values = np.full(len(rows), None, dtype=object)
+
+        numbers = (kinds == KIND_NUMBER) & (raw >= 0)
+        if numbers.any():
+            products = raw[numbers].astype(np.int64) * self.weights[rows[numbers]]
+            values[numbers] = np.array([str(v) for v in products.tolist()], dtype=object)
+
+        lookups = kinds == KIND_LOOKUP
+        if lookups.any():
+            lookup_raw = raw[lookups]
+            columns = np.where((lookup_raw >= 0) & (lookup_raw < 256), lookup_raw, _DEFAULT_COLUMN)
+            values[lookups] = self.lookup_values[self.lookup_tables[self.lookup_ids[rows[lookups]], columns]]
+
+        return values.tolist()
+
+
+    def combine(self, rows: np.ndarray, raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Combine the raw bytes of `rows` into one integer per sample: the sum of
+        raw byte x weight (lookup rows count their raw byte), so the low and
+        high bytes of a 16-bit number give the number. `raw` is shaped
+        (samples, len(rows)), or (len(rows),) for a single sample.
+
+        Returns (values, valid) where `valid` marks samples with every byte present.
+        """
+        weights = np.where(self.kinds[rows] == KIND_NUMBER, self.weights[rows], 1)
+        valid = (raw >= 0).all(axis=-1)
+        return ((raw.astype(np.int64) * weights).sum(axis=-1), valid)
+
+    def lookup_raw_values(self, row: int, value: str) -> Optional[List[int]]:
+        """
+        Raw bytes that lookup `row` translates to `value` (case-insensitive),
+        or None if `row` is not a lookup row.
+        """
+        if self.kinds[row] != KIND_LOOKUP:
+            return None
+        wanted = value.strip().lower()
+        table = self.lookup_table(self.lookup_ids[row])[:_DEFAULT_COLUMN]
+        return [byte for byte, translation in enumerate(table.tolist()) if isinstance(translation, str) and translation.lower() == wanted]
+
+
+# comparison operators accepted by history and watch predicates
+COMPARISON_OPERATORS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def compile_catalog(ram_catalog: Dict[str, Any]) -> CompiledCatalog:
+    """Compile a parsed ram_catalog.json object into a `CompiledCatalog`."""
+    lookup_keys: List[str] = []
+    lookup_rows: List[List[Optional[str]]] = []
+    for item in ram_catalog.get('lookups', []) or []:
+        # each lookup item should have `key`, `default`, and `map`
+        default = item.get('default')
+        row: List[Optional[str]] = [default] * (_DEFAULT_COLUMN + 1)
+        for raw, value in (item.get('map', {}) or {}).items():
+            try:
+                byte = int(raw, 16)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= byte < 256:
+                row[byte] = value
+        lookup_keys.append(item['key'])
+        lookup_rows.append(row)
+
+    # translations are numbered in `lookup_values`, so the tables are plain ints
+    numbers: Dict[Any, int] = {}
+    lookup_tables = np.array(
+        [[numbers.setdefault(value, len(numbers)) for value in row] for row in lookup_rows],
+        dtype=np.int32,
+    ).reshape(len(lookup_rows), _DEFAULT_COLUMN + 1)
+    lookup_values = _object_array(list(numbers))
+    lookup_id_by_key = {key: i for i, key in enumerate(lookup_keys)}
+
+    # later duplicates of an address replace earlier ones, as the dict did
+    by_address: Dict[str, Dict[str, Any]] = {}
+    for catalog_entry in ram_catalog.get('catalog', []) or []:
+        by_address[catalog_entry['address']] = catalog_entry
+
+    addresses = list(by_address.keys())
+    count = len(addresses)
+    descriptions: List[str] = []
+    offsets = np.zeros(count, dtype=np.int64)
+    kinds = np.zeros(count, dtype=np.uint8)
+    weights = np.ones(count, dtype=np.int64)
+    lookup_ids = np.zeros(count, dtype=np.intp)
+
+    for row, address in enumerate(addresses):
+        catalog_entry = by_address[address]
+        descriptions.append(catalog_entry.get('description', ''))
+        offsets[row] = int(address, 16)
+
+        entry_type = catalog_entry.get('type')
+        if entry_type == 'number':
+            kinds[row] = KIND_NUMBER
+            if catalog_entry.get('weight') is not None:
+                weights[row] = int(catalog_entry['weight'])
+        elif entry_type == 'lookup' and catalog_entry.get('lookup') in lookup_id_by_key:
+            kinds[row] = KIND_LOOKUP
+            lookup_ids[row] = lookup_id_by_key[catalog_entry['lookup']]
+        else:
+            # keep empty/unknown types and dangling lookups (rejected when decoded)
+            kinds[row] = KIND_UNKNOWN
+
+    return CompiledCatalog(
+        addresses=addresses,
+        descriptions=descriptions,
+        offsets=offsets,
+        kinds=kinds,
+        weights=weights,
+        lookup_ids=lookup_ids,
+        lookup_keys=lookup_keys,
+        lookup_tables=lookup_tables,
+        lookup_values=lookup_values,
+    )
+
+
+def _object_array(values: List[Any]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def catalog_to_artifact(catalog: CompiledCatalog) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Split `catalog` into the arrays and objects of a precompiled artifact (see artifacts.py)."""
+    arrays = {
+        "offsets": catalog.offsets,
+        "kinds": catalog.kinds,
+        "weights": catalog.weights,
+        "lookup_ids": catalog.lookup_ids,
+        "lookup_tables": catalog.lookup_tables,
+    }
+    pack_strings(arrays, "descriptions", catalog.descriptions)
+    objects = {
+        "addresses": catalog.addresses,
+        "lookup_keys": catalog.lookup_keys,
+        "lookup_values": catalog.lookup_values.tolist(),
+    }
+    return (arrays, objects)
+
+
+def catalog_from_artifact(arrays: Dict[str, np.ndarray], objects: Dict[str, Any]) -> CompiledCatalog:
+    """
+    Rebuild the `CompiledCatalog` split by `catalog_to_artifact`. Its arrays,
+    lookup tables and descriptions are used in place (views of the mapped
+    artifact); only the address index and the distinct translations are
+    built per process.
+    """
+    return CompiledCatalog(
+        addresses=objects["addresses"],
+        descriptions=unpack_strings(arrays, "descriptions"),
+        offsets=arrays["offsets"],
+        kinds=arrays["kinds"],
+        weights=arrays["weights"],
+        lookup_ids=arrays["lookup_ids"],
+        lookup_keys=objects["lookup_keys"],
+        lookup_tables=arrays["lookup_tables"],
+        lookup_values=_object_array(objects["lookup_values"]),
+    )
+
+
+__all__ = [
+    "KIND_UNKNOWN",
+    "KIND_NUMBER",
+    "KIND_LOOKUP",
+    "COMPARISON_OPERATORS",
+    "CompiledCatalog",
+    "compile_catalog",
+    "catalog_to_artifact",
+    "catalog_from_artifact",
+]
@@ -0,0 +1,248 @@
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+from .config import get_config
+from .cadence import note_activity
+
+"""
+RAMdisk command queue.
+
+Replaces the single execute.lua file, which every writer opened with mode 'w'
+(so two writes in one daemon tick clobbered each other) and which the daemon
+ran at most once per tick. Writers now append sequence-numbered records to
+command_queue.log:
+
+    --[[ffbot:record seq=12 kind=script]]
+    memory.writebyte(0x006110, 10)
+    --[[ffbot:end seq=12]]
+
+Each tick the daemon renames the queue aside and runs every complete record
+in sequence order (see scripts/lua/main_daemon.lua), so any number of writes
+issued between ticks are all applied on the next one.
+
+Sequence numbers are allocated under an exclusive `flock`, shared by every
+process that writes (the NES API and the LLM API both do), and persisted in
+command_queue.seq so they keep increasing across restarts of either.
+
+A record's sequence number is also its *ticket*. After each tick's snapshot
+the daemon publishes the last sequence it applied to command_ack.txt, so once
+`applied_sequence() >= ticket` the snapshot on the RAMdisk already reflects
+the command. `wait_for(ticket, timeout)` blocks until then.
+
+Records of kind "call" carry a procedure name and integer arguments instead
+of Lua source (see api/nes/procedures.py), so the daemon runs a procedure it
+loaded at startup rather than compiling a new chunk:
+
+    --[[ffbot:record seq=13 kind=call]]
+    set_hp 2 150
+    --[[ffbot:end seq=13]]
+"""
+
+_config = get_config()
+_RAMDISK_DIR = _config['RAMDISK_DIR']
+QUEUE_FILENAME = "command_queue.log"
+QUEUE_PATH = _RAMDISK_DIR + QUEUE_FILENAME
+_SEQUENCE_PATH = _RAMDISK_DIR + "command_queue.seq"
+_LOCK_PATH = _RAMDISK_DIR + "command_queue.lock"
+ACK_FILENAME = "command_ack.txt"
+ACK_PATH = _RAMDISK_DIR + ACK_FILENAME
+
+# default for wait_for(); long enough for a few daemon ticks at the idle cadence
+DEFAULT_WAIT_TIMEOUT = 5.0
+# wait_for() polls the ack file starting at the first delay, doubling up to the second
+_WAIT_POLL_SECONDS = (0.001, 0.016)
+
+RECORD_HEADER = "--[[ffbot:record seq={seq} kind={kind}]]\n"
+RECORD_END = "--[[ffbot:end seq={seq}]]\n"
+
+
+@contextmanager
+def _queue_lock() -> Iterator[None]:
+    with open(_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _next_sequence() -> int:
+    # caller holds the queue lock
+    try:
+        with open(_SEQUENCE_PATH, 'r') as f:
+            sequence = int(f.read().strip() or 0) + 1
+    except (FileNotFoundError, ValueError):
+        sequence = 1
+    with open(_SEQUENCE_PATH, 'w') as f:
+        f.write(str(sequence))
+    return sequence
+
+
+def _append_record(data: bytes) -> None:
+    # caller holds the queue lock. The daemon renames the queue aside each
+    # tick, so make sure the file we opened is still the queue before writing;
+    # the whole record goes out in one O_APPEND write.
+    while True:
+        fd = os.open(QUEUE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_ino != os.stat(QUEUE_PATH).st_ino:
+                continue
+            os.write(fd, data)
+            return
+        except FileNotFoundError:
+            continue
+        finally:
+            os.close(fd)
+
+
+def enqueue(kind: str, body: str) -> int:
+    """
+    Append a Lua chunk to the command queue and return its sequence number.
+    `kind` is informational ("write", "script", ...). Raises OSError if the
+    RAMdisk cannot be written.
+    """
+    with _queue_lock():
+        sequence = _next_sequence()
+        record = RECORD_HEADER.format(seq=sequence, kind=kind) + body.rstrip('\n') + '\n' + RECORD_END.format(seq=sequence)
+        _append_record(record.encode('utf-8'))
+    return sequence
+
+
+CallArgument = Union[int, Sequence[int]]
+
+
+def format_call(name: str, args: Sequence[CallArgument] = ()) -> str:
+    """
+    Format a procedure call record body: the name followed by one token per
+    argument. Lists are comma separated, with a trailing comma when they hold
+    fewer than two items so the daemon still reads them as lists.
+    """
+    tokens: List[str] = [name]
+    for arg in args:
+        if isinstance(arg, int):
+            tokens.append(str(arg))
+        else:
+            items = [str(int(item)) for item in arg]
+            tokens.append(",".join(items) + ("," if len(items) < 2 else ""))
+    return " ".join(tokens)
+
+
+def enqueue_call(name: str, args: Sequence[CallArgument] = ()) -> int:
+    """Queue a call to a daemon procedure and return its sequence number."""
+    return enqueue("call", format_call(name, args))
+
+
+def applied_sequence() -> int:
+    """The last command sequence number the daemon has applied (0 if none yet)."""
+    try:
+        with open(ACK_PATH, 'r') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def wait_for(ticket: int, timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Block until the daemon has applied command `ticket` and published a
+    snapshot including it. Returns False if `timeout` seconds pass first.
+    """
+    if applied_sequence() >= ticket:
+        return True
+
+    # a waiter is by definition waiting on the daemon: keep it ticking fast
+    note_activity()
+    deadline = time.monotonic() + timeout
+    delay = _WAIT_POLL_SECONDS[0]
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        if applied_sequence() >= ticket:
+            return True
+        delay = min(delay * 2, _WAIT_POLL_SECONDS[1])
+
+
+def parse_address(address: Any) -> Optional[int]:
+    """Parse "0x006110" / "24848" / 24848 into an int, or None if invalid."""
+    if isinstance(address, bool):
+        return None
+    if isinstance(address, int):
+        return address if 0 <= address <= 0xFFFF else None
+    try:
+        text = str(address).strip()
+        value = int(text, 16) if text.lower().startswith('0x') else int(text)
+    except (TypeError, ValueError):
+        return None
+    return value if 0 <= value <= 0xFFFF else None
+
+
+def parse_value(value: Any) -> Optional[int]:
+    """Parse "0x0A" / "10" / 10 into a byte value, or None if invalid or outside 0..255."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if 0 <= value <= 0xFF else None
+    try:
+        text = str(value).strip()
+        value = int(text, 16) if text.lower().startswith('0x') else int(text)
+    except (TypeError, ValueError):
+        return None
+    # memory.writebyte would silently keep only the low byte
+    return value if 0 <= value <= 0xFF else None
+
+
+class WriteBatch:
+    """
+    Collects byte writes and submits them as one `write_bytes` procedure call.
+
+    Writing the same address twice keeps only the last value, so a batch
+    assembled from several payloads never issues redundant writes.
+    """
+    def __init__(self):
+        self._writes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, address: Any, value: Any) -> Optional[str]:
+        """Add a write. Returns an error message if address or value is invalid."""
+        addr = parse_address(address)
+        if addr is None:
+            return f"Invalid address: {address}"
+        val = parse_value(value)
+        if val is None:
+            return f"Invalid value for address {address}: {value} (must be a byte, 0 to 255)"
+        self._writes[addr] = val
+        return None
+
+    def _call_args(self) -> List[CallArgument]:
+        return [list(self._writes.keys()), list(self._writes.values())]
+
+    def to_call(self) -> str:
+        return format_call("write_bytes", self._call_args())
+
+    def submit(self) -> int:
+        """Enqueue the batch and return its sequence number."""
+        return enqueue_call("write_bytes", self._call_args())
+
+
+__all__ = [
+    "QUEUE_FILENAME",
+    "QUEUE_PATH",
+    "ACK_FILENAME",
+    "ACK_PATH",
+    "DEFAULT_WAIT_TIMEOUT",
+    "RECORD_HEADER",
+    "RECORD_END",
+    "WriteBatch",
+    "applied_sequence",
+    "enqueue",
+    "enqueue_call",
+    "format_call",
+    "parse_address",
+    "parse_value",
+    "wait_for",
+]
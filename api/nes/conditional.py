@@ -0,0 +1,55 @@
+import secrets
+import zlib
+from typing import Any, Optional
+from flask import Response, request
+from api.utils import fastjson
+from .reloadable import static_data_reloads
+from .snapshot import RamSnapshot
+
+"""
+Conditional responses for snapshot reads.
+
+A read's body is fully determined by the RAM snapshot it was taken from and
+the request parameters, so routes tag it with an ETag built from the
+snapshot version and a digest of those parameters and of the static data
+reload counts (a reloaded catalog or bestiary changes how the same snapshot
+reads):
+
+    ETag: "3f9a01c2-14-8e1b77d0"    (process, snapshot version, request)
+
+A client that repeats the request with `If-None-Match: <etag>` gets an empty
+304 while the snapshot is unchanged, without anything being decoded or
+encoded. Snapshot versions restart at 1 with every process, so tags carry a
+random per-process prefix and never match across an API restart.
+
+Every tagged response also carries `X-Snapshot-Version`, to pass as `since`
+to /nes/read.
+"""
+
+# snapshot versions are per process: never let a tag outlive it
+_PROCESS_TAG = secrets.token_hex(4)
+
+SNAPSHOT_VERSION_HEADER = "X-Snapshot-Version"
+
+
+def snapshot_etag(snapshot: RamSnapshot, *params: Any) -> str:
+    """ETag of a response built from `snapshot` for the request `params`."""
+    digest = zlib.crc32(fastjson.dumps_bytes([static_data_reloads(), params], sort_keys=True))
+    return f"{_PROCESS_TAG}-{snapshot.version}-{digest:08x}"
+
+
+def not_modified(etag: str, snapshot: RamSnapshot) -> Optional[Response]:
+    """A 304 response if the current request's If-None-Match holds `etag`, else None."""
+    if etag not in request.if_none_match:
+        return None
+    return tag_response(Response(status=304), etag, snapshot)
+
+
+def tag_response(response: Response, etag: str, snapshot: RamSnapshot) -> Response:
+    """Set the ETag and snapshot version headers on `response`."""
+    response.set_etag(etag)
+    response.headers[SNAPSHOT_VERSION_HEADER] = str(snapshot.version)
+    return response
+
+
+__all__ = ["SNAPSHOT_VERSION_HEADER", "snapshot_etag", "not_modified", "tag_response"]
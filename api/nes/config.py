@@ -8,9 +8,19 @@ ROOT = Path(__file__).resolve().parents[2]
 load_dotenv(ROOT / ".env")
 DEFAULTS = {
     "NES_API_PORT": 5000,
-    "RAMDISK_DIR": "/mnt/ramdisk-ffbot/"
+    "RAMDISK_DIR": "/mnt/ramdisk-ffbot/",
+    "RAM_SNAPSHOT_FORMAT": "json",
+    "DAEMON_FAST_CADENCE": 4,
+    "DAEMON_IDLE_CADENCE": 60,
+    "DAEMON_ACTIVE_SECONDS": 5,
+    "RAM_HISTORY_SIZE": 1024,
+    "RAM_SNAPSHOT_POLL_MS": 50,
+    "STATIC_DATA_CHECK_MS": 1000
 }
 
+# Snapshot formats the Lua daemon can write (see api/nes/snapshot.py)
+RAM_SNAPSHOT_FORMATS = ("json", "binary", "delta")
+
 def _load_env_overrides() -> Dict[str, Any]:
     overrides: Dict[str, Any] = {}
     for key in DEFAULTS.keys():
@@ -30,4 +40,25 @@ def get_config() -> Dict[str, Any]:
     except Exception:
         config["NES_API_PORT"] = DEFAULTS["NES_API_PORT"]
 
+    # Daemon cadences (frames) and active period (seconds) are positive integers; fall back to defaults if invalid
+    for key in ("DAEMON_FAST_CADENCE", "DAEMON_IDLE_CADENCE", "DAEMON_ACTIVE_SECONDS"):
+        try:
+            config[key] = max(1, int(config.get(key, DEFAULTS[key])))
+        except Exception:
+            config[key] = DEFAULTS[key]
+
+    # History size (snapshots, 0 disables it), poll interval (ms) and static data check interval (ms, 0 checks
+    # on every read) are integers; fall back to defaults if invalid
+    for key, minimum in (("RAM_HISTORY_SIZE", 0), ("RAM_SNAPSHOT_POLL_MS", 1), ("STATIC_DATA_CHECK_MS", 0)):
+        try:
+            config[key] = max(minimum, int(config.get(key, DEFAULTS[key])))
+        except Exception:
+            config[key] = DEFAULTS[key]
+
+    # If the snapshot format is not recognised, fall back to JSON
+    snapshot_format = str(config.get("RAM_SNAPSHOT_FORMAT", DEFAULTS["RAM_SNAPSHOT_FORMAT"])).strip().lower()
+    if snapshot_format not in RAM_SNAPSHOT_FORMATS:
+        snapshot_format = DEFAULTS["RAM_SNAPSHOT_FORMAT"]
+    config["RAM_SNAPSHOT_FORMAT"] = snapshot_format
+
     return config
@@ -0,0 +1,239 @@
+import os
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+from api.utils import fastjson
+
+"""
+Delta RAM snapshot format.
+
+An alternative to ram_contents.json selected with RAM_SNAPSHOT_FORMAT=delta.
+Most catalog bytes do not change between daemon ticks, so instead of
+rewriting the whole snapshot the daemon writes:
+
+- ram_keyframe.json: a full snapshot every DELTA_KEYFRAME_INTERVAL ticks
+      {"seq": 120, "frame": 7260, "ram": {"0x00001C": "0x41", ...}}
+- ram_deltas.log: one line per tick since that keyframe, listing only the
+  addresses whose value changed since the previous tick
+      121 7321 0x006110=0A 0x006BE4=FF
+      122 7382
+
+Each keyframe is written to a temporary file and renamed into place, and is
+followed by a fresh (renamed) delta log, so a reader can tell a new log from
+an appended one by its inode. Sequence numbers increase by exactly one per
+tick; a reader that sees a gap reloads the keyframe.
+
+`DeltaSnapshotReader` applies the log to its in-memory copy incrementally and
+reports which addresses changed. `DeltaSnapshotWriter` is the pure-Python
+stand-in for the daemon, used to exercise the format offline.
+"""
+
+KEYFRAME_FILENAME = "ram_keyframe.json"
+DELTA_LOG_FILENAME = "ram_deltas.log"
+
+# must match DELTA_KEYFRAME_INTERVAL in scripts/lua/main_daemon.lua
+DELTA_KEYFRAME_INTERVAL = 60
+
+
+class DeltaSnapshotReader:
+    """
+    Incremental reader for the keyframe + delta log pair under `ramdisk_dir`.
+
+    `refresh()` brings `contents` up to date and returns True when any value
+    changed. `contents` is replaced (never mutated) on change, so a mapping
+    handed out earlier keeps describing the state it was read at.
+    `contents_factory` builds those mappings from a plain dict.
+    """
+    def __init__(self, ramdisk_dir: str, contents_factory: Callable[[Dict[str, str]], Mapping[str, str]] = dict):
+        self.keyframe_path = ramdisk_dir + KEYFRAME_FILENAME
+        self.log_path = ramdisk_dir + DELTA_LOG_FILENAME
+        self._contents_factory = contents_factory
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state; the next `refresh()` reloads the keyframe."""
+        self.contents: Optional[Mapping[str, str]] = None
+        self.sequence: Optional[int] = None
+        self.frame: Optional[int] = None
+        # addresses changed by the most recent refresh()
+        self.changed: Set[str] = set()
+        # address -> sequence number of the tick that last changed it
+        self._last_changed: Dict[str, int] = {}
+        self._keyframe_signature: Optional[Tuple[int, int, int]] = None
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+
+    def changed_since(self, sequence: int) -> List[str]:
+        """
+        Addresses whose value changed after daemon tick `sequence`.
+
+        Changes are only tracked from the first keyframe this reader loaded;
+        for an older `sequence` every address is reported.
+        """
+        return [address for address, seq in self._last_changed.items() if seq > sequence]
+
+    def refresh(self) -> bool:
+        """
+        Apply anything the daemon wrote since the previous call.
+
+        Raises FileNotFoundError if there is no keyframe yet and ValueError if
+        the keyframe is empty, mid-write or otherwise malformed.
+        """
+        self.changed = set()
+        st = os.stat(self.keyframe_path)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if signature != self._keyframe_signature:
+            self._load_keyframe(signature)
+
+        if not self._apply_log():
+            # the log skipped a tick we never saw: it belongs to a keyframe
+            # written after we stat'd ours, so start again from that one
+            st = os.stat(self.keyframe_path)
+            self._load_keyframe((st.st_mtime_ns, st.st_size, st.st_ino))
+            self._apply_log()
+
+        return bool(self.changed)
+
+    def _load_keyframe(self, signature: Tuple[int, int, int]) -> None:
+        with open(self.keyframe_path, 'rb') as f:
+            keyframe = fastjson.load(f)
+        try:
+            sequence = int(keyframe['seq'])
+            frame = int(keyframe['frame'])
+            ram = dict(keyframe['ram'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{KEYFRAME_FILENAME} is missing {e}")
+
+        previous = self.contents
+        for address, value in ram.items():
+            if previous is None or previous.get(address) != value:
+                self.changed.add(address)
+                self._last_changed[address] = sequence
+
+        self.contents = self._contents_factory(ram)
+        self.sequence = sequence
+        self.frame = frame
+        self._keyframe_signature = signature
+        # a new keyframe always comes with a new log
+        self._log_inode = None
+        self._log_offset = 0
+
+    def _apply_log(self) -> bool:
+        """Apply new complete log lines. Returns False on a sequence gap."""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return True
+        if st.st_ino == self._log_inode and st.st_size == self._log_offset:
+            return True
+
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return True
+        with f:
+            # fstat the handle we actually read: the log may have been replaced
+            # between the stat above and the open
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._log_inode or st.st_size < self._log_offset:
+                self._log_inode = st.st_ino
+                self._log_offset = 0
+            f.seek(self._log_offset)
+            data = f.read()
+
+        # only consume complete lines; a partial last line is picked up next time
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return True
+        self._log_offset += end
+
+        updates: Dict[str, str] = {}
+        sequence = self.sequence
+        frame = self.frame
+        for line in data[:end].split(b'\n'):
+            tokens = line.split()
+            if len(tokens) < 2:
+                continue
+            line_sequence = int(tokens[0])
+            if line_sequence <= sequence:
+                continue
+            if line_sequence != sequence + 1:
+                return False
+            sequence = line_sequence
+            frame = int(tokens[1])
+            for token in tokens[2:]:
+                address, _, value = token.decode('ascii').partition('=')
+                updates[address] = '0x' + value
+                self._last_changed[address] = sequence
+
+        self.sequence = sequence
+        self.frame = frame
+
+        current = self.contents
+        changed = {address for address, value in updates.items() if current.get(address) != value}
+        if changed:
+            merged = dict(current)
+            merged.update(updates)
+            self.contents = self._contents_factory(merged)
+            self.changed |= changed
+        return True
+
+
+class DeltaSnapshotWriter:
+    """
+    Pure-Python stand-in for the daemon's delta writer.
+
+    Call `tick()` once per daemon tick with the current byte for every one of
+    `addresses`; files are written exactly as the Lua daemon writes them.
+    """
+    def __init__(self, ramdisk_dir: str, addresses: Sequence[str], keyframe_interval: int = DELTA_KEYFRAME_INTERVAL):
+        self.keyframe_path = ramdisk_dir + KEYFRAME_FILENAME
+        self.log_path = ramdisk_dir + DELTA_LOG_FILENAME
+        self.addresses = list(addresses)
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self._previous: Optional[List[int]] = None
+        self._ticks_since_keyframe = 0
+
+    def tick(self, values: Sequence[int], frame: int = 0) -> None:
+        self.sequence += 1
+        values = list(values)
+
+        if self._previous is None or self._ticks_since_keyframe >= self.keyframe_interval:
+            ram = {address: "0x%02X" % value for address, value in zip(self.addresses, values)}
+            tmp_path = self.keyframe_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(fastjson.dumps_bytes({"seq": self.sequence, "frame": frame, "ram": ram}))
+            os.replace(tmp_path, self.keyframe_path)
+
+            tmp_path = self.log_path + '.tmp'
+            open(tmp_path, 'w').close()
+            os.replace(tmp_path, self.log_path)
+            self._ticks_since_keyframe = 0
+        else:
+            parts = [str(self.sequence), str(frame)]
+            for address, value, previous in zip(self.addresses, values, self._previous):
+                if value != previous:
+                    parts.append("%s=%02X" % (address, value))
+            with open(self.log_path, 'a') as f:
+                f.write(' '.join(parts) + '\n')
+            self._ticks_since_keyframe += 1
+
+        self._previous = values
+
+
+def values_from_ram_contents(addresses: Sequence[str], ram_contents: Mapping[str, Any]) -> List[int]:
+    """Raw bytes for `addresses` from a ram_contents.json style dict (missing -> 0)."""
+    values = []
+    for address in addresses:
+        raw = ram_contents.get(address, 0)
+        values.append(int(raw, 16) if isinstance(raw, str) else int(raw))
+    return values
+
+
+__all__ = [
+    "KEYFRAME_FILENAME",
+    "DELTA_LOG_FILENAME",
+    "DELTA_KEYFRAME_INTERVAL",
+    "DeltaSnapshotReader",
+    "DeltaSnapshotWriter",
+    "values_from_ram_contents",
+]
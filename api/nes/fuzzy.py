@@ -0,0 +1,140 @@
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set
+import numpy as np
+from .artifacts import pack_lists, pack_map, pack_strings, unpack_lists, unpack_map, unpack_strings
+
+"""
+Approximate name matching.
+
+`TrigramIndex` is built once over a fixed set of normalized keys (monster
+names, location names, ...) and answers misspelled or abbreviated queries:
+
+1. candidates are the keys sharing the most character trigrams with the
+   query, found through an inverted trigram -> keys index
+2. the best MAX_CANDIDATES of them are reranked by edit distance, bounded so
+   a hopeless candidate is abandoned after a few rows
+
+Game names are often abbreviations of the real ones ("FrGiant", "IronGol",
+"Blue D"), so a key whose letters appear in order in the query, starting with
+the same letter, costs half the letters left out (at least 1) instead of the
+full edit distance: "frostgiant" matches "frgiant" at distance 1.
+
+Keys must already be normalized (e.g. lowercase alphanumerics); queries are
+matched as given.
+"""
+
+# trigram candidates reranked by edit distance per query
+MAX_CANDIDATES = 8
+
+_PAD = '$'
+
+
+class Match(NamedTuple):
+    key: str
+    distance: int
+    similarity: float
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = _PAD * 2 + text + _PAD
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, bound: int) -> int:
+    """
+    Levenshtein distance between `a` and `b`, or `bound + 1` as soon as it is
+    certain to exceed `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return min(previous[-1], bound + 1)
+
+
+def _abbreviation_distance(key: str, query: str) -> Optional[int]:
+    """Half the letters of `query` left out of `key` (at least 1), if `key` abbreviates `query`."""
+    if not key or len(key) >= len(query) or key[0] != query[0]:
+        return None
+    letters = iter(query)
+    if not all(c in letters for c in key):
+        return None
+    return max(1, (len(query) - len(key)) // 2)
+
+
+class TrigramIndex:
+    """Inverted trigram index over `keys` (see module doc)."""
+    def __init__(self, keys: Iterable[str]):
+        unique = list(dict.fromkeys(keys))
+        sizes: List[int] = []
+        postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(unique):
+            grams = _trigrams(key)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        # lists and dicts when built, packed tables when loaded from an artifact
+        self.keys: Sequence[str] = unique
+        self._sizes: Sequence[int] = sizes
+        self._postings: Mapping[str, List[int]] = postings
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def to_arrays(self, arrays: Dict[str, np.ndarray], name: str) -> None:
+        """Add the built index to `arrays` as packed arrays named `name`.*, for precompiled artifacts (see artifacts.py)."""
+        pack_strings(arrays, f"{name}.keys", self.keys)
+        arrays[f"{name}.sizes"] = np.array(self._sizes, dtype=np.int32)
+        pack_map(arrays, f"{name}.grams", self._postings)
+        pack_lists(arrays, f"{name}.postings", self._postings.values())
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], name: str) -> 'TrigramIndex':
+        """The index saved by `to_arrays()`, searched in place without recomputing any trigram."""
+        index = cls.__new__(cls)
+        index.keys = unpack_strings(arrays, f"{name}.keys")
+        index._sizes = arrays[f"{name}.sizes"].data
+        index._postings = unpack_map(arrays, f"{name}.grams", unpack_lists(arrays, f"{name}.postings"))
+        return index
+
+    def search(self, query: str, limit: int = 5, max_distance: Optional[int] = None) -> List[Match]:
+        """
+        Up to `limit` keys within `max_distance` of `query` (by default a third
+        of its length, at least 1), closest first; ties go to the key sharing
+        more trigrams with the query.
+        """
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(query) // 3)
+
+        grams = _trigrams(query)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        # Dice coefficient over trigram sets
+        similarity = {i: 2 * count / (len(grams) + self._sizes[i]) for i, count in shared.items()}
+        candidates = sorted(similarity, key=lambda i: -similarity[i])[:MAX_CANDIDATES]
+
+        matches = []
+        for i in candidates:
+            key = self.keys[i]
+            abbreviation = _abbreviation_distance(key, query)
+            if abbreviation is None:
+                distance = edit_distance(query, key, max_distance)
+            else:
+                # only worth computing if it could beat the abbreviation
+                distance = min(abbreviation, edit_distance(query, key, min(max_distance, abbreviation - 1)))
+            if distance <= max_distance:
+                matches.append(Match(key, distance, round(similarity[i], 3)))
+        matches.sort(key=lambda m: (m.distance, -m.similarity, m.key))
+        return matches[:limit]
+
+
+__all__ = ["MAX_CANDIDATES", "Match", "TrigramIndex", "edit_distance"]
@@ -0,0 +1,297 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from .config import get_config
+from .catalog import COMPARISON_OPERATORS, CompiledCatalog
+from .snapshot import RamSnapshot, add_snapshot_listener, start_snapshot_poller
+
+from api.utils.console import print_to_console
+
+"""
+RAM history.
+
+Keeps the last RAM_HISTORY_SIZE snapshots in a preallocated ring buffer: one
+int16 row of raw catalog bytes per snapshot (-1 where a byte was not
+captured), plus the snapshot version, emulator frame and wall clock time.
+Memory is fixed at RAM_HISTORY_SIZE x catalog size x 2 bytes.
+
+The buffer is filled by the snapshot cache itself (every snapshot it loads is
+recorded), and `start_history_recorder()` starts the snapshot poller so
+history accumulates between API calls.
+
+Rows are laid out by the compiled catalog. When ram_catalog.json is
+reloaded, the next query or recorded snapshot replaces the history with a
+copy laid out for the new catalog (`RamHistory.remapped`): addresses kept by
+both catalogs keep their samples, new ones read as not captured.
+
+Queries run over a window of the buffer, selected by `since_version`
+(inclusive) and/or `last_seconds`, and treat the requested addresses as one
+value: the sum of raw byte x catalog weight, so ["0x00610A", "0x00610B"] is
+character 1's HP.
+
+- `changes`: each point in the window where the value changed
+- `stats`:   first, last, min, max and net change over the window
+- `first`:   the first snapshot where `value <op> target` held; for a single
+             lookup address `target` may be its translation (e.g. "in battle")
+"""
+
+_config = get_config()
+HISTORY_SIZE = _config['RAM_HISTORY_SIZE']
+
+# most change points returned by one `changes` query (the latest are kept)
+MAX_CHANGES = 100
+
+
+class RamHistory:
+    """
+    Fixed-size ring buffer of snapshots for the rows of `catalog`.
+
+    `record()` is safe to call from the snapshot cache while queries run on
+    other threads; queries copy their window out under the lock.
+    """
+    def __init__(self, catalog: CompiledCatalog, capacity: int = HISTORY_SIZE):
+        self.catalog = catalog
+        self.capacity = capacity
+        self._raw = np.full((capacity, len(catalog)), -1, dtype=np.int16)
+        self._versions = np.zeros(capacity, dtype=np.int64)
+        self._frames = np.full(capacity, -1, dtype=np.int64)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        # total snapshots ever recorded; the next one goes to _count % capacity
+        self._count = 0
+        self._last_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def record(self, snapshot: RamSnapshot) -> None:
+        """Append `snapshot` unless it has already been recorded."""
+        if self._last_version is not None and snapshot.version <= self._last_version:
+            return
+        raw = snapshot.contents.gather(self.catalog.offsets)
+        with self._lock:
+            slot = self._count % self.capacity
+            self._raw[slot] = raw
+            self._versions[slot] = snapshot.version
+            self._frames[slot] = snapshot.frame if snapshot.frame is not None else -1
+            self._times[slot] = time.time()
+            self._count += 1
+            self._last_version = snapshot.version
+
+    def remapped(self, catalog: CompiledCatalog) -> "RamHistory":
+        """
+        A copy of this history laid out for `catalog`: columns are matched by
+        address, and addresses `catalog` adds are -1 in every recorded sample.
+        """
+        history = RamHistory(catalog, self.capacity)
+        columns = self.catalog.rows(catalog.addresses)
+        known = columns >= 0
+        with self._lock:
+            history._raw[:, known] = self._raw[:, columns[known]]
+            history._versions[:] = self._versions
+            history._frames[:] = self._frames
+            history._times[:] = self._times
+            history._count = self._count
+            history._last_version = self._last_version
+        return history
+
+    def raw_at(self, version: int, rows: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Copy out the raw bytes of `rows` in the snapshot tagged `version`, or
+        None if it was never recorded or has since been overwritten.
+        """
+        with self._lock:
+            size = min(self._count, self.capacity)
+            order = np.arange(self._count - size, self._count) % self.capacity
+            slots = order[self._versions[order] == version]
+            if not len(slots):
+                return None
+            return self._raw[slots[0], rows]
+
+    def window(
+        self,
+        rows: np.ndarray,
+        since_version: Optional[int] = None,
+        last_seconds: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copy out (raw[:, rows], versions, frames, times) for the selected
+        window, oldest first.
+        """
+        with self._lock:
+            size = min(self._count, self.capacity)
+            order = np.arange(self._count - size, self._count) % self.capacity
+            keep = np.ones(size, dtype=bool)
+            if since_version is not None:
+                keep &= self._versions[order] >= since_version
+            if last_seconds is not None:
+                keep &= self._times[order] >= time.time() - last_seconds
+            order = order[keep]
+            return (self._raw[np.ix_(order, rows)], self._versions[order], self._frames[order], self._times[order])
+
+
+def _point(values: np.ndarray, versions: np.ndarray, frames: np.ndarray, times: np.ndarray, i: int) -> Dict[str, Any]:
+    return {
+        "version": int(versions[i]),
+        "frame": int(frames[i]) if frames[i] >= 0 else None,
+        "time": round(float(times[i]), 3),
+        "value": int(values[i]),
+    }
+
+
+def query_history(history: RamHistory, payload: Dict[str, Any]) -> Tuple[Any, int]:
+    """
+    Run one history query against `history`. `payload` holds:
+      query:         "changes", "stats" or "first"
+      addresses:     address strings combined into one value (see module doc)
+      since_version: optional, only snapshots at or after this version
+      last_seconds:  optional, only snapshots from the last N seconds
+      op, value:     for "first": one of == != < <= > >= and the target
+    """
+    if not isinstance(payload, dict):
+        return ("payload must be an object", 400)
+
+    query = payload.get('query')
+    if query not in ('changes', 'stats', 'first'):
+        return ("query must be one of: changes, stats, first", 400)
+
+    addresses = payload.get('addresses')
+    if isinstance(addresses, str):
+        addresses = [addresses]
+    if not isinstance(addresses, list) or not addresses or not all(isinstance(a, str) for a in addresses):
+        return ("addresses must be a non-empty list of address strings", 400)
+    rows = history.catalog.rows(addresses)
+    if (rows < 0).any():
+        missing = [a for a, row in zip(addresses, rows.tolist()) if row < 0]
+        return (f"Requested RAM addresses not found in ram_catalog.json: {missing}", 400)
+
+    since_version = payload.get('since_version')
+    if since_version is not None and (isinstance(since_version, bool) or not isinstance(since_version, int)):
+        return ("since_version must be an integer", 400)
+    last_seconds = payload.get('last_seconds')
+    if last_seconds is not None and (isinstance(last_seconds, bool) or not isinstance(last_seconds, (int, float)) or last_seconds <= 0):
+        return ("last_seconds must be a positive number", 400)
+
+    raw, versions, frames, times = history.window(rows, since_version, last_seconds)
+    values, valid = history.catalog.combine(rows, raw)
+    values, versions, frames, times = values[valid], versions[valid], frames[valid], times[valid]
+
+    result: Dict[str, Any] = {"addresses": addresses, "samples": int(len(values))}
+    if len(values):
+        result["from_version"] = int(versions[0])
+        result["to_version"] = int(versions[-1])
+
+    if query == 'changes':
+        points = np.flatnonzero(np.diff(values) != 0) + 1
+        result["initial"] = _point(values, versions, frames, times, 0) if len(values) else None
+        result["changes"] = [_point(values, versions, frames, times, int(i)) for i in points[-MAX_CHANGES:]]
+        result["truncated"] = bool(len(points) > MAX_CHANGES)
+        return (result, 200)
+
+    if query == 'stats':
+        if len(values):
+            result.update({
+                "first": int(values[0]),
+                "last": int(values[-1]),
+                "min": int(values.min()),
+                "max": int(values.max()),
+                "change": int(values[-1] - values[0]),
+            })
+        return (result, 200)
+
+    op = payload.get('op', '==')
+    compare = COMPARISON_OPERATORS.get(op) if isinstance(op, str) else None
+    if compare is None:
+        return (f"op must be one of: {', '.join(COMPARISON_OPERATORS)}", 400)
+    target = payload.get('value')
+    if isinstance(target, str):
+        matches = history.catalog.lookup_raw_values(int(rows[0]), target) if len(rows) == 1 else None
+        if matches is None:
+            return ("a text value can only be matched against a single lookup address", 400)
+        if op not in ('==', '!='):
+            return ("a text value can only be compared with == or !=", 400)
+        held = np.isin(values, matches)
+        if op == '!=':
+            held = ~held
+    elif isinstance(target, bool) or not isinstance(target, (int, float)):
+        return ("value must be a number, or a lookup translation", 400)
+    else:
+        held = compare(values, target)
+
+    first = int(np.argmax(held)) if held.any() else None
+    result["match"] = _point(values, versions, frames, times, first) if first is not None else None
+    return (result, 200)
+
+
+_HISTORY: Optional[RamHistory] = None
+_HISTORY_LOCK = threading.Lock()
+
+
+def _current_history(catalog: CompiledCatalog) -> RamHistory:
+    # caller holds _HISTORY_LOCK
+    global _HISTORY
+    if _HISTORY is None:
+        _HISTORY = RamHistory(catalog, max(1, HISTORY_SIZE))
+        add_snapshot_listener(_record_snapshot)
+    elif _HISTORY.catalog is not catalog:
+        _HISTORY = _HISTORY.remapped(catalog)
+    return _HISTORY
+
+
+def get_history() -> RamHistory:
+    """
+    Return the process-wide history, creating it (and subscribing it to the
+    snapshot cache) on first use, and re-laying it out if ram_catalog.json
+    was reloaded since. Queries use the returned object throughout, so they
+    see one catalog and the samples laid out by it.
+    """
+    # imported here: read.py owns the compiled catalog cache
+    from .read import _load_ram_catalog
+    catalog = _load_ram_catalog()
+    with _HISTORY_LOCK:
+        return _current_history(catalog)
+
+
+def _record_snapshot(snapshot: RamSnapshot) -> None:
+    from .read import _load_ram_catalog
+    catalog = _load_ram_catalog()
+    # recorded under the lock, so no snapshot lands in a history being remapped
+    with _HISTORY_LOCK:
+        _current_history(catalog).record(snapshot)
+
+
+def start_history_recorder() -> None:
+    """
+    Create the history and start the snapshot poller, so history accumulates
+    even when nothing is reading. Does nothing when RAM_HISTORY_SIZE is 0.
+    """
+    if HISTORY_SIZE <= 0:
+        return
+    try:
+        get_history()
+    except Exception as e:
+        print_to_console(f"RAM history disabled: {e}", 'red')
+        return
+    start_snapshot_poller()
+
+
+def history(payload: Dict[str, Any]) -> Tuple[Any, int]:
+    """Run a history query (see `query_history`), as accepted by /nes/history."""
+    if HISTORY_SIZE <= 0:
+        return ("RAM history is disabled (RAM_HISTORY_SIZE=0)", 503)
+    try:
+        ram_history = get_history()
+    except Exception as e:
+        return (f"Error loading ram_catalog.json: {e}", 500)
+    return query_history(ram_history, payload)
+
+
+__all__ = [
+    "HISTORY_SIZE",
+    "RamHistory",
+    "query_history",
+    "get_history",
+    "start_history_recorder",
+    "history",
+]
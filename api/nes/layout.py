@@ -0,0 +1,188 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from .catalog import CompiledCatalog
+from .snapshot import RAM_CONTENTS_FILENAME, RAM_CONTENTS_PATH, RamSnapshot, get_ram_snapshot
+
+
+"""
+Struct layouts for repeated RAM blocks.
+
+The party is four 64-byte character blocks from 0x006100, and a battle has up
+to nine 20-byte enemy blocks from 0x006BD3. A `StructLayout` describes such a
+block once (base, stride, count and its fields) so every slot is decoded in
+one pass: the byte offsets of every field of every slot are gathered from the
+snapshot as a single (count, bytes) array and each field is then decoded
+column-wise.
+
+A `Field` is `size` little-endian bytes at `offset` within the block, decoded
+as:
+- a number (the default)
+- `lookup`: a ram_catalog.json lookup key (e.g. "class"), one translation per byte,
+  joined into a string when `size` > 1 (names are four "char" bytes)
+- `flags`: names of the bits that are set, lowest bit first
+
+Fields with a byte missing from the snapshot decode to None.
+"""
+
+
+class Field(NamedTuple):
+    name: str
+    offset: int
+    size: int = 1
+    lookup: Optional[str] = None
+    flags: Optional[Tuple[str, ...]] = None
+
+
+class StructLayout:
+    def __init__(self, name: str, base: int, stride: int, count: int, fields: Sequence[Field]):
+        self.name = name
+        self.base = base
+        self.stride = stride
+        self.count = count
+        self.fields = list(fields)
+        # column of the first byte of each field in the gathered (count, bytes) array
+        self._columns: List[int] = []
+        byte_offsets: List[int] = []
+        for field in self.fields:
+            self._columns.append(len(byte_offsets))
+            byte_offsets.extend(range(field.offset, field.offset + field.size))
+        slot_bases = base + stride * np.arange(count, dtype=np.int64)
+        self._offsets = slot_bases[:, None] + np.array(byte_offsets, dtype=np.int64)[None, :]
+        self._field_by_name = {field.name: field for field in self.fields}
+
+    def slot_base(self, slot: int) -> int:
+        """RAM address of the block for `slot` (1-based)."""
+        return self.base + self.stride * (slot - 1)
+
+    def address(self, slot: int, field: str) -> str:
+        """Catalog address string of the first byte of `field` in `slot` (1-based)."""
+        return "0x%06X" % (self.slot_base(slot) + self._field_by_name[field].offset)
+
+    def block_addresses(self) -> List[List[str]]:
+        """Every byte address of every block, one list of `stride` strings per slot."""
+        return [
+            ["0x%06X" % address for address in range(self.slot_base(slot), self.slot_base(slot) + self.stride)]
+            for slot in range(1, self.count + 1)
+        ]
+
+    def decode(self, contents: Any, catalog: CompiledCatalog) -> List[Dict[str, Any]]:
+        """
+        Decode every slot from snapshot `contents` (anything with `gather`),
+        translating lookup fields through `catalog`'s lookup tables. Returns one
+        record per slot, including its 1-based "slot".
+        """
+        raw = contents.gather(self._offsets.ravel()).reshape(self._offsets.shape)
+        records: List[Dict[str, Any]] = [{"slot": slot} for slot in range(1, self.count + 1)]
+        for field, column in zip(self.fields, self._columns):
+            values = raw[:, column:column + field.size]
+            present = (values >= 0).all(axis=1).tolist()
+            if field.lookup is not None:
+                decoded = _decode_lookup(values, field.lookup, catalog)
+            elif field.flags is not None:
+                decoded = [[flag for bit, flag in enumerate(field.flags) if byte & (1 << bit)] for byte in values[:, 0].tolist()]
+            else:
+                weights = 256 ** np.arange(field.size, dtype=np.int64)
+                decoded = (values.astype(np.int64) * weights).sum(axis=1).tolist()
+            for record, value, ok in zip(records, decoded, present):
+                record[field.name] = value if ok else None
+        return records
+
+
+def _decode_lookup(values: np.ndarray, lookup: str, catalog: CompiledCatalog) -> List[Any]:
+    table = catalog.lookup_table(catalog.lookup_keys.index(lookup))
+    # missing bytes select the default column; those records become None anyway
+    translated = table[np.where(values >= 0, values, 256)]
+    if values.shape[1] == 1:
+        return translated[:, 0].tolist()
+    return [''.join(str(part) for part in row) for row in translated.tolist()]
+
+
+PARTY = StructLayout("party", base=0x6100, stride=64, count=4, fields=[
+    Field("class", 0x00, lookup="class"),
+    Field("status", 0x01, flags=("dead", "stone", "poison")),
+    Field("name", 0x02, size=4, lookup="char"),
+    Field("hp", 0x0A, size=2),
+    Field("max_hp", 0x0C, size=2),
+    Field("strength", 0x10),
+    Field("agility", 0x11),
+    Field("intelligence", 0x12),
+    Field("vitality", 0x13),
+    Field("luck", 0x14),
+    Field("damage", 0x20),
+    Field("hit_percentage", 0x21),
+    Field("absorb", 0x22),
+    Field("evade_percentage", 0x23),
+])
+
+ENEMIES = StructLayout("enemies", base=0x6BD3, stride=20, count=9, fields=[
+    Field("type", 0x11, lookup="monster_type"),
+    Field("exists", 0x0C, lookup="monster_exists"),
+    Field("status", 0x06, lookup="monster_status"),
+    Field("hp", 0x02, size=2),
+    Field("max_hp", 0x12, size=2),
+    Field("absorb", 0x04),
+    Field("critical_hit_rate", 0x05),
+    Field("morale", 0x09),
+    Field("evade_percentage", 0x0A),
+    Field("damage", 0x0B),
+    Field("experience", 0x0D, size=2),
+    Field("gold", 0x0F, size=2),
+])
+
+
+def _decode_layout(layout: StructLayout, snapshot: Optional[RamSnapshot]) -> Tuple[Any, int]:
+    # imported here: read.py owns the compiled catalog cache
+    from .read import _load_ram_catalog
+    try:
+        catalog = _load_ram_catalog()
+    except Exception as e:
+        return (f"Error loading ram_catalog.json: {e}", 500)
+
+    try:
+        ram_contents = (snapshot or get_ram_snapshot()).contents
+    except FileNotFoundError:
+        return (f"{RAM_CONTENTS_FILENAME} not found at {RAM_CONTENTS_PATH}", 500)
+    except Exception as e:
+        return (f"Error loading {RAM_CONTENTS_FILENAME}: {e}", 500)
+
+    try:
+        return (layout.decode(ram_contents, catalog), 200)
+    except Exception as e:
+        return (f"Game memory not in expected format: {e}", 500)
+
+
+def get_party(snapshot: Optional[RamSnapshot] = None) -> Tuple[Any, int]:
+    """
+    Return every character as one record (see PARTY), as
+    ({"party": [{"slot": 1, "class": "Fighter", "name": "ABCD", "hp": 35, ...}, ...]}, 200).
+    """
+    records, status = _decode_layout(PARTY, snapshot)
+    if status != 200:
+        return (records, status)
+    return ({"party": records}, 200)
+
+
+def get_enemies(snapshot: Optional[RamSnapshot] = None, include_empty: bool = False) -> Tuple[Any, int]:
+    """
+    Return the enemies in the current battle (see ENEMIES), as
+    ({"enemies": [{"slot": 1, "type": "Imp", "hp": 8, ...}, ...]}, 200).
+
+    Slots whose "exists" flag is "no" are left out unless `include_empty`;
+    they hold all zeroes, which would otherwise decode as an Imp.
+    """
+    records, status = _decode_layout(ENEMIES, snapshot)
+    if status != 200:
+        return (records, status)
+    if not include_empty:
+        records = [record for record in records if record["exists"] != "no"]
+    return ({"enemies": records}, 200)
+
+
+__all__ = [
+    "Field",
+    "StructLayout",
+    "PARTY",
+    "ENEMIES",
+    "get_party",
+    "get_enemies",
+]
@@ -0,0 +1,207 @@
+import bisect
+import re
+from typing import Collection, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+import numpy as np
+from .artifacts import pack_lists, pack_map, unpack_lists, unpack_map, unpack_strings
+from .fuzzy import TrigramIndex
+
+"""
+Bestiary location index.
+
+Bestiary keys are written as "(castle_of_ordeal,2f)", "(4,4)" or "(ocean)",
+which the LLM rarely reproduces exactly. `LocationIndex` resolves free-form
+location names to those keys:
+
+1. the key itself
+2. the same words: case, punctuation and floor spelling are ignored, so
+   "Castle of Ordeal 2F", "castle-of-ordeal (2nd floor)" and
+   "castle_of_ordeal,F2" all match; "3B" and "basement 3" mean "b3"
+3. every query word matches a word of the key, words of three or more
+   letters as prefixes: "ice cave b2", "marsh" (the fewest extra key words
+   win, then bestiary order, so "marsh" is its first floor)
+4. as 3, after replacing misspelled words with the closest key word by
+   trigram similarity and edit distance (see fuzzy.py): "castl of ordel 3f"
+
+Overworld cells such as "(4,4)" only ever match exactly.
+
+Names in LOCATION_ALIASES (other names for the same dungeon, e.g. the
+remakes' "Chaos Shrine") are replaced before matching; a floor given with
+the alias is kept.
+"""
+
+# other names for bestiary locations, matched against the whole name without its floor
+LOCATION_ALIASES: Dict[str, str] = {
+    "chaos shrine": "temple of fiends present",
+    "temple of chaos": "temple of fiends present",
+    "tof": "temple of fiends present",
+    "flying fortress": "sky castle",
+    "floating castle": "sky castle",
+    "sunken shrine": "sea shrine",
+    "citadel of trials": "castle of ordeal",
+    "mount gulg": "gurgu volcano",
+    "mt gulg": "gurgu volcano",
+    "ice cavern": "ice cave",
+    "waterfall cave": "waterfall",
+    "sea": "ocean",
+    "ship": "ocean",
+    "boat": "ocean",
+}
+
+_FLOOR_PATTERNS = [
+    (re.compile(r'^(\d+)(?:st|nd|rd|th)?f$'), '{}f'),
+    (re.compile(r'^f(\d+)$'), '{}f'),
+    (re.compile(r'^b(\d+)$'), 'b{}'),
+    (re.compile(r'^(\d+)b$'), 'b{}'),
+]
+_ORDINAL = re.compile(r'^(\d+)(?:st|nd|rd|th)?$')
+_FLOOR = re.compile(r'^(?:\d+f|b\d+)$')
+_FLOOR_WORDS = {"floor": '{}f', "fl": '{}f', "basement": 'b{}'}
+
+# query words shorter than this only match key words exactly
+_MIN_PREFIX = 3
+
+
+def location_tokens(location: str) -> List[str]:
+    """
+    The words of `location`, lowercased and without punctuation, with its
+    floor (if any) written as the bestiary does ("2f", "b3") and moved last.
+    """
+    words = re.sub(r'[^0-9a-z]+', ' ', location.lower().replace("'", '')).split()
+
+    tokens: List[str] = []
+    floor: Optional[str] = None
+    i = 0
+    while i < len(words):
+        word = words[i]
+        for pattern, form in _FLOOR_PATTERNS:
+            match = pattern.match(word)
+            if match:
+                floor = form.format(int(match.group(1)))
+                break
+        else:
+            # "floor 2", "2nd floor", "basement 3", "3rd basement"
+            nxt = words[i + 1] if i + 1 < len(words) else None
+            if word in _FLOOR_WORDS and nxt is not None and _ORDINAL.match(nxt):
+                floor = _FLOOR_WORDS[word].format(int(_ORDINAL.match(nxt).group(1)))
+                i += 1
+            elif nxt in _FLOOR_WORDS and _ORDINAL.match(word):
+                floor = _FLOOR_WORDS[nxt].format(int(_ORDINAL.match(word).group(1)))
+                i += 1
+            else:
+                tokens.append(word)
+        i += 1
+
+    alias = LOCATION_ALIASES.get(' '.join(tokens))
+    if alias is not None:
+        tokens = alias.split()
+    if floor is not None:
+        tokens.append(floor)
+    return tokens
+
+
+class LocationIndex:
+    """Resolves location names to bestiary keys (see module doc)."""
+    def __init__(self, keys: Iterable[str]):
+        self.keys: Sequence[str] = list(keys)
+        self._key_set: Collection[str] = set(self.keys)
+        self._tokens: Sequence[List[str]] = [location_tokens(key) for key in self.keys]
+        compact: Dict[str, int] = {}
+        postings: Dict[str, Set[int]] = {}
+        for i, tokens in enumerate(self._tokens):
+            compact.setdefault(''.join(tokens), i)
+            for token in tokens:
+                postings.setdefault(token, set()).add(i)
+        # dicts when built, packed tables when loaded from an artifact
+        self._compact: Mapping[str, int] = compact
+        self._postings: Mapping[str, Collection[int]] = postings
+        self._vocabulary: Sequence[str] = sorted(postings)
+        # names only: a floor or coordinate that does not exist must not be "corrected" into one that does
+        self._words = TrigramIndex(word for word in self._vocabulary if not word.isdigit() and not _FLOOR.match(word))
+
+    def to_arrays(self, arrays: Dict[str, np.ndarray], name: str) -> None:
+        """Add the built index to `arrays` as packed arrays named `name`.*, for precompiled artifacts (see artifacts.py)."""
+        pack_map(arrays, f"{name}.keys", self.keys)
+        # postings in vocabulary order, so a token's row in the map is its vocabulary number
+        pack_map(arrays, f"{name}.vocabulary", self._vocabulary)
+        pack_lists(arrays, f"{name}.postings", (sorted(self._postings[token]) for token in self._vocabulary))
+        numbers = {token: i for i, token in enumerate(self._vocabulary)}
+        pack_lists(arrays, f"{name}.tokens", ([numbers[token] for token in tokens] for tokens in self._tokens))
+        pack_map(arrays, f"{name}.compact", self._compact)
+        arrays[f"{name}.compact.rows"] = np.array(list(self._compact.values()), dtype=np.int32)
+        self._words.to_arrays(arrays, f"{name}.words")
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], name: str) -> 'LocationIndex':
+        """The index saved by `to_arrays()`, searched in place without tokenizing any key again."""
+        index = cls.__new__(cls)
+        index.keys = unpack_strings(arrays, f"{name}.keys")
+        index._key_set = unpack_map(arrays, f"{name}.keys", range(len(index.keys)))
+        # packed sorted, so the table is the vocabulary
+        index._vocabulary = unpack_strings(arrays, f"{name}.vocabulary")
+        index._postings = unpack_map(arrays, f"{name}.vocabulary", unpack_lists(arrays, f"{name}.postings"))
+        index._tokens = unpack_lists(arrays, f"{name}.tokens", index._vocabulary)
+        index._compact = unpack_map(arrays, f"{name}.compact", arrays[f"{name}.compact.rows"].data)
+        index._words = TrigramIndex.from_arrays(arrays, f"{name}.words")
+        return index
+
+    def _keys_with_word(self, word: str) -> Set[int]:
+        """Keys having `word` as a word, or as a word prefix when it is long enough."""
+        if len(word) < _MIN_PREFIX or word.isdigit() or _FLOOR.match(word):
+            return set(self._postings.get(word, ()))
+        found: Set[int] = set()
+        i = bisect.bisect_left(self._vocabulary, word)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(word):
+            found.update(self._postings[self._vocabulary[i]])
+            i += 1
+        return found
+
+    def lookup(self, location: str, exact: bool = False) -> Optional[str]:
+        """
+        The bestiary key `location` refers to, or None if nothing matches.
+        With `exact`, only steps 1 and 2 (see module doc) are tried.
+        """
+        if location in self._key_set:
+            return location
+        tokens = location_tokens(location)
+        if not tokens:
+            return None
+        compact = ''.join(tokens)
+        if compact in self._compact:
+            return self.keys[self._compact[compact]]
+        if exact or all(token.isdigit() for token in tokens):
+            # overworld cells are ordered coordinates: (0,3) is not (3,0) or (0,2),
+            # so they never fall through to word matching
+            return None
+
+        key = self._match_words(tokens)
+        if key is not None:
+            return key
+
+        # misspelled words: retry with each unknown word replaced by the closest key word
+        corrected = []
+        for token in tokens:
+            if not token.isdigit() and not _FLOOR.match(token) and not self._keys_with_word(token):
+                matches = self._words.search(token, limit=1)
+                if matches:
+                    token = matches[0].key
+            corrected.append(token)
+        if corrected != tokens:
+            return self._match_words(corrected)
+        return None
+
+    def _match_words(self, tokens: List[str]) -> Optional[str]:
+        """The key with every word of `tokens` (see module doc, step 3), or None."""
+        candidates: Optional[Set[int]] = None
+        for token in tokens:
+            found = self._keys_with_word(token)
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return None
+
+        # fewest key words the query left out, then bestiary order
+        def extra_words(i: int) -> int:
+            return sum(1 for word in self._tokens[i] if not any(word.startswith(t) for t in tokens))
+        return self.keys[min(candidates, key=lambda i: (extra_words(i), i))]
+
+
+__all__ = ["LOCATION_ALIASES", "LocationIndex", "location_tokens"]
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+"""
+Lua catalog compiler.
+
+Turns ram_catalog.json into a Lua module that the daemon loads once at start
+up (see scripts/python/compile_lua_catalog.py). The module hard-codes the
+catalog addresses, grouped into contiguous ranges so each range is fetched
+with a single `memory.readbyterange` call, and builds the ram_contents.json
+text with a table buffer and one `table.concat` instead of repeated string
+concatenation.
+
+It also exposes `read_bytes()` (the raw values, in `ADDRESSES` order) and the
+`HEX` table, which the daemon's delta writer uses to diff consecutive ticks.
+"""
+
+# Catalog addresses are never coalesced across the PPU/APU register space:
+# reading those registers has side effects on the emulated hardware.
+_UNSAFE_READ_RANGE = (0x2000, 0x6000)
+
+
+def coalesce_ranges(addresses: Sequence[int], max_gap: int = 0) -> List[Tuple[int, int]]:
+    """
+    Merge sorted, unique `addresses` into (start, length) ranges.
+
+    Neighbouring addresses are merged when at most `max_gap` unrequested bytes
+    separate them; those bytes are read but not reported.
+    """
+    ranges: List[List[int]] = []
+    for address in sorted(set(addresses)):
+        if ranges:
+            start, end = ranges[-1]
+            crosses_unsafe = end < _UNSAFE_READ_RANGE[1] and address >= _UNSAFE_READ_RANGE[0]
+            if address - end - 1 <= max_gap and not crosses_unsafe:
+                ranges[-1][1] = address
+                continue
+        ranges.append([address, address])
+    return [(start, end - start + 1) for start, end in ranges]
+
+
+def _lua_string(text: str) -> str:
+    # catalog addresses are plain hex strings; escape defensively anyway
+    return "'" + text.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def generate_lua_catalog(ram_catalog: Dict[str, Any], max_gap: int = 0, source: str = 'ram_catalog.json') -> str:
+    """
+    Return the source of a Lua module exposing `ram_contents_json()`, which
+    reads every catalog address and returns the ram_contents.json text, and
+    `read_bytes()`, which returns the raw values in `ADDRESSES` order.
+    """
+    # keep the catalog's own spelling of each address: it is the JSON key
+    address_strings: Dict[int, str] = {}
+    for entry in ram_catalog.get('catalog', []) or []:
+        address_strings.setdefault(int(entry['address'], 16), entry['address'])
+
+    ranges = coalesce_ranges(list(address_strings.keys()), max_gap)
+    # read order: ascending address, as the ranges are walked
+    ordered = [address_strings[a] for a in sorted(address_strings)]
+
+    lines = [
+        f"-- GENERATED by scripts/python/compile_lua_catalog.py from {source}. Do not edit.",
+        f"-- {len(address_strings)} catalog addresses in {len(ranges)} contiguous ranges",
+        "",
+        "-- { start address, length, { { offset within range, JSON key prefix }, ... } }",
+        "local RANGES = {",
+    ]
+    for start, length in ranges:
+        fields = [
+            f"{{ {offset}, {_lua_string(chr(34) + address_strings[start + offset] + chr(34) + ': ' + chr(34) + '0x')} }}"
+            for offset in range(length)
+            if start + offset in address_strings
+        ]
+        lines.append(f"    {{ 0x{start:06X}, {length}, {{ {', '.join(fields)} }} }},")
+    lines += [
+        "}",
+        "",
+        "local HEX = {}",
+        "for i = 0, 255 do",
+        "    HEX[i] = string.format(\"%02X\", i)",
+        "end",
+        "",
+        "local M = {}",
+        "",
+        f"M.ADDRESS_COUNT = {len(address_strings)}",
+        "M.HEX = HEX",
+        "",
+        "-- catalog address strings, in the order read_bytes() returns their values",
+        "M.ADDRESSES = {",
+    ]
+    lines += [f"    {_lua_string(address)}," for address in ordered]
+    lines += [
+        "}",
+        "",
+        "-- read every catalog address and return the ram_contents.json text",
+        "function M.ram_contents_json()",
+        "    local buffer = {}",
+        "    local n = 0",
+        "    for r = 1, #RANGES do",
+        "        local range = RANGES[r]",
+        "        local bytes = memory.readbyterange(range[1], range[2])",
+        "        local fields = range[3]",
+        "        for f = 1, #fields do",
+        "            local field = fields[f]",
+        "            n = n + 1",
+        "            buffer[n] = field[2] .. HEX[string.byte(bytes, field[1] + 1)] .. '\"'",
+        "        end",
+        "    end",
+        "    return \"{\" .. table.concat(buffer, \",\") .. \"}\"",
+        "end",
+        "",
+        "-- read every catalog address and return the raw values, in ADDRESSES order",
+        "function M.read_bytes()",
+        "    local values = {}",
+        "    local n = 0",
+        "    for r = 1, #RANGES do",
+        "        local range = RANGES[r]",
+        "        local bytes = memory.readbyterange(range[1], range[2])",
+        "        local fields = range[3]",
+        "        for f = 1, #fields do",
+        "            n = n + 1",
+        "            values[n] = string.byte(bytes, fields[f][1] + 1)",
+        "        end",
+        "    end",
+        "    return values",
+        "end",
+        "",
+        "return M",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+__all__ = ["coalesce_ranges", "generate_lua_catalog"]
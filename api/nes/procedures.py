@@ -0,0 +1,140 @@
+import inspect
+from typing import Any, Callable, Dict, List, Tuple
+from .command_queue import CallArgument, enqueue_call, format_call
+from .blocks import copy_block, swap_blocks, permute_blocks
+from .layout import PARTY
+
+from api.utils.console import print_to_console
+
+"""
+Named daemon procedures.
+
+scripts/lua/procedures.lua is loaded once when the Lua daemon starts. Rather
+than shipping a Lua script for every change, Python queues a "call" record
+holding just the procedure name and its integer arguments (see
+command_queue.py), e.g. "set_hp 2 150", which the daemon runs directly.
+
+`PROCEDURES` maps each name callable through `call_procedure` to a Python
+function that validates its arguments and queues the call. Like
+`write_addresses`, each returns ({"message", "ticket"}, 200) on success.
+"""
+
+PARTY_SIZE = PARTY.count
+MAX_HP = 999
+
+# inventory byte and the most the game lets you carry
+ITEMS: Dict[str, Tuple[int, int]] = {
+    "tent": (0x6036, 99),
+    "cabin": (0x6037, 99),
+    "house": (0x6038, 99),
+    "heal": (0x6039, 99),
+    "pure": (0x603A, 99),
+    "soft": (0x603B, 99),
+    "lute": (0x6021, 1),
+    "crown": (0x6022, 1),
+    "crystal": (0x6023, 1),
+    "herb": (0x6024, 1),
+    "mystic key": (0x6025, 1),
+    "tnt": (0x6026, 1),
+    "adamant": (0x6027, 1),
+    "slab": (0x6028, 1),
+    "ruby": (0x6029, 1),
+    "rod": (0x602A, 1),
+    "floater": (0x602B, 1),
+    "chime": (0x602C, 1),
+    "tail": (0x602D, 1),
+    "cube": (0x602E, 1),
+    "bottle": (0x602F, 1),
+    "oxyale": (0x6030, 1),
+    "canoe": (0x6031, 1),
+}
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _queue(procedure: str, args: List[CallArgument], message: str) -> Tuple[Any, int]:
+    print_to_console()
+    print_to_console(format_call(procedure, args))
+    print_to_console()
+    try:
+        ticket = enqueue_call(procedure, args)
+        return ({"message": message, "ticket": ticket}, 200)
+    except Exception as e:
+        return (f"Error queueing procedure call: {e}", 500)
+
+
+def set_hp(slot: int, hp: int) -> Tuple[Any, int]:
+    """Set the current HP of the character in `slot` (1-4)."""
+    if not _is_int(slot) or not 1 <= slot <= PARTY_SIZE:
+        return (f"slot must be an integer between 1 and {PARTY_SIZE}", 400)
+    if not _is_int(hp) or not 0 <= hp <= MAX_HP:
+        return (f"hp must be an integer between 0 and {MAX_HP}", 400)
+    return _queue("set_hp", [slot, hp], f"Setting HP of slot {slot} to {hp} queued")
+
+
+def heal_party() -> Tuple[Any, int]:
+    """Restore every character who is not dead or stoned to max HP."""
+    return _queue("heal_party", [], "Party heal queued")
+
+
+def give_item(item: str, count: int = 1) -> Tuple[Any, int]:
+    """
+    Add `count` of `item` (e.g. "heal", "tent", "canoe") to the inventory,
+    up to the most the game allows. A negative count takes items away.
+    """
+    entry = ITEMS.get(str(item).strip().lower())
+    if entry is None:
+        return (f"Unknown item: {item}. Known items: {', '.join(ITEMS)}", 400)
+    if not _is_int(count) or not -99 <= count <= 99 or count == 0:
+        return ("count must be a non-zero integer between -99 and 99", 400)
+    address, cap = entry
+    return _queue("give_item", [address, count, cap], f"Giving {count} {item} queued")
+
+
+PROCEDURES: Dict[str, Callable[..., Tuple[Any, int]]] = {
+    "set_hp": set_hp,
+    "heal_party": heal_party,
+    "give_item": give_item,
+    "copy_block": copy_block,
+    "swap_blocks": swap_blocks,
+    "permute_blocks": permute_blocks,
+}
+
+
+def call_procedure(name: str, args: Any = None) -> Tuple[Any, int]:
+    """
+    Call procedure `name` with `args`, either a list of positional arguments
+    or an object of keyword arguments, as accepted by /nes/procedures/call:
+      {"name": "heal_party"}
+      {"name": "set_hp", "args": {"slot": 2, "hp": 150}}
+      {"name": "give_item", "args": ["heal", 5]}
+    """
+    procedure = PROCEDURES.get(name) if isinstance(name, str) else None
+    if procedure is None:
+        return (f"Unknown procedure: {name}. Known procedures: {', '.join(PROCEDURES)}", 400)
+
+    if args is None:
+        args = []
+    try:
+        if isinstance(args, dict):
+            bound = inspect.signature(procedure).bind(**args)
+        elif isinstance(args, list):
+            bound = inspect.signature(procedure).bind(*args)
+        else:
+            return ("args must be a list or an object", 400)
+    except TypeError as e:
+        return (f"Invalid arguments for {name}: {e}", 400)
+
+    return procedure(*bound.args, **bound.kwargs)
+
+
+__all__ = [
+    "ITEMS",
+    "PROCEDURES",
+    "set_hp",
+    "heal_party",
+    "give_item",
+    "call_procedure",
+]
@@ -1,7 +1,13 @@
-import json
 from .config import get_config
-from typing import Tuple, Dict, Any, List
-from langchain.tools import tool
+from .snapshot import RAM_CONTENTS_FILENAME, RAM_CONTENTS_PATH, RamSnapshot, get_ram_snapshot
+from .catalog import KIND_UNKNOWN, CompiledCatalog, catalog_from_artifact, catalog_to_artifact, compile_catalog
+from .artifacts import compile_artifact, load_artifact
+from .command_queue import DEFAULT_WAIT_TIMEOUT, wait_for
+from .layout import ENEMIES
+from .history import HISTORY_SIZE, get_history
+from .reloadable import reloadable_file
+from typing import Tuple, Dict, Any, List, Optional
+import numpy as np
 
 """
 Read endpoint implementation.
@@ -11,70 +17,67 @@ of address strings (e.g., ["0x006BE4", "0x006BE5"]) and returns a tuple
 (result, status). On success, result is a dict of the form
 {"addresses": {addr: value, ...}} and status is 200. On failure, result
 is an error message string and status is an HTTP error code.
+
+The list may also hold integer addresses (returned under their hex string)
+and ranges such as "0x006100-0x00613F", which are returned under
+"ranges" as one array of raw byte values (null where the snapshot has no
+byte), gathered straight from the snapshot without catalog translation.
+
+With `since` (a snapshot version from an earlier read), only the addresses
+whose raw bytes changed after that snapshot are returned, looked up in the
+RAM history (history.py). If that snapshot is no longer in the history,
+every address is returned and "complete" is true. Ranges are always
+returned in full.
 """
 
 _config = get_config()
 _RAMDISK_DIR = _config['RAMDISK_DIR']
 _RAM_CATALOG_PATH = _RAMDISK_DIR + 'ram_catalog.json'
-_RAM_CONTENTS_PATH = _RAMDISK_DIR + 'ram_contents.json'
 
-from api.utils.console import print_to_console
+# largest range accepted in one read (bytes)
+MAX_RANGE_BYTES = 0x1000
 
-def _load_ram_catalog() -> Dict[str, Any]:
-    """
-    Load and return the entries_map built from ram_catalog.json.
+from api.utils import fastjson
 
-    entries_map: address -> either { description, weight } or { description, lookup }
-    This function caches the parsed entries for the lifetime of the process.
+RAM_CATALOG_ARTIFACT_KIND = 'ram_catalog'
+
+def compile_ram_catalog_artifact(path: str = _RAM_CATALOG_PATH) -> str:
+    """Compile ram_catalog.json at `path` into ram_catalog.bin next to it (see artifacts.py); returns the artifact path."""
+    return compile_artifact(path, RAM_CATALOG_ARTIFACT_KIND, lambda ram_catalog: catalog_to_artifact(compile_catalog(ram_catalog)))
+
+def _build_ram_catalog(path: str) -> CompiledCatalog:
     """
-    # Cache parsed entries for lifetime of process — the catalog is static.
-    global _RAM_CATALOG_ENTRIES_CACHE
-    try:
-        if _RAM_CATALOG_ENTRIES_CACHE is not None:
-            return _RAM_CATALOG_ENTRIES_CACHE
-    except NameError:
-        # first-time load
-        _RAM_CATALOG_ENTRIES_CACHE = None
-
-    with open(_RAM_CATALOG_PATH, 'r') as f:
-        ram_catalog = json.load(f)
-
-    lookups: Dict[str, Any] = {}
-    for item in ram_catalog.get('lookups', []) or []:
-        # each lookup item should have `key`, `default`, and `map`
-        lookups[item['key']] = {
-            'default': item.get('default'),
-            'map': item.get('map', {})
-        }
-
-    entries: Dict[str, Any] = {}
-    for catalog_entry in ram_catalog.get('catalog', []) or []:
-        if catalog_entry.get('type') == 'number':
-            entries[catalog_entry['address']] = {
-                'description': catalog_entry.get('description', ''),
-                'weight': catalog_entry.get('weight')
-            }
-        elif catalog_entry.get('type') == 'lookup':
-            lookup_key = catalog_entry.get('lookup')
-            lookup = lookups.get(lookup_key)
-            entries[catalog_entry['address']] = {
-                'description': catalog_entry.get('description', ''),
-                'lookup': lookup
-            }
-        else:
-            # keep empty/unknown types as-is (will be rejected later)
-            entries[catalog_entry['address']] = {
-                'description': catalog_entry.get('description', ''),
-                'type': catalog_entry.get('type', '')
-            }
+    The compiled catalog of ram_catalog.json at `path`: its arrays memory-mapped
+    from ram_catalog.bin when that was compiled from the file as it is now,
+    else compiled from the JSON.
+    """
+    artifact = load_artifact(path, RAM_CATALOG_ARTIFACT_KIND)
+    if artifact is not None:
+        return catalog_from_artifact(artifact.arrays, artifact.objects)
+
+    with open(path, 'rb') as f:
+        ram_catalog = fastjson.load(f)
+    return compile_catalog(ram_catalog)
 
-    _RAM_CATALOG_ENTRIES_CACHE = entries
-    return _RAM_CATALOG_ENTRIES_CACHE
+_RAM_CATALOG = reloadable_file('ram_catalog', _RAM_CATALOG_PATH, _build_ram_catalog)
+
+def _load_ram_catalog() -> CompiledCatalog:
+    """
+    Load ram_catalog.json and return it compiled into a `CompiledCatalog`
+    (integer offsets, 256-entry lookup tables and a weight vector; see catalog.py).
 
+    The compiled catalog is cached, and rebuilt in the background when
+    ram_catalog.json changes (see reloadable.py). Call this once per request
+    and use the returned catalog throughout.
+    """
+    return _RAM_CATALOG.get()
 
-def _load_ram_contents() -> Dict[str, str]:
-    with open(_RAM_CONTENTS_PATH, 'r') as f:
-        return json.load(f)
+# map whose key is the memory address of an enemy type, and whose value is the
+# memory address of the corresponding enemy "exists?" flag:
+EXISTS_BY_TYPE_ADDRESS_MAP = {
+    ENEMIES.address(slot, "type"): ENEMIES.address(slot, "exists")
+    for slot in range(1, ENEMIES.count + 1)
+}
 
 """
  Private function used to confirm whether there is really an Imp in a given enemy slot.
@@ -82,20 +85,6 @@ def _load_ram_contents() -> Dict[str, str]:
  enemy, additonal logic is required to validate that an Imp really exists in the slot.
 """
 def _confirm_imp(address: str, ram_contents: Dict[str, str]) -> str:
-    # map whose key is the memory address of an enemy type, and whose value is the
-    # memory address of the corresponding enemy "exists?" flag:
-    EXISTS_BY_TYPE_ADDRESS_MAP = {
-        "0x006BE4": "0x006BDF",
-        "0x006BF8": "0x006BF3",
-        "0x006C0C": "0x006C07",
-        "0x006C20": "0x006C1B",
-        "0x006C34": "0x006C2F",
-        "0x006C48": "0x006C43",
-        "0x006C5C": "0x006C57",
-        "0x006C70": "0x006C6B",
-        "0x006C84": "0x006C7F"
-    }
-
     exists_addr = EXISTS_BY_TYPE_ADDRESS_MAP.get(address)
     if not exists_addr:
         return "Imp"
@@ -103,7 +92,63 @@ def _confirm_imp(address: str, ram_contents: Dict[str, str]) -> str:
         return ""
     return "Imp"
 
-def read_addresses(addresses: List[str]) -> Tuple[Dict[str, Any], int]:
+def _parse_range(text: str) -> Optional[Tuple[int, int]]:
+    """(start, end) of an inclusive range like "0x006100-0x00613F", or None if malformed."""
+    parts = text.split('-')
+    if len(parts) != 2:
+        return None
+    try:
+        start, end = (int(part.strip(), 16) for part in parts)
+    except ValueError:
+        return None
+    if not 0 <= start <= end < 0x10000:
+        return None
+    return (start, end)
+
+def _changed_since(singles: List[str], since: int, snapshot: RamSnapshot) -> Optional[List[bool]]:
+    """
+    For each address in `singles`, whether its value may have changed after
+    snapshot `since`, or None if that snapshot is not in the RAM history.
+    An enemy type address also counts as changed when its "exists?" flag did,
+    since that decides whether a 0x00 type is an Imp.
+    """
+    if since == snapshot.version:
+        return [False] * len(singles)
+    if HISTORY_SIZE <= 0 or since > snapshot.version:
+        return None
+    ram_history = get_history()
+    watched = singles + [EXISTS_BY_TYPE_ADDRESS_MAP.get(address, address) for address in singles]
+    rows = ram_history.catalog.rows(watched)
+    if (rows < 0).any():
+        return None
+    before = ram_history.raw_at(since, rows)
+    if before is None:
+        return None
+    differs = before != snapshot.contents.gather(ram_history.catalog.offsets[rows])
+    return (differs[:len(singles)] | differs[len(singles):]).tolist()
+
+def resolve_snapshot(min_version: Optional[int] = None) -> Tuple[Any, int]:
+    """
+    Return (snapshot, 200) with the current RAM snapshot, first waiting (up to
+    DEFAULT_WAIT_TIMEOUT seconds) until write ticket `min_version` has been
+    applied if one is given; otherwise an error message and HTTP status.
+    """
+    if min_version is not None and (isinstance(min_version, bool) or not isinstance(min_version, int)):
+        return ("min_version must be an integer write ticket", 400)
+
+    # read-your-writes: block only until the daemon has applied the given write
+    if min_version is not None and not wait_for(min_version, DEFAULT_WAIT_TIMEOUT):
+        return (f"Timed out waiting for write {min_version} to be applied", 504)
+
+    try:
+        # shared, change-aware snapshot: only re-parsed when the daemon rewrites it
+        return (get_ram_snapshot(), 200)
+    except FileNotFoundError:
+        return (f"{RAM_CONTENTS_FILENAME} not found at {RAM_CONTENTS_PATH}", 500)
+    except Exception as e:
+        return (f"Error loading {RAM_CONTENTS_FILENAME}: {e}", 500)
+
+def read_addresses(addresses: List[str], min_version: Optional[int] = None, snapshot: Optional[RamSnapshot] = None, since: Optional[int] = None) -> Tuple[Dict[str, Any], int]:
     """
     Reads dynamic RAM values for the given addresses list and translates them into
     values meaningful to a human or an LLM.
@@ -111,11 +156,29 @@ def read_addresses(addresses: List[str]) -> Tuple[Dict[str, Any], int]:
     Input: `List[str] addresses`: The requested RAM addresses. Must always be
         in hex format with six characters following the '0x'. Example:
         ["0x00001C", "0x006110"]
+        Integer addresses and inclusive ranges are also accepted, e.g.
+        [28, "0x006100-0x00613F"] (see module doc).
+
+    Input: `Optional[int] min_version`: A write ticket returned by `write_addresses`.
+        When given, the read waits (up to DEFAULT_WAIT_TIMEOUT seconds) until the
+        daemon has applied that write, so the result reflects it.
+
+    Input: `Optional[RamSnapshot] snapshot`: Read from this snapshot instead of
+        the current one, so several reads see the same game state (see batch.py).
+
+    Input: `Optional[int] since`: A snapshot version returned by an earlier read;
+        return only the addresses that changed after it (see module doc).
 
     Output 1: `Dict[str,str] result`: The key is the memory address requested and the value 
         is its meaningful, human readable value. Example:
         {{"0x00001C": "in battle", "0x006110": "25"}}
 
+        Ranges are returned under "ranges", keyed by the requested range:
+        {{"ranges": {{"0x006102-0x006105": [138, 139, 140, 141]}}}}
+
+        With `since`, the snapshot version read and whether every address was
+        returned are added: {{"addresses": {{...}}, "version": 14, "complete": false}}
+
     Output 2: `int status`: The HTTP code for the response.
 
     Returns (result, status)
@@ -125,102 +188,96 @@ def read_addresses(addresses: List[str]) -> Tuple[Dict[str, Any], int]:
     if not isinstance(addresses, list):
         return ("addresses must be a list of address strings", 400)
 
+    # Split into single addresses (decoded through the catalog) and raw ranges
+    singles: List[str] = []
+    ranges: List[Tuple[str, int, int]] = []
+    for address in addresses:
+        if isinstance(address, int) and not isinstance(address, bool):
+            if not 0 <= address < 0x10000:
+                return (f"Address {address} is outside of RAM (0-65535)", 400)
+            singles.append("0x%06X" % address)
+        elif isinstance(address, str) and '-' in address:
+            span = _parse_range(address)
+            if span is None:
+                return (f"Invalid address range {address!r}; expected e.g. \"0x006100-0x00613F\"", 400)
+            if span[1] - span[0] + 1 > MAX_RANGE_BYTES:
+                return (f"Address range {address!r} is longer than {MAX_RANGE_BYTES} bytes", 400)
+            ranges.append((address, span[0], span[1]))
+        elif isinstance(address, str):
+            singles.append(address)
+        else:
+            return ("addresses must be a list of address strings, integers or ranges", 400)
+    if min_version is not None and (isinstance(min_version, bool) or not isinstance(min_version, int)):
+        return ("min_version must be an integer write ticket", 400)
+    if since is not None and (isinstance(since, bool) or not isinstance(since, int) or since < 0):
+        return ("since must be a snapshot version (a non-negative integer)", 400)
+
     # Load ram_catalog.json and RAM contents
     try:
-        entries = _load_ram_catalog()
+        catalog = _load_ram_catalog()
     except FileNotFoundError:
         return (f"ram_catalog.json not found at {_RAM_CATALOG_PATH}", 500)
     except Exception as e:
         return (f"Error loading ram_catalog.json: {e}", 500)
 
-    try:
-        ram_contents = _load_ram_contents()
-    except FileNotFoundError:
-        return (f"ram_contents.json not found at {_RAM_CONTENTS_PATH}", 500)
-    except Exception as e:
-        return (f"Error loading ram_contents.json: {e}", 500)
+    if snapshot is None:
+        snapshot, status = resolve_snapshot(min_version)
+        if status != 200:
+            return (snapshot, status)
+    ram_contents = snapshot.contents
 
     # Check for missing addresses in catalog
-    missing = [a for a in addresses if a not in entries]
-    if missing:
+    rows = catalog.rows(singles)
+    if (rows < 0).any():
+        missing = [a for a, row in zip(singles, rows.tolist()) if row < 0]
         return (f"Requested RAM addresses not found in ram_catalog.json: {missing}", 400)
 
-    # Build response map
-    values = {}
+    # Only decode what changed after `since`, when that snapshot is still in the history
+    complete = True
+    if since is not None:
+        try:
+            changed = _changed_since(singles, since, snapshot)
+        except Exception:
+            changed = None
+        if changed is not None:
+            singles = [address for address, keep in zip(singles, changed) if keep]
+            rows = rows[np.asarray(changed, dtype=bool)]
+            complete = False
+
+    # Build response map in one batched pass over the compiled catalog:
+    # - "Lookup entries" have their raw value translated using the lookup
+    #   table referenced in ram_catalog.json for the particular address
+    # - "Number entries" have their raw value in memory multiplied by the weight
+    #   specified in ram_catalog.json for the particular address
     try:
-        for address in addresses:
-            entry = entries[address]
-            
-            if 'lookup' in entry and entry.get('lookup') is not None:
-                # entry is a "Lookup entry"
-                # Lookup entries have their raw value translated using the lookup
-                # table referenced in ram_contents.json for the particular address
-
-                lookup = entry['lookup']
-                raw = ram_contents.get(address)
-                mapped = lookup['map'].get(raw) if lookup and 'map' in lookup else None
-                if mapped is not None:
-                    values[address] = mapped
-                else:
-                    values[address] = lookup.get('default') if lookup else None
-
-                if values[address] == "Imp":
-                    values[address] = _confirm_imp(address, ram_contents)
-
-            elif 'weight' in entry:
-                # entry is a "Number entry"
-                # Number entries have their raw value in memory multiplied by the weight
-                # specified in ram_contents.json for the particular address
-
-                raw = ram_contents.get(address)
-                # parse hex (e.g., '0x05')
-                try:
-                    raw_val = int(raw, 16) if isinstance(raw, str) else int(raw)
-                except Exception:
-                    return ("Game memory not in expected format. Perhaps a RAM address I have been trained on is not available for lookup.", 500)
-                
-                weight = int(entry['weight']) if entry.get('weight') is not None else 1
-                values[address] = str(raw_val * weight)
-            else:
+        raw = ram_contents.gather(catalog.offsets[rows])
+
+        invalid = catalog.find_invalid(rows, raw)
+        if invalid is not None:
+            _, kind = invalid
+            if kind == KIND_UNKNOWN:
                 return ("RAM Catalog entry has unexpected format.", 500)
+            return ("Game memory not in expected format. Perhaps a RAM address I have been trained on is not available for lookup.", 500)
+
+        values = {}
+        for address, value in zip(singles, catalog.decode(rows, raw)):
+            if value == "Imp":
+                value = _confirm_imp(address, ram_contents)
+            values[address] = value
+
+        range_values = {}
+        for text, start, end in ranges:
+            span = ram_contents.gather(np.arange(start, end + 1, dtype=np.int64)).tolist()
+            range_values[text] = [byte if byte >= 0 else None for byte in span]
     except Exception as e:
         return (f"Game memory not in expected format: {e}", 500)
 
-    return ({"addresses": values}, 200)
-
-# Provide a LangChain tool wrapper while keeping the core read_addresses function plain for Flask.
-@tool
-def read_addresses_tool(arg_str: str) -> str:
-    """
-    LangChain tool wrapper around `read_addresses` that accepts a JSON string
-    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
-
-    Input example: '["0x006BE4","0x006BE5"]'
-    Output example: '{"addresses": {"0x006BE4": "Imp", "0x006BE5": ""}}'
-    """
-    print_to_console()
-    print_to_console('Calling read_addresses tool:', color='yellow')
-    print_to_console('arg_str = ' + arg_str)
-
-    # Parse addresses from the LLM-provided JSON string
-    try:
-        addresses = json.loads(arg_str)
-    except Exception as e:
-        print_to_console(f'error = {e}', 'red') # print error to console
-        return '{"error": "' + str(e) +  '"}'
-
-    result, status = read_addresses(addresses)
-    if status != 200:
-        # propagate as exception for LangChain usage
-        print_to_console('error = ' + result, 'red') # print error to console
-        return '{"error": "' + result +  '"}'
-    
-    try:
-        print_to_console('result = ' + json.dumps(result)) # print result to console
-        return json.dumps(result)
-    except Exception as e:
-        # print exception to console in red and return a JSON error string
-        print_to_console('error = ' + str(e), 'red') # print error to console
-        return '{"error": "' + str(e) +  '"}'
+    result: Dict[str, Any] = {"addresses": values}
+    if ranges:
+        result["ranges"] = range_values
+    if since is not None:
+        result["version"] = snapshot.version
+        result["complete"] = complete
+    return (result, 200)
 
-__all__ = ["read_addresses", "read_addresses_tool"]
+__all__ = ["MAX_RANGE_BYTES", "compile_ram_catalog_artifact", "resolve_snapshot", "read_addresses"]
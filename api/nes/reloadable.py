@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+from .config import get_config
+
+"""
+Hot-reloadable static data.
+
+ram_catalog.json and bestiary.json are parsed once and turned into indexes
+(the compiled catalog, the reverse bestiary, ...). A `ReloadableFile` keeps
+the built value and rebuilds it when the file changes on the RAMdisk, so an
+edited catalog or bestiary is picked up without restarting the API:
+
+- `get()` returns the current value. At most every STATIC_DATA_CHECK_MS it
+  also stats the file; if its (mtime, size, inode) signature changed, a
+  background thread rebuilds the value while readers keep getting the old
+  one. Only the very first load blocks, as there is nothing to serve yet.
+- the new value is published with a single reference assignment, so a
+  reader sees either the old indexes or the new ones, never a mix or a
+  half-built one. Callers should fetch the value once per request and use
+  that object throughout.
+- a rebuild that fails (e.g. the file was caught mid-write or is invalid)
+  leaves the old value in place and is retried when the file changes again;
+  the error is kept in `last_error`.
+
+The RAM history and the watch engine lay their rows out by the compiled
+catalog; they move onto a reloaded one by address (see history.py and
+watch.py).
+
+Every `ReloadableFile` is registered by name; `reload_static_data()` forces
+a synchronous rebuild of all of them (see the /nes/admin/reload route),
+`static_data_status()` reports their state and `static_data_reloads()`
+changes with every reload (conditional.py puts it in ETags).
+"""
+
+_config = get_config()
+CHECK_SECONDS = _config['STATIC_DATA_CHECK_MS'] / 1000
+
+T = TypeVar('T')
+
+Signature = Tuple[int, int, int]
+
+
+class ReloadableFile(Generic[T]):
+    def __init__(self, path: str, build: Callable[[str], T], check_seconds: float = CHECK_SECONDS):
+        self.path = path
+        self._build = build
+        self._check_seconds = check_seconds
+        # (signature, value), replaced as one reference
+        self._current: Optional[Tuple[Signature, T]] = None
+        self._next_check = 0.0
+        self._failed_signature: Optional[Signature] = None
+        self._rebuilding = False
+        # guards `_rebuilding`; only ever held for a few instructions
+        self._state_lock = threading.Lock()
+        # serialises builds, so a forced reload and a background rebuild never race
+        self._build_lock = threading.Lock()
+        self.generation = 0
+        self.last_error: Optional[str] = None
+
+    def _signature(self) -> Signature:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _publish(self, signature: Signature, value: T) -> None:
+        self._current = (signature, value)
+        self.generation += 1
+        self.last_error = None
+        self._failed_signature = None
+
+    def get(self) -> T:
+        """
+        Return the current value, building it on first use. Raises whatever
+        the first build raises (FileNotFoundError if the file is missing).
+        """
+        current = self._current
+        if current is None:
+            with self._build_lock:
+                if self._current is None:
+                    # stat before reading so a write that lands mid-build is picked up later
+                    signature = self._signature()
+                    self._publish(signature, self._build(self.path))
+                return self._current[1]
+
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self._check_seconds
+            self._check(current[0])
+        return current[1]
+
+    def _check(self, signature: Signature) -> None:
+        try:
+            latest = self._signature()
+        except OSError:
+            # missing for a moment (being replaced): keep serving the old value
+            return
+        if latest == signature or latest == self._failed_signature:
+            return
+        with self._state_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name=f"reload-{os.path.basename(self.path)}", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        try:
+            with self._build_lock:
+                signature = None
+                try:
+                    signature = self._signature()
+                    self._publish(signature, self._build(self.path))
+                except Exception as e:
+                    self._failed_signature = signature
+                    self.last_error = str(e)
+        finally:
+            with self._state_lock:
+                self._rebuilding = False
+
+    def reload(self) -> None:
+        """Rebuild now, whether or not the file changed. Raises if the build fails, keeping the old value."""
+        with self._build_lock:
+            signature = self._signature()
+            try:
+                value = self._build(self.path)
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            self._publish(signature, value)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "loaded": self._current is not None,
+            "generation": self.generation,
+            "error": self.last_error,
+        }
+
+
+_REGISTRY: Dict[str, ReloadableFile] = {}
+
+
+def reloadable_file(name: str, path: str, build: Callable[[str], T]) -> ReloadableFile[T]:
+    """Create a `ReloadableFile` for `path` and register it under `name`."""
+    reloadable: ReloadableFile[T] = ReloadableFile(path, build)
+    _REGISTRY[name] = reloadable
+    return reloadable
+
+
+def static_data_status() -> Dict[str, Dict[str, Any]]:
+    """State of every registered file, by name."""
+    return {name: reloadable.status() for name, reloadable in _REGISTRY.items()}
+
+
+def static_data_reloads() -> List[int]:
+    """
+    How many times each registered file was rebuilt after its first load. The
+    first load does not count, so a value taken before it is still current.
+    """
+    return [max(0, reloadable.generation - 1) for reloadable in _REGISTRY.values()]
+
+
+def reload_static_data() -> Tuple[Any, int]:
+    """
+    Rebuild every registered file now, as /nes/admin/reload does.
+
+    Returns ({"reloaded": {name: status, ...}}, 200), or an error message and
+    500 naming the files that failed to rebuild (those keep serving their
+    previous value).
+    """
+    failed = []
+    for name, reloadable in _REGISTRY.items():
+        try:
+            reloadable.reload()
+        except Exception as e:
+            failed.append(f"{name}: {e}")
+    if failed:
+        return (f"Failed to reload {'; '.join(failed)}", 500)
+    return ({"reloaded": static_data_status()}, 200)
+
+
+__all__ = [
+    "CHECK_SECONDS",
+    "ReloadableFile",
+    "reloadable_file",
+    "static_data_status",
+    "static_data_reloads",
+    "reload_static_data",
+]
@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+import numpy as np
+from .config import get_config
+from .binary_snapshot import load_binary_snapshot
+from .delta_snapshot import KEYFRAME_FILENAME, DeltaSnapshotReader
+from api.utils import fastjson
+
+"""
+RAM snapshot service.
+
+The Lua daemon rewrites the RAM snapshot on the RAMdisk once per tick. Every
+module that needs RAM values (read, names, order) shares the single
+process-wide `RamSnapshotCache` exposed through `get_ram_snapshot()`, which only
+re-loads the file when its (mtime, size, inode) signature changes. Between
+daemon ticks a read therefore costs one `os.stat` and no file I/O.
+
+Three on-disk formats are supported, selected by RAM_SNAPSHOT_FORMAT:
+- "json":   ram_contents.json, an object of address -> "0xNN" strings
+- "binary": ram_snapshot.bin, memory-mapped (see binary_snapshot.py)
+- "delta":  ram_keyframe.json plus ram_deltas.log, applied incrementally
+            (see delta_snapshot.py)
+
+All are exposed through the same mapping interface, so callers do not need
+to know which one the daemon is writing.
+
+Each loaded snapshot is tagged with a monotonically increasing `version` so
+callers can tell whether two reads saw the same game state. Listeners added
+with `add_snapshot_listener()` are called with every new snapshot as it is
+loaded (see history.py and watch.py); `start_snapshot_poller()` keeps loading
+them every RAM_SNAPSHOT_POLL_MS when nothing else is reading.
+"""
+
+_config = get_config()
+_RAMDISK_DIR = _config['RAMDISK_DIR']
+RAM_SNAPSHOT_FORMAT = _config['RAM_SNAPSHOT_FORMAT']
+RAM_CONTENTS_FILENAMES = {
+    "json": "ram_contents.json",
+    "binary": "ram_snapshot.bin",
+    "delta": KEYFRAME_FILENAME,
+}
+RAM_CONTENTS_FILENAME = RAM_CONTENTS_FILENAMES[RAM_SNAPSHOT_FORMAT]
+RAM_CONTENTS_PATH = _RAMDISK_DIR + RAM_CONTENTS_FILENAME
+# versions whose daemon sequence number the delta cache remembers for `changed_since`
+_SEQUENCES_KEPT = max(1, _config['RAM_HISTORY_SIZE'])
+
+
+class JsonRamContents(dict):
+    """
+    The dict parsed from ram_contents.json, with the same `byte()` accessor as
+    `BinaryRamContents` so callers can fetch integers from either format.
+    """
+    sequence: Optional[int] = None
+    frame: Optional[int] = None
+
+    def byte(self, address: str) -> Optional[int]:
+        """
+        Return the raw byte at `address`, or None if it was not captured.
+        Raises ValueError if the stored value is not a hex string or integer.
+        """
+        raw = self.get(address)
+        if raw is None:
+            return None
+        return int(raw, 16) if isinstance(raw, str) else int(raw)
+
+    def gather(self, addresses: np.ndarray) -> np.ndarray:
+        """
+        Return the raw bytes at the integer `addresses` as an int32 array, with
+        -1 for addresses that are missing or not valid hex values.
+
+        The hex strings are parsed once per snapshot into a dense array on the
+        first call; later calls are a single fancy-indexing pass.
+        """
+        dense = self.__dict__.get('_dense')
+        if dense is None:
+            dense = np.full(0x10000, -1, dtype=np.int32)
+            for address, raw in self.items():
+                try:
+                    addr = int(address, 16)
+                    value = int(raw, 16) if isinstance(raw, str) else int(raw)
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= addr < 0x10000:
+                    dense[addr] = value
+            self.__dict__['_dense'] = dense
+
+        raw = np.full(len(addresses), -1, dtype=np.int32)
+        inside = (addresses >= 0) & (addresses < 0x10000)
+        raw[inside] = dense[addresses[inside]]
+        return raw
+
+
+def load_json_snapshot(path: str) -> JsonRamContents:
+    with open(path, 'rb') as f:
+        return JsonRamContents(fastjson.load(f))
+
+
+_SNAPSHOT_LOADERS: Dict[str, Callable[[str], Mapping[str, Any]]] = {
+    "json": load_json_snapshot,
+    "binary": load_binary_snapshot,
+}
+
+
+def _notify(listeners: List[Callable[["RamSnapshot"], None]], snapshot: "RamSnapshot") -> None:
+    for listener in listeners:
+        try:
+            listener(snapshot)
+        except Exception:
+            # a broken listener must never fail the read that loaded the snapshot
+            continue
+
+
+class RamSnapshot(NamedTuple):
+    """
+    An immutable view of one loaded RAM snapshot.
+
+    `contents` maps address strings to hex value strings, exactly as written by
+    the daemon (e.g. {"0x00001C": "0x41"}), and offers `byte(address)` and
+    `gather(int_addresses)` for raw integers. It is shared between all callers and must not be mutated.
+    `frame` is the emulator frame counter when the format records one.
+    """
+    version: int
+    contents: Mapping[str, str]
+    frame: Optional[int] = None
+
+
+class RamSnapshotCache:
+    """
+    Change-aware loader for a RAM snapshot file.
+
+    `get()` returns the cached snapshot while the file signature is unchanged
+    and reloads it (bumping the version) otherwise. Safe to call from multiple
+    threads; concurrent callers that race a reload share the same result.
+    """
+    def __init__(self, path: str, loader: Callable[[str], Mapping[str, Any]] = load_json_snapshot):
+        self._path = path
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._version = 0
+        # (file signature, snapshot), replaced as one reference so the lock-free
+        # fast path never pairs one snapshot with another's signature
+        self._current: Optional[Tuple[Tuple[int, int, int], RamSnapshot]] = None
+        self._listeners: List[Callable[[RamSnapshot], None]] = []
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def add_listener(self, listener: Callable[[RamSnapshot], None]) -> None:
+        """Call `listener` with each new snapshot, under the cache lock, as it is loaded."""
+        self._listeners.append(listener)
+
+    def _stat_signature(self) -> Tuple[int, int, int]:
+        st = os.stat(self._path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self) -> RamSnapshot:
+        # stat before reading so a write that lands mid-parse changes the
+        # signature and is picked up by the next call
+        signature = self._stat_signature()
+
+        current = self._current
+        if current is not None and signature == current[0]:
+            return current[1]
+
+        with self._lock:
+            current = self._current
+            if current is not None and signature == current[0]:
+                return current[1]
+
+            contents = self._loader(self._path)
+
+            self._version += 1
+            snapshot = RamSnapshot(
+                version=self._version,
+                contents=contents,
+                frame=getattr(contents, 'frame', None),
+            )
+            self._current = (signature, snapshot)
+            _notify(self._listeners, snapshot)
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Force the next `get()` to re-read the file."""
+        with self._lock:
+            self._current = None
+
+
+class DeltaSnapshotCache:
+    """
+    Snapshot cache for the delta format.
+
+    Same interface as `RamSnapshotCache`, but instead of re-loading a whole
+    file it applies the daemon's delta log to the previous snapshot, and only
+    bumps the version when a value actually changed.
+    """
+    def __init__(self, ramdisk_dir: str):
+        self._reader = DeltaSnapshotReader(ramdisk_dir, JsonRamContents)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[RamSnapshot] = None
+        # daemon sequence number each of the last _SEQUENCES_KEPT versions was taken at
+        self._sequences: 'OrderedDict[int, int]' = OrderedDict()
+        self._listeners: List[Callable[[RamSnapshot], None]] = []
+
+    @property
+    def path(self) -> str:
+        return self._reader.keyframe_path
+
+    def add_listener(self, listener: Callable[[RamSnapshot], None]) -> None:
+        """Call `listener` with each new snapshot, under the cache lock, as it is loaded."""
+        self._listeners.append(listener)
+
+    def get(self) -> RamSnapshot:
+        with self._lock:
+            changed = self._reader.refresh()
+            if self._snapshot is None or changed:
+                contents = self._reader.contents
+                contents.sequence = self._reader.sequence
+                contents.frame = self._reader.frame
+                self._version += 1
+                self._sequences[self._version] = self._reader.sequence
+                if len(self._sequences) > _SEQUENCES_KEPT:
+                    # an older version is answered as one this cache never issued
+                    self._sequences.popitem(last=False)
+                self._snapshot = RamSnapshot(version=self._version, contents=contents, frame=self._reader.frame)
+                _notify(self._listeners, self._snapshot)
+            return self._snapshot
+
+    def changed_since(self, version: int) -> List[str]:
+        """
+        Addresses whose value changed after snapshot `version` was taken.
+        Every tracked address is reported for a version this cache never issued
+        or no longer remembers (older than the last RAM_HISTORY_SIZE).
+        """
+        with self._lock:
+            sequence = self._sequences.get(version, -1)
+            return self._reader.changed_since(sequence)
+
+    def invalidate(self) -> None:
+        """Force the next `get()` to reload the keyframe."""
+        with self._lock:
+            self._reader.reset()
+            self._snapshot = None
+
+
+def create_snapshot_cache(snapshot_format: str, ramdisk_dir: str):
+    """Build a cache for the given format ("json", "binary" or "delta") under `ramdisk_dir`."""
+    if snapshot_format == "delta":
+        return DeltaSnapshotCache(ramdisk_dir)
+    path = ramdisk_dir + RAM_CONTENTS_FILENAMES[snapshot_format]
+    return RamSnapshotCache(path, _SNAPSHOT_LOADERS[snapshot_format])
+
+
+_SNAPSHOT_CACHE = create_snapshot_cache(RAM_SNAPSHOT_FORMAT, _RAMDISK_DIR)
+
+
+def get_ram_snapshot() -> RamSnapshot:
+    """
+    Return the current RAM snapshot, reloading it only if the file changed
+    since the previous call.
+
+    Raises FileNotFoundError if the file is missing and ValueError if it is
+    empty, mid-write or otherwise malformed.
+    """
+    return _SNAPSHOT_CACHE.get()
+
+
+def add_snapshot_listener(listener: Callable[[RamSnapshot], None]) -> None:
+    """Call `listener` with every snapshot the shared cache loads from now on."""
+    _SNAPSHOT_CACHE.add_listener(listener)
+
+
+_POLL_SECONDS = _config['RAM_SNAPSHOT_POLL_MS'] / 1000
+_POLLER: Optional[threading.Thread] = None
+_POLLER_LOCK = threading.Lock()
+
+
+def _poll_snapshots() -> None:
+    while True:
+        try:
+            # new snapshots reach the listeners from inside get()
+            _SNAPSHOT_CACHE.get()
+        except Exception:
+            # no snapshot yet, or caught mid-write: try again next interval
+            pass
+        time.sleep(_POLL_SECONDS)
+
+
+def start_snapshot_poller() -> None:
+    """Load new snapshots in a background thread (once per process) so listeners see every tick."""
+    global _POLLER
+    with _POLLER_LOCK:
+        if _POLLER is None:
+            _POLLER = threading.Thread(target=_poll_snapshots, name="ram-snapshot-poller", daemon=True)
+            _POLLER.start()
+
+
+__all__ = [
+    "RAM_SNAPSHOT_FORMAT",
+    "RAM_CONTENTS_FILENAME",
+    "RAM_CONTENTS_PATH",
+    "JsonRamContents",
+    "RamSnapshot",
+    "RamSnapshotCache",
+    "DeltaSnapshotCache",
+    "create_snapshot_cache",
+    "get_ram_snapshot",
+    "add_snapshot_listener",
+    "start_snapshot_poller",
+    "load_json_snapshot",
+]
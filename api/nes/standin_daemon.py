@@ -0,0 +1,385 @@
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from .binary_snapshot import SNAPSHOT_MAGIC, SNAPSHOT_REGIONS, load_binary_snapshot, write_binary_snapshot
+from .delta_snapshot import DELTA_KEYFRAME_INTERVAL, DeltaSnapshotWriter
+from .command_queue import ACK_FILENAME, QUEUE_FILENAME
+from .cadence import CADENCE_FILENAME
+
+from api.utils.console import print_to_console
+from api.utils import fastjson
+
+"""
+Pure-Python stand-in for scripts/lua/main_daemon.lua.
+
+Keeps a 64KB bytearray in place of the NES address space and speaks the same
+RAMdisk protocol as the Lua daemon, so the NES API, the LangChain tools and
+the benchmarks can run end to end without FCEUX:
+
+- advances `fps` frames per second (0 runs unthrottled) and ticks once every
+  `cadence` frames, following daemon_cadence.txt exactly like the daemon does
+- each tick drains command_queue.log, writes a json, binary or delta
+  snapshot, then acknowledges the applied commands in command_ack.txt
+- "call" records run Python ports of scripts/lua/procedures.lua; "script"
+  records are scanned for `memory.writebyte(address, value)` calls, which is
+  everything the NES API itself generates. Any other Lua is not emulated and
+  is reported once per record.
+
+RAM is seeded from a fixture (`load_ram_fixture`) and can be driven by a
+recorded trace of writes (`load_trace`), replayed by frame number.
+"""
+
+# the Lua daemon's EXECUTION_CADENCE and CADENCE_POLL_FRAMES
+DEFAULT_CADENCE = 60
+CADENCE_POLL_FRAMES = 15
+DEFAULT_FPS = 60.0
+RAM_SIZE = 0x10000
+
+_RECORD_HEADER = re.compile(r"--\[\[ffbot:record seq=(\d+) kind=(\w+)\]\]\n")
+_NUMBER = r"(0[xX][0-9A-Fa-f]+|-?\d+)"
+_WRITEBYTE = re.compile(r"memory\.writebyte\(\s*" + _NUMBER + r"\s*,\s*" + _NUMBER + r"\s*\)")
+_LUA_COMMENT = re.compile(r"--[^\n]*")
+
+# one trace step: frame number and {address: value} writes applied on that frame
+TraceStep = Tuple[int, Dict[int, int]]
+
+
+def _parse_number(text: str) -> int:
+    return int(text, 16) if text.lower().startswith('0x') else int(text)
+
+
+def load_ram_fixture(path: str) -> bytearray:
+    """
+    Load 64KB of RAM from `path`, which may be:
+    - a raw dump of exactly 64KB
+    - a binary snapshot (ram_snapshot.bin)
+    - a ram_contents.json style object, or a delta keyframe ({"ram": {...}})
+    Addresses the fixture does not cover are zero.
+    """
+    ram = bytearray(RAM_SIZE)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) == RAM_SIZE and not data.lstrip().startswith(b'{'):
+        ram[:] = data
+        return ram
+    if data.startswith(SNAPSHOT_MAGIC):
+        snapshot = load_binary_snapshot(path)
+        for base, length in SNAPSHOT_REGIONS:
+            raw = snapshot.gather(np.arange(base, base + length))
+            ram[base:base + length] = np.where(raw < 0, 0, raw).astype(np.uint8).tobytes()
+        return ram
+
+    contents = fastjson.loads(data)
+    if isinstance(contents.get('ram'), dict):
+        contents = contents['ram']
+    for address, value in contents.items():
+        ram[_parse_number(address)] = (_parse_number(value) if isinstance(value, str) else int(value)) & 0xFF
+    return ram
+
+
+def load_trace(path: str) -> List[TraceStep]:
+    """
+    Load a recorded trace: one JSON object per line,
+        {"frame": 120, "writes": {"0x006110": 10, "0x006BE4": "0xFF"}}
+    returned sorted by frame.
+    """
+    steps: List[TraceStep] = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            step = fastjson.loads(line)
+            writes = {
+                _parse_number(address): (_parse_number(value) if isinstance(value, str) else int(value)) & 0xFF
+                for address, value in step.get('writes', {}).items()
+            }
+            steps.append((int(step['frame']), writes))
+    steps.sort(key=lambda step: step[0])
+    return steps
+
+
+def catalog_addresses(ram_catalog: Mapping) -> List[str]:
+    """Unique catalog addresses in catalog order, as the daemon snapshots them."""
+    return list(dict.fromkeys(entry['address'] for entry in ram_catalog['catalog']))
+
+
+class StandinDaemon:
+    """
+    Emulates the Lua daemon over `ramdisk_dir`.
+
+    `addresses` are the catalog addresses written to json and delta
+    snapshots. `trace` steps are applied on their frame number; with
+    `loop_trace` the trace repeats once its last frame has passed.
+    """
+    def __init__(
+        self,
+        ramdisk_dir: str,
+        addresses: Sequence[str],
+        snapshot_format: str = "json",
+        ram: Optional[bytearray] = None,
+        trace: Optional[List[TraceStep]] = None,
+        loop_trace: bool = True,
+        fps: float = DEFAULT_FPS,
+        cadence: int = DEFAULT_CADENCE,
+        keyframe_interval: int = DELTA_KEYFRAME_INTERVAL,
+    ):
+        if snapshot_format not in ("json", "binary", "delta"):
+            raise ValueError(f"unsupported snapshot format: {snapshot_format}")
+        self.ramdisk_dir = ramdisk_dir
+        self.addresses = list(addresses)
+        self._address_ints = [int(address, 16) for address in self.addresses]
+        self.snapshot_format = snapshot_format
+        self.ram = ram if ram is not None else bytearray(RAM_SIZE)
+        self.fps = fps
+        self.default_cadence = cadence
+        self.cadence = cadence
+        # frame number -> writes, merged when a trace repeats a frame
+        self._trace: Dict[int, Dict[int, int]] = {}
+        for step_frame, writes in trace or []:
+            self._trace.setdefault(step_frame, {}).update(writes)
+        self._trace_period = (max(self._trace) + 1) if (self._trace and loop_trace) else None
+        self._delta_writer = DeltaSnapshotWriter(ramdisk_dir, self.addresses, keyframe_interval) if snapshot_format == "delta" else None
+
+        self.frame = 0
+        self.sequence = 0
+        self.last_command_sequence = 0
+        self._acknowledged_sequence = 0
+        self._frame_count = 0
+        self._cadence_poll_count = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.procedures: Dict[str, Callable[..., None]] = {
+            "write_bytes": self._write_bytes,
+            "set_hp": self._set_hp,
+            "heal_party": self._heal_party,
+            "give_item": self._give_item,
+            "copy_block": self._copy_block,
+            "swap_blocks": self._swap_blocks,
+            "permute_blocks": self._permute_blocks,
+        }
+
+    # -- procedures (ports of scripts/lua/procedures.lua) ------------------
+
+    def _write_bytes(self, addresses: List[int], values: List[int]) -> None:
+        for address, value in zip(addresses, values):
+            self.ram[address] = value & 0xFF
+
+    def _character_base(self, slot: int) -> int:
+        return 0x6100 + (slot - 1) * 64
+
+    def _set_hp(self, slot: int, hp: int) -> None:
+        base = self._character_base(slot)
+        self.ram[base + 0x0A] = hp % 256
+        self.ram[base + 0x0B] = (hp // 256) % 256
+
+    def _heal_party(self) -> None:
+        for slot in range(1, 5):
+            base = self._character_base(slot)
+            # status bits 0x01 (dead) and 0x02 (stone) aren't cured by HP
+            if self.ram[base + 0x01] % 4 == 0:
+                self.ram[base + 0x0A:base + 0x0C] = self.ram[base + 0x0C:base + 0x0E]
+
+    def _give_item(self, address: int, count: int, cap: int) -> None:
+        self.ram[address] = max(0, min(cap, self.ram[address] + count))
+
+    def _copy_block(self, src: int, dst: int, length: int) -> None:
+        self.ram[dst:dst + length] = self.ram[src:src + length]
+
+    def _swap_blocks(self, a: int, b: int, length: int) -> None:
+        block_a = self.ram[a:a + length]
+        self.ram[a:a + length] = self.ram[b:b + length]
+        self.ram[b:b + length] = block_a
+
+    def _permute_blocks(self, bases: List[int], length: int, order: List[int]) -> None:
+        blocks = [self.ram[base:base + length] for base in bases]
+        for base, source in zip(bases, order):
+            self.ram[base:base + length] = blocks[source - 1]
+
+    # -- command queue -----------------------------------------------------
+
+    def _run_call(self, body: str) -> None:
+        tokens = body.split()
+        if not tokens:
+            raise ValueError("empty procedure call")
+        procedure = self.procedures.get(tokens[0])
+        if procedure is None:
+            raise ValueError(f"unknown procedure {tokens[0]}")
+        args = []
+        for token in tokens[1:]:
+            if ',' in token:
+                args.append([_parse_number(item) for item in token.split(',') if item])
+            else:
+                args.append(_parse_number(token))
+        procedure(*args)
+
+    def _run_script(self, body: str, sequence: int) -> None:
+        for address, value in _WRITEBYTE.findall(body):
+            self.ram[_parse_number(address)] = _parse_number(value) & 0xFF
+        rest = _LUA_COMMENT.sub('', _WRITEBYTE.sub('', body)).strip()
+        if rest:
+            print_to_console(f"Stand-in daemon: command {sequence} contains Lua that is not emulated", 'red')
+
+    def _run_command_file(self, path: str) -> None:
+        try:
+            with open(path, 'r') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return
+
+        position = 0
+        while True:
+            header = _RECORD_HEADER.search(text, position)
+            if header is None:
+                break
+            sequence = int(header.group(1))
+            end = text.find(f"--[[ffbot:end seq={sequence}]]", header.end())
+            if end < 0:
+                break  # record still being written
+
+            if sequence > self.last_command_sequence:
+                kind = header.group(2)
+                body = text[header.end():end]
+                try:
+                    if kind == "call":
+                        self._run_call(body)
+                    else:
+                        self._run_script(body, sequence)
+                except Exception as e:
+                    print_to_console(f"Stand-in daemon: command {sequence} ({kind}) failed: {e}", 'red')
+                self.last_command_sequence = sequence
+            position = end
+
+    def _drain_command_queue(self) -> None:
+        queue_path = self.ramdisk_dir + QUEUE_FILENAME
+        draining_path = self.ramdisk_dir + "command_queue.draining"
+
+        self._run_command_file(draining_path)
+        try:
+            os.remove(draining_path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            os.rename(queue_path, draining_path)
+        except FileNotFoundError:
+            return
+        self._run_command_file(draining_path)
+
+    def _write_command_ack(self) -> None:
+        if self.last_command_sequence == self._acknowledged_sequence:
+            return
+        ack_path = self.ramdisk_dir + ACK_FILENAME
+        with open(ack_path + '.tmp', 'w') as f:
+            f.write(str(self.last_command_sequence))
+        os.replace(ack_path + '.tmp', ack_path)
+        self._acknowledged_sequence = self.last_command_sequence
+
+    # -- snapshots -----------------------------------------------------------
+
+    def _write_snapshot(self) -> None:
+        if self.snapshot_format == "binary":
+            regions = [(base, bytes(self.ram[base:base + length])) for base, length in SNAPSHOT_REGIONS]
+            write_binary_snapshot(self.ramdisk_dir + "ram_snapshot.bin", regions, self.sequence, self.frame)
+        elif self.snapshot_format == "delta":
+            self._delta_writer.tick([self.ram[address] for address in self._address_ints], self.frame)
+        else:
+            path = self.ramdisk_dir + "ram_contents.json"
+            with open(path + '.tmp', 'w') as f:
+                f.write('{' + ','.join(
+                    '"%s": "0x%02X"' % (address, self.ram[value])
+                    for address, value in zip(self.addresses, self._address_ints)
+                ) + '}')
+            os.replace(path + '.tmp', path)
+
+    # -- frame loop ----------------------------------------------------------
+
+    def _read_cadence(self) -> int:
+        try:
+            with open(self.ramdisk_dir + CADENCE_FILENAME, 'r') as f:
+                fast, idle, fast_until = (int(field) for field in f.read().split()[:3])
+        except (FileNotFoundError, ValueError):
+            return self.default_cadence
+        return max(1, fast) if time.time() < fast_until else max(1, idle)
+
+    def _apply_trace(self) -> None:
+        if not self._trace:
+            return
+        frame = self.frame % self._trace_period if self._trace_period else self.frame
+        for address, value in self._trace.get(frame, {}).items():
+            self.ram[address] = value
+
+    def tick(self) -> None:
+        """Run one daemon tick: drain queued commands, snapshot, acknowledge."""
+        self.sequence += 1
+        self._drain_command_queue()
+        self._write_snapshot()
+        self._write_command_ack()
+
+    def step(self) -> bool:
+        """Advance one frame, ticking when the cadence is due. Returns True if it ticked."""
+        self._cadence_poll_count += 1
+        if self._cadence_poll_count >= CADENCE_POLL_FRAMES:
+            self._cadence_poll_count = 0
+            self.cadence = self._read_cadence()
+
+        ticked = False
+        if self._frame_count < self.cadence:
+            self._frame_count += 1
+        else:
+            self._frame_count = 0
+            self.tick()
+            ticked = True
+
+        self.frame += 1
+        self._apply_trace()
+        return ticked
+
+    def run(self, frames: Optional[int] = None) -> None:
+        """
+        Advance frames at `fps` (unthrottled if 0) until `frames` have run
+        or `stop()` is called.
+        """
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        next_frame = time.perf_counter()
+        count = 0
+        while not self._stop.is_set() and (frames is None or count < frames):
+            self.step()
+            count += 1
+            if interval:
+                next_frame += interval
+                delay = next_frame - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # fell behind (e.g. a slow tick): don't try to catch up in a burst
+                    next_frame = time.perf_counter()
+
+    def start(self) -> "StandinDaemon":
+        """Run the frame loop in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="standin-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+__all__ = [
+    "DEFAULT_CADENCE",
+    "DEFAULT_FPS",
+    "RAM_SIZE",
+    "StandinDaemon",
+    "catalog_addresses",
+    "load_ram_fixture",
+    "load_trace",
+]
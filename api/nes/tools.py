@@ -0,0 +1,405 @@
+import ast
+from typing import Any, Optional, Tuple
+from langchain.tools import tool
+from api.utils.console import print_to_console
+from api.utils import fastjson
+from .read import read_addresses
+from .write import write_addresses
+from .bestiary import get_monsters_by_location, get_locations_by_monster
+from .names import get_names
+from .layout import get_party, get_enemies
+from .zones import get_monsters_here
+from .order import order_party
+from .blocks import block_operation
+from .procedures import call_procedure
+from .history import history
+from .batch import run_batch
+
+"""
+LangChain tool wrappers for the NES API.
+
+Each tool accepts the JSON string an LLM provides, calls the plain function
+behind the matching /nes route and returns a JSON string result. They live
+apart from those functions so the NES API service never imports LangChain;
+only the LLM client imports this module.
+"""
+
+
+def _tool_error(message: Any) -> str:
+    """The JSON error string returned to the LLM, printed to the console in red."""
+    print_to_console('error = ' + str(message), 'red')
+    return fastjson.dumps({"error": str(message)})
+
+
+def _parse_tool_json(arg_str: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """
+    Parse the JSON an LLM passed to a tool, tolerating the usual quirks:
+    surrounding backticks or quotes, single-quoted strings and Python
+    literal syntax.
+
+    Returns (payload, None), or (None, error) where `error` is the JSON error
+    string to return from the tool.
+    """
+    if arg_str is None:
+        return (None, _tool_error("Missing arg_str"))
+
+    formatted = str(arg_str).strip()
+    # unwrap backticks (the LLM may format the input as code), then quotes, once each
+    if formatted.startswith('`') and formatted.endswith('`'):
+        formatted = formatted.strip('`').strip()
+    if (formatted.startswith('"') and formatted.endswith('"')) or (formatted.startswith("'") and formatted.endswith("'")):
+        formatted = formatted[1:-1].strip()
+
+    parse_errors = []
+    # normal JSON, then with single quotes as double quotes
+    for candidate in (formatted, formatted.replace("'", '"')):
+        try:
+            return (fastjson.loads(candidate), None)
+        except Exception as e:
+            parse_errors.append(f'json: {e}')
+    # as a last resort, Python dict/list syntax
+    try:
+        return (ast.literal_eval(formatted), None)
+    except Exception as e:
+        parse_errors.append(f'literal_eval: {e}')
+    return (None, _tool_error('failed to parse arg_str: ' + ' | '.join(parse_errors)))
+
+
+def _tool_result(result: Any, status: int) -> str:
+    if status != 200:
+        return _tool_error(result)
+    print_to_console('result = ' + fastjson.dumps(result))
+    return fastjson.dumps(result)
+
+
+@tool
+def read_addresses_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `read_addresses` that accepts a JSON string
+    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
+
+    Input example: '["0x006BE4","0x006BE5"]'
+    Integers and ranges are accepted too: '[28, "0x006102-0x006105"]'
+    To read back a write, pass its ticket:
+        '{"addresses": ["0x006BE4"], "min_version": 12}'
+    Output example: '{"addresses": {"0x006BE4": "Imp", "0x006BE5": ""}}'
+    """
+    print_to_console()
+    print_to_console('Calling read_addresses tool:', color='yellow')
+    print_to_console('arg_str = ' + arg_str)
+
+    # Parse addresses from the LLM-provided JSON string
+    try:
+        addresses = fastjson.loads(arg_str)
+    except Exception as e:
+        return _tool_error(e)
+
+    min_version = None
+    if isinstance(addresses, dict):
+        min_version = addresses.get('min_version')
+        addresses = addresses.get('addresses')
+
+    result, status = read_addresses(addresses, min_version)
+    return _tool_result(result, status)
+
+
+@tool
+def write_addresses_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `write_addresses` that accepts a JSON string (provided by LLM)
+    and returns a JSON string result (expected by the LLM).
+
+    Input example: '[{"0x006BE4": 50}, {"0x006BE5": 0}]'
+    """
+    print_to_console()
+    print_to_console('Calling write_addresses tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+
+    # Accept both formats:
+    # - A list of single-pair dicts: [{"0x006BE4": 50}, {"0x006BE5": 0}]
+    # - A single dict mapping addresses to values: {"0x006BE4": 50, "0x006BE5": 0}
+    # The underlying `write_addresses` already accepts either a dict or list, so
+    # pass the payload directly.
+    result, status = write_addresses(payload)
+    return _tool_result(result, status)
+
+
+@tool
+def get_monsters_by_location_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_monsters_by_location` that accepts a JSON string
+    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
+
+    Input examples:
+      '"(Some Location)"'
+      '{"location": "Castle of Ordeal 2F"}'
+      '{"locations": ["(4,4)", "marsh cave b2"]}'
+
+    Output examples:
+      '{"monsters": ["Imp", "Goblin"], "location": "(castle_of_ordeal,2f)"}'
+      '{"monsters": {"(4,4)": ["Imp"], "marsh cave b2": ["Crawl"]},
+        "locations": {"(4,4)": "(4,4)", "marsh cave b2": "(marsh_cave,b2)"}}'
+    """
+    print_to_console()
+    print_to_console('Calling get_monsters_by_location tool:', color='yellow')
+    print_to_console('arg_str = ' + arg_str)
+
+    # Parse location from the LLM-provided JSON string
+    try:
+        parsed = fastjson.loads(arg_str)
+        if isinstance(parsed, dict) and 'location' in parsed:
+            location = parsed['location']
+        elif isinstance(parsed, dict) and 'locations' in parsed:
+            location = parsed['locations']
+        else:
+            # assume the parsed value itself is the location string
+            location = parsed
+    except Exception as e:
+        return _tool_error(f'Failed to parse tool input: {e}')
+
+    result, status = get_monsters_by_location(location)
+    return _tool_result(result, status)
+
+
+@tool
+def get_locations_by_monster_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_locations_by_monster` that accepts a JSON string
+    (as provided by the LLM) and returns a JSON string result (expected by the LLM).
+
+    Input examples:
+      '["Goblin","Imps"]'
+      '{"monsters": ["Goblin","Imps"]}'
+
+    Output example: '{"locations": {"Goblin": ["monster not found"], "Imp": ["(Loc2)"]},
+                      "matches": {"Goblin": [], "Imp": [{"monster": "Imp", "distance": 0}]}}'
+    """
+    print_to_console()
+    print_to_console('Calling get_locations_by_monster tool:', color='yellow')
+    print_to_console('arg_str = ' + arg_str)
+
+    try:
+        parsed = fastjson.loads(arg_str)
+        if isinstance(parsed, dict) and 'monsters' in parsed:
+            monsters = parsed['monsters']
+        else:
+            monsters = parsed
+    except Exception as e:
+        return _tool_error(f'Failed to parse tool input: {e}')
+
+    result, status = get_locations_by_monster(monsters)
+    return _tool_result(result, status)
+
+
+@tool
+def get_names_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_names` that accepts an optional JSON
+    string and returns a JSON string result.
+
+    Input examples:
+      '{}'
+      'null'
+
+    Output example: '{"character_1":"ABCD","character_2":"EFGH",...}'
+    """
+    print_to_console()
+    print_to_console('Calling get_names tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    # We don't require any specific input; just call get_names
+    try:
+        result, status = get_names()
+    except Exception as e:
+        return _tool_error(e)
+
+    return _tool_result(result, status)
+
+
+@tool
+def get_party_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_party`. No input is required.
+
+    Output example: '{"party": [{"slot": 1, "class": "Fighter", "name": "ABCD", "hp": 35, ...}, ...]}'
+    """
+    print_to_console()
+    print_to_console('Calling get_party tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    result, status = get_party()
+    return _tool_result(result, status)
+
+
+@tool
+def get_enemies_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_enemies`. No input is required.
+
+    Output example: '{"enemies": [{"slot": 1, "type": "Imp", "hp": 8, ...}, ...]}'
+    """
+    print_to_console()
+    print_to_console('Calling get_enemies tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    result, status = get_enemies()
+    return _tool_result(result, status)
+
+
+@tool
+def get_monsters_here_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `get_monsters_here`. No input is required.
+
+    Output example: '{"location": "(4,4)", "monsters": ["Imp", "GrImp", "Wolf", "Madpony"],
+                      "position": {"area": "outside on the overworld map", "transport": "on land", ...}}'
+    """
+    print_to_console()
+    print_to_console('Calling get_monsters_here tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    result, status = get_monsters_here()
+    return _tool_result(result, status)
+
+
+@tool
+def order_party_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `order_party` that accepts a JSON array like
+    "[2,4,3,1]" or a JSON object {"slot1":2,...} and returns a JSON string result.
+    """
+    print_to_console()
+    print_to_console('Calling order_party tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+
+    # Accept either a list [2,4,3,1] or object {"slot1":2,...}
+    try:
+        if isinstance(payload, list):
+            if len(payload) != 4:
+                return _tool_error("expected list of four slot integers")
+            s1, s2, s3, s4 = payload
+        elif isinstance(payload, dict):
+            s1 = int(payload.get('slot1'))
+            s2 = int(payload.get('slot2'))
+            s3 = int(payload.get('slot3'))
+            s4 = int(payload.get('slot4'))
+        else:
+            return _tool_error("unexpected arg format")
+    except Exception as e:
+        return _tool_error(f'invalid slot values: {e}')
+
+    result, status = order_party(s1, s2, s3, s4)
+    return _tool_result(result, status)
+
+
+@tool
+def block_operation_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `block_operation` that accepts a JSON object
+    string (provided by LLM) and returns a JSON string result.
+
+    Input example: '{"op": "swap", "a": "0x006100", "b": "0x006140", "length": 64}'
+    """
+    print_to_console()
+    print_to_console('Calling block_operation tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+
+    result, status = block_operation(payload)
+    return _tool_result(result, status)
+
+
+@tool
+def call_procedure_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `call_procedure` that accepts a JSON object
+    string (provided by LLM) and returns a JSON string result.
+
+    Input example: '{"name": "set_hp", "args": {"slot": 2, "hp": 150}}'
+    """
+    print_to_console()
+    print_to_console('Calling call_procedure tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+    if not isinstance(payload, dict):
+        return _tool_error("arg_str must be a JSON object")
+
+    result, status = call_procedure(payload.get('name'), payload.get('args'))
+    return _tool_result(result, status)
+
+
+@tool
+def history_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `history` that accepts a JSON object string
+    (provided by LLM) and returns a JSON string result.
+
+    Input example: '{"query": "stats", "addresses": ["0x00610A", "0x00610B"], "since_version": 40}'
+    """
+    print_to_console()
+    print_to_console('Calling history tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+
+    result, status = history(payload)
+    return _tool_result(result, status)
+
+
+@tool
+def batch_tool(arg_str: str) -> str:
+    """
+    LangChain tool wrapper around `run_batch` that accepts a JSON string
+    (provided by LLM): either a list of operations or an object with
+    "operations" (and optionally "min_version"). Returns a JSON string result.
+
+    Input example: '[{"op": "names"}, {"op": "read", "addresses": ["0x00610A", "0x00610B"]}]'
+    """
+    print_to_console()
+    print_to_console('Calling batch tool:', color='yellow')
+    print_to_console('arg_str = ' + str(arg_str))
+
+    payload, error = _parse_tool_json(arg_str)
+    if error is not None:
+        return error
+
+    min_version = None
+    if isinstance(payload, dict):
+        min_version = payload.get('min_version')
+        payload = payload.get('operations')
+
+    result, status = run_batch(payload, min_version)
+    return _tool_result(result, status)
+
+
+__all__ = [
+    "read_addresses_tool",
+    "write_addresses_tool",
+    "get_monsters_by_location_tool",
+    "get_locations_by_monster_tool",
+    "get_names_tool",
+    "get_party_tool",
+    "get_enemies_tool",
+    "get_monsters_here_tool",
+    "order_party_tool",
+    "block_operation_tool",
+    "call_procedure_tool",
+    "history_tool",
+    "batch_tool",
+]
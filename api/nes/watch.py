@@ -0,0 +1,395 @@
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from .catalog import COMPARISON_OPERATORS, CompiledCatalog
+from .snapshot import RamSnapshot, add_snapshot_listener, get_ram_snapshot, start_snapshot_poller
+from api.utils import fastjson
+
+"""
+RAM watches.
+
+Clients register predicates over catalog addresses instead of polling
+/nes/read. A watch combines its addresses into one value (raw byte x catalog
+weight, summed, as in history.py) and fires an event when:
+
+- mode "edge" (default): `value <op> target` becomes true, e.g.
+      {"addresses": ["0x00001C"], "op": "==", "value": "in battle"}
+      {"addresses": ["0x00610A", "0x00610B"], "op": "<", "value": 50}
+- mode "change": the value changes at all
+
+Every watch is evaluated once per new snapshot, from the snapshot cache
+listener, no matter how many clients follow it: registering a predicate that
+is already watched returns the existing watch. Events are fanned out to
+subscriber queues, which /nes/watch/events streams as server-sent events, so
+an idle client makes no requests at all.
+
+When ram_catalog.json is reloaded, the next snapshot or watch call re-maps
+every watch onto the new catalog by address (`WatchEngine.use_catalog`). A
+watch whose address is gone, or whose text target no longer has a lookup
+address to match, is removed and its subscribers get a last event with a
+"removed" reason instead of a value.
+"""
+
+# events buffered per subscriber before the oldest are dropped
+MAX_PENDING_EVENTS = 256
+# seconds between SSE keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15
+
+WATCH_MODES = ("edge", "change")
+
+
+def watch_key(addresses: List[str], mode: str, op: Optional[str], target: Any) -> Tuple:
+    # identical predicates share one watch
+    return (tuple(addresses), mode, op, fastjson.dumps(target))
+
+
+class Watch:
+    """One registered predicate and its state as of the last snapshot."""
+    def __init__(self, watch_id: int, addresses: List[str], rows: np.ndarray, mode: str, op: Optional[str], target: Any, matches: Optional[List[int]]):
+        self.id = watch_id
+        self.addresses = addresses
+        self.rows = rows
+        self.mode = mode
+        self.op = op
+        self.target = target
+        # raw bytes matching a text target, for single lookup address watches
+        self._matches = matches
+        self.value: Optional[int] = None
+        self.active: Optional[bool] = None
+        # number of registrations sharing this watch
+        self.references = 1
+
+    def remap(self, rows: np.ndarray, matches: Optional[List[int]]) -> None:
+        """Point the watch at its addresses' `rows` (and text `matches`) in a new catalog."""
+        self.rows = rows
+        self._matches = matches
+
+    @property
+    def key(self) -> Tuple:
+        return watch_key(self.addresses, self.mode, self.op, self.target)
+
+    def holds(self, value: int) -> bool:
+        if self._matches is not None:
+            found = value in self._matches
+            return found if self.op == '==' else not found
+        return bool(COMPARISON_OPERATORS[self.op](value, self.target))
+
+    def evaluate(self, value: int) -> bool:
+        """Update the state with this snapshot's value; return True if the watch fires."""
+        previous = self.value
+        self.value = value
+        if self.mode == "change":
+            return previous is not None and value != previous
+        was_active = self.active
+        self.active = self.holds(value)
+        return was_active is False and self.active
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "watch": self.id,
+            "addresses": self.addresses,
+            "mode": self.mode,
+            "op": self.op,
+            "value": self.target,
+            "current": self.value,
+            "active": self.active,
+        }
+
+
+class Subscription:
+    """A subscriber's queue of events, optionally limited to some watch ids."""
+    def __init__(self, engine: "WatchEngine", watch_ids: Optional[Set[int]]):
+        self._engine = engine
+        self.watch_ids = watch_ids
+        self._events: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                # a slow subscriber loses its oldest events, never blocks the snapshot loader
+                try:
+                    self._events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The next event, or None if `timeout` seconds pass first."""
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self._engine.unsubscribe(self)
+
+
+class WatchEngine:
+    """
+    Holds the registered watches for `catalog` and evaluates them against
+    each snapshot passed to `on_snapshot()`.
+    """
+    def __init__(self, catalog: CompiledCatalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._watches: Dict[int, Watch] = {}
+        self._by_key: Dict[Tuple, Watch] = {}
+        self._subscriptions: List[Subscription] = []
+        self._ids = itertools.count(1)
+        # union of every watch's rows, gathered once per snapshot
+        self._rows = np.zeros(0, dtype=np.intp)
+        self._positions: Dict[int, np.ndarray] = {}
+        self._last_snapshot: Optional[RamSnapshot] = None
+
+    def add(self, payload: Dict[str, Any]) -> Tuple[Any, int]:
+        """Register a watch (see module doc); an identical predicate shares the existing watch."""
+        if not isinstance(payload, dict):
+            return ("payload must be an object", 400)
+
+        addresses = payload.get('addresses')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if not isinstance(addresses, list) or not addresses or not all(isinstance(a, str) for a in addresses):
+            return ("addresses must be a non-empty list of address strings", 400)
+        rows = self.catalog.rows(addresses)
+        if (rows < 0).any():
+            missing = [a for a, row in zip(addresses, rows.tolist()) if row < 0]
+            return (f"Requested RAM addresses not found in ram_catalog.json: {missing}", 400)
+
+        mode = payload.get('mode', 'edge')
+        if mode not in WATCH_MODES:
+            return (f"mode must be one of: {', '.join(WATCH_MODES)}", 400)
+
+        op = None
+        target = None
+        matches = None
+        if mode == "edge":
+            op = payload.get('op', '==')
+            if not isinstance(op, str) or op not in COMPARISON_OPERATORS:
+                return (f"op must be one of: {', '.join(COMPARISON_OPERATORS)}", 400)
+            target = payload.get('value')
+            if isinstance(target, str):
+                matches = self.catalog.lookup_raw_values(int(rows[0]), target) if len(rows) == 1 else None
+                if matches is None:
+                    return ("a text value can only be matched against a single lookup address", 400)
+                if op not in ('==', '!='):
+                    return ("a text value can only be compared with == or !=", 400)
+            elif isinstance(target, bool) or not isinstance(target, (int, float)):
+                return ("value must be a number, or a lookup translation", 400)
+
+        with self._lock:
+            existing = self._by_key.get(watch_key(addresses, mode, op, target))
+            if existing is not None:
+                existing.references += 1
+                return (existing.describe(), 200)
+
+            watch = Watch(next(self._ids), addresses, rows, mode, op, target, matches)
+            self._watches[watch.id] = watch
+            self._by_key[watch.key] = watch
+            self._reindex()
+            # seed the state so the first event is a real transition
+            if self._last_snapshot is not None:
+                self._evaluate(watch, self._last_snapshot.contents.gather(self.catalog.offsets[rows]))
+            return (watch.describe(), 200)
+
+    def remove(self, watch_id: int) -> Tuple[Any, int]:
+        """Drop one registration of `watch_id`; the watch goes when none remain."""
+        with self._lock:
+            watch = self._watches.get(watch_id)
+            if watch is None:
+                return (f"No watch with id {watch_id}", 404)
+            watch.references -= 1
+            if watch.references <= 0:
+                del self._watches[watch_id]
+                del self._by_key[watch.key]
+                self._reindex()
+            return ({"message": f"Watch {watch_id} removed"}, 200)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [watch.describe() for watch in self._watches.values()]
+
+    def subscribe(self, watch_ids: Optional[Set[int]] = None) -> Subscription:
+        """Follow events from `watch_ids` (every watch if None)."""
+        subscription = Subscription(self, watch_ids)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def use_catalog(self, catalog: CompiledCatalog) -> None:
+        """
+        Re-map every watch onto `catalog` by address, removing the watches it
+        can no longer evaluate (see module doc). Does nothing for the current catalog.
+        """
+        if catalog is self.catalog:
+            return
+        with self._lock:
+            if catalog is self.catalog:
+                return
+            events = []
+            for watch in list(self._watches.values()):
+                rows = catalog.rows(watch.addresses)
+                if (rows < 0).any():
+                    missing = [a for a, row in zip(watch.addresses, rows.tolist()) if row < 0]
+                    reason = f"RAM addresses no longer in ram_catalog.json: {missing}"
+                else:
+                    matches = catalog.lookup_raw_values(int(rows[0]), watch.target) if isinstance(watch.target, str) else None
+                    if matches is not None or not isinstance(watch.target, str):
+                        watch.remap(rows, matches)
+                        continue
+                    reason = f"{watch.addresses[0]} is no longer a lookup address in ram_catalog.json"
+                del self._watches[watch.id]
+                del self._by_key[watch.key]
+                events.append({"watch": watch.id, "time": round(time.time(), 3), "removed": reason})
+            self.catalog = catalog
+            self._reindex()
+            self._publish(events)
+
+    def _publish(self, events: List[Dict[str, Any]]) -> None:
+        # caller holds the lock
+        for subscription in self._subscriptions:
+            for event in events:
+                if subscription.watch_ids is None or event["watch"] in subscription.watch_ids:
+                    subscription.put(event)
+
+    def _reindex(self) -> None:
+        # caller holds the lock
+        rows = sorted({int(row) for watch in self._watches.values() for row in watch.rows})
+        self._rows = np.array(rows, dtype=np.intp)
+        position_of = {row: i for i, row in enumerate(rows)}
+        self._positions = {
+            watch.id: np.array([position_of[int(row)] for row in watch.rows], dtype=np.intp)
+            for watch in self._watches.values()
+        }
+
+    def _evaluate(self, watch: Watch, raw: np.ndarray) -> bool:
+        value, valid = self.catalog.combine(watch.rows, raw)
+        if not valid:
+            return False
+        return watch.evaluate(int(value))
+
+    def on_snapshot(self, snapshot: RamSnapshot) -> None:
+        """Evaluate every watch against `snapshot` and queue events for subscribers."""
+        with self._lock:
+            self._last_snapshot = snapshot
+            if not self._watches:
+                return
+            raw = snapshot.contents.gather(self.catalog.offsets[self._rows])
+            events = []
+            for watch in self._watches.values():
+                if self._evaluate(watch, raw[self._positions[watch.id]]):
+                    events.append({
+                        "watch": watch.id,
+                        "version": snapshot.version,
+                        "frame": snapshot.frame,
+                        "time": round(time.time(), 3),
+                        "value": watch.value,
+                    })
+            self._publish(events)
+
+
+_ENGINE: Optional[WatchEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_watch_engine() -> WatchEngine:
+    """
+    Return the process-wide watch engine, creating it on first use: it is
+    subscribed to the snapshot cache and the snapshot poller is started. An
+    existing engine is first moved onto a reloaded ram_catalog.json.
+    """
+    global _ENGINE
+    # imported here: read.py owns the compiled catalog cache
+    from .read import _load_ram_catalog
+    catalog = _load_ram_catalog()
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.use_catalog(catalog)
+        else:
+            _ENGINE = WatchEngine(catalog)
+            add_snapshot_listener(_on_snapshot)
+            start_snapshot_poller()
+            try:
+                _ENGINE.on_snapshot(get_ram_snapshot())
+            except Exception:
+                # no snapshot yet; the poller delivers the first one
+                pass
+        return _ENGINE
+
+
+def _on_snapshot(snapshot: RamSnapshot) -> None:
+    # runs inside the snapshot cache, which `get_watch_engine()` may be waiting
+    # on while it holds _ENGINE_LOCK: use the engine directly
+    from .read import _load_ram_catalog
+    _ENGINE.use_catalog(_load_ram_catalog())
+    _ENGINE.on_snapshot(snapshot)
+
+
+def add_watch(payload: Dict[str, Any]) -> Tuple[Any, int]:
+    """Register a watch, as accepted by POST /nes/watch."""
+    try:
+        engine = get_watch_engine()
+    except Exception as e:
+        return (f"Error loading ram_catalog.json: {e}", 500)
+    return engine.add(payload)
+
+
+def remove_watch(watch_id: Any) -> Tuple[Any, int]:
+    """Unregister a watch, as accepted by DELETE /nes/watch/<id>."""
+    if isinstance(watch_id, bool) or not isinstance(watch_id, int):
+        return ("watch id must be an integer", 400)
+    try:
+        engine = get_watch_engine()
+    except Exception as e:
+        return (f"Error loading ram_catalog.json: {e}", 500)
+    return engine.remove(watch_id)
+
+
+def list_watches() -> Tuple[Any, int]:
+    try:
+        engine = get_watch_engine()
+    except Exception as e:
+        return (f"Error loading ram_catalog.json: {e}", 500)
+    return ({"watches": engine.list()}, 200)
+
+
+def watch_event_stream(watch_ids: Optional[Set[int]] = None) -> Iterator[str]:
+    """
+    Server-sent event stream of watch events (every watch if `watch_ids` is
+    None). Each event is sent as `event: watch` with a JSON `data` line;
+    a comment line is sent every KEEPALIVE_SECONDS while idle.
+    """
+    subscription = get_watch_engine().subscribe(watch_ids)
+    try:
+        yield "retry: 1000\n\n"
+        while True:
+            event = subscription.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: watch\ndata: {fastjson.dumps(event)}\n\n"
+    finally:
+        subscription.close()
+
+
+__all__ = [
+    "WATCH_MODES",
+    "Watch",
+    "WatchEngine",
+    "Subscription",
+    "get_watch_engine",
+    "add_watch",
+    "remove_watch",
+    "list_watches",
+    "watch_event_stream",
+]
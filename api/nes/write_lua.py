@@ -1,13 +1,11 @@
-from .config import get_config
 from api.utils.console import print_to_console
-
-config = get_config()
-FILENAME = config['RAMDISK_DIR'] + "execute.lua"
+from .command_queue import enqueue
 
 def write_lua_script(lua_script: str):
     """
-    Write a raw Lua script string to the RAM disk execute.lua file.
-    Returns tuple (message, status_code).
+    Queue a raw Lua script for the Lua daemon to run on its next tick
+    (see command_queue.py). Returns tuple (result, status_code); on success
+    result is {"message": ..., "ticket": N} (see `write_addresses`).
     """
     if not lua_script:
         return "Missing file content", 400
@@ -17,8 +15,7 @@ def write_lua_script(lua_script: str):
     print_to_console()
 
     try:
-        with open(FILENAME, 'w') as f:
-            f.write(lua_script)
-        return f"'{FILENAME}' written successfully", 200
+        ticket = enqueue("script", lua_script)
+        return {"message": "Lua script queued", "ticket": ticket}, 200
     except Exception as e:
-        return f"Error writing file: {e}", 500
+        return f"Error queueing script: {e}", 500
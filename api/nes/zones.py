@@ -0,0 +1,214 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from .bestiary import BestiaryIndex, _load_bestiary
+from .catalog import CompiledCatalog
+from .snapshot import RAM_CONTENTS_FILENAME, RAM_CONTENTS_PATH, RamSnapshot, get_ram_snapshot
+
+"""
+Bestiary zones.
+
+Answers "what monsters are around me?" from one RAM snapshot, without the
+LLM reading the position and working out the bestiary key itself. A
+`ZoneMap` holds precomputed arrays of bestiary location ids (-1 where the
+bestiary has no entry), built once from bestiary.json and the
+`dungeon_floor_code` lookup in ram_catalog.json, and rebuilt when either is
+reloaded:
+
+- `overworld`: one id per 32x32-tile cell of the 256x256 world map, [cell_y, cell_x]
+- `floors`:    one id per dungeon floor code (0x000048), by resolving the
+               floor's catalog name ("Marsh Cave, B1") to a bestiary key
+
+`get_monsters_here()` gathers the five position bytes in one pass and picks
+the zone in O(1):
+
+- inside a town, cave or dungeon (0x0000F8): `floors[floor code]`. Floor
+  codes the catalog's lookup map does not name (it has none for Mirage
+  Tower, Sky Castle or the past Temple of Fiends) are UNKNOWN_ZONE, and
+  answered with an error rather than "no monsters here"
+- outside in the airship: no random encounters
+- outside in the ship: "(ocean)"
+- outside in the canoe: "(canoe,north)" in cell rows 0-2, else "(canoe,south)"
+- outside otherwise: `overworld[y // 32, x // 32]`
+"""
+
+OVERWORLD_X_ADDRESS = "0x000027"
+OVERWORLD_Y_ADDRESS = "0x000028"
+TRANSPORT_ADDRESS = "0x000042"
+FLOOR_CODE_ADDRESS = "0x000048"
+OVERWORLD_FLAG_ADDRESS = "0x0000F8"
+POSITION_ADDRESSES = [
+    OVERWORLD_X_ADDRESS,
+    OVERWORLD_Y_ADDRESS,
+    TRANSPORT_ADDRESS,
+    FLOOR_CODE_ADDRESS,
+    OVERWORLD_FLAG_ADDRESS,
+]
+
+# raw values of the "overworld_flag" and "transport_type" lookups
+FLAG_INSIDE = 0x08
+TRANSPORT_CANOE = 0x02
+TRANSPORT_SHIP = 0x04
+TRANSPORT_AIRSHIP = 0x08
+
+CELL_TILES = 32
+GRID_CELLS = 8
+# the canoe's bestiary zone is "north" in cell rows 0 to 2
+CANOE_NORTH_MAX_CELL_Y = 2
+
+# catalog floor names whose bestiary key names the floor differently
+FLOOR_ALIASES: Dict[str, str] = {
+    "Titan's Tunnel, B1": "(titans_tunnel,1f)",
+}
+
+_NO_MONSTERS = ["no monsters here"]
+
+# zone id of a floor code missing from the `dungeon_floor_code` lookup map
+UNKNOWN_ZONE = -2
+
+
+class ZoneMap(NamedTuple):
+    keys: List[str]
+    overworld: np.ndarray
+    floors: np.ndarray
+    ocean: int
+    canoe_north: int
+    canoe_south: int
+
+
+def build_zone_map(index: BestiaryIndex, catalog: CompiledCatalog) -> ZoneMap:
+    """Precompute the zone arrays (see module doc) for `index` and `catalog`."""
+    keys = list(index.bestiary)
+    ids = {key: i for i, key in enumerate(keys)}
+
+    def key_id(location: Optional[str]) -> int:
+        key = index.location_index.lookup(location, exact=True) if location else None
+        return ids.get(key, -1)
+
+    overworld = np.full((GRID_CELLS, GRID_CELLS), -1, dtype=np.int16)
+    for cell_y in range(GRID_CELLS):
+        for cell_x in range(GRID_CELLS):
+            overworld[cell_y, cell_x] = key_id(f"({cell_x},{cell_y})")
+
+    floors = np.full(256, UNKNOWN_ZONE, dtype=np.int16)
+    row = catalog.index.get(FLOOR_CODE_ADDRESS)
+    if row is not None:
+        table = catalog.lookup_table(catalog.lookup_ids[row])
+        # codes the lookup map does not name translate to its default ("1F")
+        default = table[-1]
+        for code, name in enumerate(table[:256].tolist()):
+            if name != default:
+                floors[code] = key_id(FLOOR_ALIASES.get(name, name))
+
+    return ZoneMap(
+        keys=keys,
+        overworld=overworld,
+        floors=floors,
+        ocean=key_id("(ocean)"),
+        canoe_north=key_id("(canoe,north)"),
+        canoe_south=key_id("(canoe,south)"),
+    )
+
+
+# (bestiary index, catalog, zone map): rebuilt whenever either input is reloaded
+_ZONE_MAP_CACHE: Optional[Tuple[BestiaryIndex, CompiledCatalog, ZoneMap]] = None
+
+
+def _load_zone_map() -> Tuple[ZoneMap, CompiledCatalog, BestiaryIndex]:
+    """
+    Return the zone map with the compiled catalog and bestiary index it was
+    built from.
+
+    The zone map is cached for as long as the bestiary and catalog are: when
+    either is reloaded (see reloadable.py), the next call builds a new one.
+    """
+    # imported here: read.py owns the compiled catalog cache
+    from .read import _load_ram_catalog
+    catalog = _load_ram_catalog()
+    index = _load_bestiary()
+
+    global _ZONE_MAP_CACHE
+    cached = _ZONE_MAP_CACHE
+    if cached is not None and cached[0] is index and cached[1] is catalog:
+        return (cached[2], catalog, index)
+
+    zones = build_zone_map(index, catalog)
+    _ZONE_MAP_CACHE = (index, catalog, zones)
+    return (zones, catalog, index)
+
+
+def locate(zones: ZoneMap, x: int, y: int, transport: int, floor_code: int, flag: int) -> int:
+    """The bestiary location id for the raw position bytes, -1 or UNKNOWN_ZONE (see module doc)."""
+    if flag == FLAG_INSIDE:
+        return int(zones.floors[floor_code])
+    if transport == TRANSPORT_AIRSHIP:
+        return -1
+    if transport == TRANSPORT_SHIP:
+        return zones.ocean
+    cell_x, cell_y = x // CELL_TILES, y // CELL_TILES
+    if transport == TRANSPORT_CANOE:
+        return zones.canoe_north if cell_y <= CANOE_NORTH_MAX_CELL_Y else zones.canoe_south
+    return int(zones.overworld[cell_y, cell_x])
+
+
+def get_monsters_here(snapshot: Optional[RamSnapshot] = None) -> Tuple[Any, int]:
+    """
+    Return the monsters of the bestiary zone the party is in (from `snapshot`
+    if given, otherwise the current snapshot), as
+    ({"location": "(4,4)", "monsters": ["Imp", ...], "position": {...}}, 200).
+
+    `position` holds what the zone was chosen from: the decoded overworld flag
+    and transport, and the overworld x, y and cell outside or the floor inside.
+    `location` is None, with "no monsters here", where the bestiary has no
+    entry (towns, the airship). A floor code the catalog does not name is a
+    404, as its monsters cannot be known from RAM.
+    """
+    try:
+        zones, catalog, index = _load_zone_map()
+    except Exception as e:
+        # a missing file names its path
+        return (f"Error loading bestiary zones: {e}", 500)
+
+    try:
+        ram_contents = (snapshot or get_ram_snapshot()).contents
+    except FileNotFoundError:
+        return (f"{RAM_CONTENTS_FILENAME} not found at {RAM_CONTENTS_PATH}", 500)
+    except Exception as e:
+        return (f"Error loading {RAM_CONTENTS_FILENAME}: {e}", 500)
+
+    rows = catalog.rows(POSITION_ADDRESSES)
+    if (rows < 0).any():
+        missing = [a for a, row in zip(POSITION_ADDRESSES, rows.tolist()) if row < 0]
+        return (f"Position addresses not found in ram_catalog.json: {missing}", 500)
+    raw = ram_contents.gather(catalog.offsets[rows])
+    if (raw < 0).any():
+        return ("Game memory not in expected format. The party position is not available in the RAM snapshot.", 500)
+
+    x, y, transport, floor_code, flag = raw.tolist()
+    _, _, transport_name, floor_name, area = catalog.decode(rows, raw)
+
+    position: Dict[str, Any] = {"area": area, "transport": transport_name}
+    if flag == FLAG_INSIDE:
+        position["floor"] = floor_name
+    else:
+        position.update({"x": x, "y": y, "cell": [x // CELL_TILES, y // CELL_TILES]})
+
+    zone = locate(zones, x, y, transport, floor_code, flag)
+    if zone == UNKNOWN_ZONE:
+        return (
+            f"Unknown floor: dungeon floor code 0x{floor_code:02X} is not in ram_catalog.json, "
+            "so the bestiary location (and its monsters) cannot be determined from RAM",
+            404,
+        )
+    key = zones.keys[zone] if zone >= 0 else None
+    monsters = index.bestiary.get(key) if key is not None else None
+    return ({"location": key, "monsters": monsters or _NO_MONSTERS, "position": position}, 200)
+
+
+__all__ = [
+    "POSITION_ADDRESSES",
+    "UNKNOWN_ZONE",
+    "ZoneMap",
+    "build_zone_map",
+    "locate",
+    "get_monsters_here",
+]
@@ -0,0 +1,78 @@
+import json
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+"""
+Fast JSON backend shared by the NES and LLM APIs.
+
+Uses orjson when installed, else msgspec, else the standard library, so the
+fast path is optional. Every backend produces the same compact output
+(no spaces, UTF-8 rather than \\u escapes); anything a fast backend refuses
+to encode (e.g. integers beyond 64 bits) falls back to the standard library.
+
+- `loads(data)`:  parse str or bytes
+- `load(f)`:      parse an open file (binary mode is fastest)
+- `dumps(obj)`:   encode to str; `dumps_bytes(obj)` encodes to bytes
+- `BACKEND`:      name of the backend in use; `BACKENDS` holds every one
+                  available, for benchmarks
+"""
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys).encode('utf-8')
+
+
+# name -> (loads, dumps_bytes(obj, sort_keys)), fastest first
+BACKENDS: Dict[str, Tuple[Callable[[Any], Any], Callable[..., bytes]]] = {}
+
+if orjson is not None:
+    def _orjson_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+    BACKENDS['orjson'] = (orjson.loads, _orjson_dumps)
+
+if msgspec is not None:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_sorted_encoder = msgspec.json.Encoder(order='sorted')
+
+    def _msgspec_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return (_msgspec_sorted_encoder if sort_keys else _msgspec_encoder).encode(obj)
+
+    BACKENDS['msgspec'] = (_msgspec_decoder.decode, _msgspec_dumps)
+
+BACKENDS['json'] = (json.loads, _stdlib_dumps)
+
+BACKEND = next(iter(BACKENDS))
+# every backend's decode errors are ValueErrors, as with the stdlib
+loads, _dumps = BACKENDS[BACKEND]
+
+
+def load(f: Any) -> Any:
+    """Parse JSON from an open file."""
+    return loads(f.read())
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode `obj` as compact UTF-8 JSON."""
+    try:
+        return _dumps(obj, sort_keys)
+    except TypeError:
+        return _stdlib_dumps(obj, sort_keys)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Encode `obj` as a compact JSON string."""
+    return dumps_bytes(obj, sort_keys).decode('utf-8')
+
+
+__all__ = ["BACKEND", "BACKENDS", "loads", "load", "dumps", "dumps_bytes"]
@@ -0,0 +1,46 @@
+from typing import Any
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+from api.utils import fastjson
+
+"""
+Flask JSON provider backed by `api.utils.fastjson`.
+
+Request bodies (`request.get_json()`) are parsed and `jsonify` / dict
+responses are encoded by the fast backend. Pretty-printed output (debug
+mode) and values only Flask knows how to encode (dates, dataclasses, ...)
+go through Flask's default provider, so responses are unchanged apart from
+being produced faster.
+"""
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs.get('indent') is None:
+            try:
+                return fastjson.dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys))
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return fastjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = fastjson.dumps_bytes(obj, sort_keys=self.sort_keys)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def use_fast_json(app: Flask) -> Flask:
+    """Install `FastJSONProvider` on `app`."""
+    app.json = FastJSONProvider(app)
+    return app
+
+
+__all__ = ["FastJSONProvider", "use_fast_json"]
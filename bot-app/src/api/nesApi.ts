@@ -1,16 +1,30 @@
 // Utility for communicating with the NES emulator RAM
 import { RamContentsError, FlaskRamWriteError } from "../types/Error";
 
+// Last /nes/read result per request body, revalidated with If-None-Match so an
+// unchanged RAM snapshot costs the backend a 304 instead of a full read
+const ramReadCache = new Map<string, { etag: string; addresses: Record<string, string> }>();
+const RAM_READ_CACHE_SIZE = 32;
+
 export async function getRamValuesMap(addresses: string[]) {
   const port = import.meta.env.NES_API_PORT || '5000';
   const url = `http://localhost:${port}/nes/read`;
 
+  const body = JSON.stringify({ addresses });
+  const cached = ramReadCache.get(body);
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (cached) headers['If-None-Match'] = cached.etag;
+
   const response = await fetch(url, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ addresses }),
+    headers,
+    body,
   });
 
+  if (response.status === 304 && cached) {
+    return cached.addresses;
+  }
+
   if (!response.ok) {
     // Attempt to extract backend error message if provided
     let errMsg = 'Game memory not in expected format. Perhaps a RAM address I have been trained on is not available for lookup.';
@@ -26,7 +40,15 @@ export async function getRamValuesMap(addresses: string[]) {
   }
 
   const data = await response.json();
-  
+  const etag = response.headers.get('ETag');
+  if (etag) {
+    ramReadCache.delete(body);
+    if (ramReadCache.size >= RAM_READ_CACHE_SIZE) {
+      ramReadCache.delete(ramReadCache.keys().next().value as string);
+    }
+    ramReadCache.set(body, { etag, addresses: data.addresses });
+  }
+
   return data.addresses as Record<string, string>;
 }
 
@@ -74,6 +96,29 @@ export async function getMonstersByLocation(location: string) {
   return data.monsters as string[];
 }
 
+export async function getMonstersHere() {
+  const port = import.meta.env.NES_API_PORT || '5000';
+  const url = `http://localhost:${port}/nes/bestiary/here`;
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({}),
+  });
+
+  if (!response.ok) {
+    let errMsg = 'Failed to retrieve bestiary monsters for the current position.';
+    try {
+      const data = await response.json();
+      if (data && data.error) errMsg = data.error;
+    } catch (e) {}
+    throw new Error(errMsg);
+  }
+
+  const data = await response.json();
+  return data as { location: string | null; monsters: string[]; position: Record<string, any> };
+}
+
 export async function getLocationsByMonster(monsters: string[]) {
   const port = import.meta.env.NES_API_PORT || '5000';
   const url = `http://localhost:${port}/nes/bestiary/get-locations-by-monster`;
@@ -95,4 +140,84 @@ export async function getLocationsByMonster(monsters: string[]) {
 
   const data = await response.json();
   return data.locations as Record<string, string[]>;
-}
\ No newline at end of file
+}
+export type NesBatchOperation =
+  | { op: 'read'; addresses: string[] }
+  | { op: 'names' }
+  | { op: 'party' }
+  | { op: 'enemies'; include_empty?: boolean }
+  | { op: 'monsters_here' }
+  | { op: 'monsters_by_location'; location: string }
+  | { op: 'locations_by_monster'; monsters: string[] }
+  | { op: 'write'; addresses: Record<string, number | string>[] };
+
+export type NesBatchResult = { status: number; result?: any; error?: string };
+
+export async function runBatch(operations: NesBatchOperation[], minVersion?: number) {
+  const port = import.meta.env.NES_API_PORT || '5000';
+  const url = `http://localhost:${port}/nes/batch`;
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ operations, min_version: minVersion }),
+  });
+
+  if (!response.ok) {
+    let errMsg = 'Failed to run NES batch.';
+    try {
+      const data = await response.json();
+      if (data && data.error) errMsg = data.error;
+    } catch (e) {}
+    throw new Error(errMsg);
+  }
+
+  const data = await response.json();
+  return data as { snapshot_version: number | null; results: NesBatchResult[] };
+}
+
+export async function getParty() {
+  const port = import.meta.env.NES_API_PORT || '5000';
+  const url = `http://localhost:${port}/nes/party`;
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({}),
+  });
+
+  if (!response.ok) {
+    let errMsg = 'Failed to retrieve party.';
+    try {
+      const data = await response.json();
+      if (data && data.error) errMsg = data.error;
+    } catch (e) {}
+    throw new Error(errMsg);
+  }
+
+  const data = await response.json();
+  return data.party as Record<string, any>[];
+}
+
+export async function getEnemies(includeEmpty = false) {
+  const port = import.meta.env.NES_API_PORT || '5000';
+  const url = `http://localhost:${port}/nes/enemies`;
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ include_empty: includeEmpty }),
+  });
+
+  if (!response.ok) {
+    let errMsg = 'Failed to retrieve enemies.';
+    try {
+      const data = await response.json();
+      if (data && data.error) errMsg = data.error;
+    } catch (e) {}
+    throw new Error(errMsg);
+  }
+
+  const data = await response.json();
+  return data.enemies as Record<string, any>[];
+}
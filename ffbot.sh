@@ -19,11 +19,16 @@ sudo umount --quiet $RAMDISK_DIR
 sudo mount -t tmpfs -o size=$RAMDISK_SIZE tmpfs $RAMDISK_DIR
 
 # set up RAMdisk initial state
-touch $RAMDISK_DIR/execute.lua
 touch $RAMDISK_DIR/ram_contents.json
 cp data/ram_catalog.json $RAMDISK_DIR/ram_catalog.json
 cp data/bestiary.json $RAMDISK_DIR/bestiary.json
 
+# compile the RAM catalog into the LUA module the daemon uses to write ram_contents.json
+python scripts/python/compile_lua_catalog.py data/ram_catalog.json $RAMDISK_DIR/ram_catalog.lua
+
+# compile the RAM catalog and bestiary, with their indexes, into the binary artifacts the APIs memory-map
+python scripts/python/compile_static_data.py $RAMDISK_DIR
+
 # load python NES Flask app in background process (registers all /nes routes)
 python -m api.nes.app &
 PYTHON_PID=$!
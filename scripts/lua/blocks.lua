@@ -0,0 +1,47 @@
+-- Block memory operations, loaded once by main_daemon.lua and exposed to
+-- queued commands as FFBOT.blocks (see api/nes/blocks.py). Every operation
+-- reads all of its source bytes before writing any, so overlapping blocks
+-- behave like memmove and a whole operation lands within a single frame.
+
+local M = {}
+
+local function read_block(base, length)
+    local bytes = memory.readbyterange(base, length)
+    local block = {}
+    for i = 1, length do
+        block[i] = string.byte(bytes, i)
+    end
+    return block
+end
+
+local function write_block(base, block)
+    for i = 1, #block do
+        memory.writebyte(base + i - 1, block[i])
+    end
+end
+
+-- copy `length` bytes from `src` to `dst`
+function M.copy(src, dst, length)
+    write_block(dst, read_block(src, length))
+end
+
+-- exchange the `length` byte blocks at `a` and `b`
+function M.swap(a, b, length)
+    local block_a = read_block(a, length)
+    local block_b = read_block(b, length)
+    write_block(a, block_b)
+    write_block(b, block_a)
+end
+
+-- rearrange the `length` byte blocks at `bases`: block order[i] moves to bases[i]
+function M.permute(bases, length, order)
+    local blocks = {}
+    for i = 1, #bases do
+        blocks[i] = read_block(bases[i], length)
+    end
+    for i = 1, #bases do
+        write_block(bases[i], blocks[order[i]])
+    end
+end
+
+return M
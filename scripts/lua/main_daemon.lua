@@ -1,51 +1,298 @@
 
 local EXECUTION_CADENCE = 60 -- NES / FCEUX runs at about 60 frames per second
+local execution_cadence = EXECUTION_CADENCE
 local frame_count = 0
+local snapshot_sequence = 0
+
+local RAMDISK_DIR = os.getenv("RAMDISK_DIR")
+local LUA_PACKAGE_DIR = os.getenv("LUA_PACKAGE_DIR")
+
+-- make any LUA packages installed in LUA_PACKAGE_DIR available to executed scripts
+if (LUA_PACKAGE_DIR) then
+    package.path = package.path .. ";" .. LUA_PACKAGE_DIR .. "?.lua"
+end
+
+-- directory holding this script and its helper modules: ffbot.sh exports
+-- FFBOT_DIR, otherwise fall back to the path FCEUX loaded us from
+local SCRIPT_DIR = nil
+if (os.getenv("FFBOT_DIR")) then
+    SCRIPT_DIR = os.getenv("FFBOT_DIR") .. "/scripts/lua/"
+else
+    SCRIPT_DIR = string.match(debug.getinfo(1, "S").source, "^@(.*[/\\])") or "./"
+end
+
+-- helpers available to queued commands (see api/nes/blocks.py), and the
+-- named procedures run by "call" records (see api/nes/procedures.py)
+FFBOT = {
+    blocks = dofile(SCRIPT_DIR .. "blocks.lua"),
+}
+FFBOT.procedures = dofile(SCRIPT_DIR .. "procedures.lua")
+
+-- "json" (default) writes ram_contents.json, "binary" writes ram_snapshot.bin
+-- (see api/nes/binary_snapshot.py for the layout), "delta" writes
+-- ram_keyframe.json and ram_deltas.log (see api/nes/delta_snapshot.py)
+local RAM_SNAPSHOT_FORMAT = string.lower(os.getenv("RAM_SNAPSHOT_FORMAT") or "json")
+
+-- NES internal RAM ($0000-$07FF) and cartridge SRAM ($6000-$7FFF); must match
+-- SNAPSHOT_REGIONS in api/nes/binary_snapshot.py
+local SNAPSHOT_REGIONS = {
+    { base = 0x0000, length = 0x0800 },
+    { base = 0x6000, length = 0x2000 },
+}
+local SNAPSHOT_FORMAT_VERSION = 1
+
+-- little-endian encoders (Lua 5.1 has no string.pack)
+local function u16le(n)
+    return string.char(n % 256, math.floor(n / 256) % 256)
+end
+
+local function u32le(n)
+    return string.char(n % 256, math.floor(n / 256) % 256, math.floor(n / 65536) % 256, math.floor(n / 16777216) % 256)
+end
+
+local function write_binary_snapshot(ramdisk_dir)
+    local parts = { "FFRS", u16le(SNAPSHOT_FORMAT_VERSION), u16le(#SNAPSHOT_REGIONS), u32le(snapshot_sequence % 4294967296), u32le(emu.framecount() % 4294967296) }
+    for _, region in ipairs(SNAPSHOT_REGIONS) do
+        parts[#parts + 1] = u32le(region.base) .. u32le(region.length)
+    end
+    for _, region in ipairs(SNAPSHOT_REGIONS) do
+        parts[#parts + 1] = memory.readbyterange(region.base, region.length)
+    end
+
+    -- write then rename so a reader that has the previous snapshot mapped
+    -- never sees it change underneath it
+    local tmp_path = ramdisk_dir .. "ram_snapshot.bin.tmp"
+    local snapshot_file = io.open(tmp_path, "wb")
+    snapshot_file:write(table.concat(parts))
+    snapshot_file:close()
+    os.rename(tmp_path, ramdisk_dir .. "ram_snapshot.bin")
+end
+
+-- ram_contents.json is built by a module generated from ram_catalog.json at
+-- start up (scripts/python/compile_lua_catalog.py, run by ffbot.sh), so the
+-- catalog is not re-read or JSON-decoded on every tick
+local RAM_CATALOG = nil
+if (RAM_SNAPSHOT_FORMAT ~= "binary") then
+    RAM_CATALOG = dofile(RAMDISK_DIR .. "ram_catalog.lua")
+end
+
+local function write_json_snapshot(ramdisk_dir)
+    local tmp_path = ramdisk_dir .. "ram_contents.json.tmp"
+    local ram_contents_file = io.open(tmp_path, "w")
+    ram_contents_file:write(RAM_CATALOG.ram_contents_json())
+    ram_contents_file:close()
+    os.rename(tmp_path, ramdisk_dir .. "ram_contents.json")
+end
+
+-- delta format: a full keyframe every DELTA_KEYFRAME_INTERVAL ticks and, in
+-- between, one log line per tick listing only the addresses that changed;
+-- must match DELTA_KEYFRAME_INTERVAL in api/nes/delta_snapshot.py
+local DELTA_KEYFRAME_INTERVAL = 60
+local previous_values = nil
+local ticks_since_keyframe = 0
+
+local function write_delta_snapshot(ramdisk_dir)
+    local values = RAM_CATALOG.read_bytes()
+    local addresses = RAM_CATALOG.ADDRESSES
+    local hex = RAM_CATALOG.HEX
+    local frame = emu.framecount()
+
+    if (previous_values == nil or ticks_since_keyframe >= DELTA_KEYFRAME_INTERVAL) then
+        local buffer = {}
+        for i = 1, #values do
+            buffer[i] = '"' .. addresses[i] .. '": "0x' .. hex[values[i]] .. '"'
+        end
+        local tmp_path = ramdisk_dir .. "ram_keyframe.json.tmp"
+        local keyframe_file = io.open(tmp_path, "w")
+        keyframe_file:write('{"seq": ' .. snapshot_sequence .. ', "frame": ' .. frame .. ', "ram": {' .. table.concat(buffer, ",") .. '}}')
+        keyframe_file:close()
+        os.rename(tmp_path, ramdisk_dir .. "ram_keyframe.json")
+
+        -- start a new (renamed, so readers see a new inode) log for this keyframe
+        io.open(ramdisk_dir .. "ram_deltas.log.tmp", "w"):close()
+        os.rename(ramdisk_dir .. "ram_deltas.log.tmp", ramdisk_dir .. "ram_deltas.log")
+        ticks_since_keyframe = 0
+    else
+        local parts = { snapshot_sequence, frame }
+        for i = 1, #values do
+            if (values[i] ~= previous_values[i]) then
+                parts[#parts + 1] = addresses[i] .. "=" .. hex[values[i]]
+            end
+        end
+        local log_file = io.open(ramdisk_dir .. "ram_deltas.log", "a")
+        log_file:write(table.concat(parts, " ") .. "\n")
+        log_file:close()
+        ticks_since_keyframe = ticks_since_keyframe + 1
+    end
+
+    previous_values = values
+end
+
+-- the NES API publishes "<fast frames> <idle frames> <fast until>" in
+-- daemon_cadence.txt (see api/nes/cadence.py) so the daemon snapshots every
+-- few frames while the bot is busy; without the file it stays at EXECUTION_CADENCE
+local CADENCE_POLL_FRAMES = 15
+local cadence_poll_count = 0
+
+local function read_cadence(ramdisk_dir)
+    local cadence_file = io.open(ramdisk_dir .. "daemon_cadence.txt", "r")
+    if (not cadence_file) then
+        return EXECUTION_CADENCE
+    end
+    local fast, idle, fast_until = cadence_file:read("*number", "*number", "*number")
+    cadence_file:close()
+    if (not (fast and idle and fast_until)) then
+        return EXECUTION_CADENCE
+    end
+    if (os.time() < fast_until) then
+        return math.max(1, fast)
+    end
+    return math.max(1, idle)
+end
+
+-- the NES API appends sequence-numbered records of LUA code to
+-- command_queue.log (see api/nes/command_queue.py):
+--   --[[ffbot:record seq=12 kind=script]]
+--   memory.writebyte(0x006110, 10)
+--   --[[ffbot:end seq=12]]
+-- Each tick the queue is renamed aside and every complete record is run once,
+-- in order. The renamed file is read again on the following tick (and then
+-- removed) to pick up a record appended by a writer that opened the queue
+-- just before the rename.
+--
+-- A record of kind "call" is not LUA code but a procedure name and its
+-- arguments, e.g. "set_hp 2 150" or "permute_blocks 0x6100,0x6140 64 2,1",
+-- run from FFBOT.procedures without compiling anything.
+local last_command_sequence = 0
+local load_chunk = loadstring or load
+local unpack_args = unpack or table.unpack
+
+local function parse_call(body)
+    local name = nil
+    local args = {}
+    for token in string.gmatch(body, "%S+") do
+        if (not name) then
+            name = token
+        elseif (string.find(token, ",", 1, true)) then
+            local list = {}
+            for item in string.gmatch(token, "[^,]+") do
+                list[#list + 1] = tonumber(item)
+            end
+            args[#args + 1] = list
+        else
+            args[#args + 1] = tonumber(token)
+        end
+    end
+    return name, args
+end
+
+-- returns the function to run for a record, or nil and an error message
+local function compile_command(kind, body, sequence)
+    if (kind ~= "call") then
+        return load_chunk(body, "=command " .. sequence)
+    end
+    local name, args = parse_call(body)
+    local procedure = FFBOT.procedures[name or ""]
+    if (not procedure) then
+        return nil, "unknown procedure " .. tostring(name)
+    end
+    return function() procedure(unpack_args(args, 1, #args)) end
+end
+
+local function run_command_file(path)
+    local command_file = io.open(path, "r")
+    if (not command_file) then
+        return
+    end
+    local text = command_file:read("*all")
+    command_file:close()
+
+    local position = 1
+    while true do
+        local header_start, header_end, sequence, kind = string.find(text, "%-%-%[%[ffbot:record seq=(%d+) kind=([%w_]+)%]%]\n", position)
+        if (not header_start) then
+            break
+        end
+        local end_start, end_end = string.find(text, "--[[ffbot:end seq=" .. sequence .. "]]", header_end + 1, true)
+        if (not end_start) then
+            break -- record still being written
+        end
+
+        sequence = tonumber(sequence)
+        if (sequence > last_command_sequence) then
+            local chunk, load_error = compile_command(kind, string.sub(text, header_end + 1, end_start - 1), sequence)
+            if (chunk) then
+                local ok, run_error = pcall(chunk)
+                if (not ok) then
+                    print("😈😈😈 Lua Daemon: command " .. sequence .. " (" .. kind .. ") failed: " .. tostring(run_error))
+                end
+            else
+                print("😈😈😈 Lua Daemon: command " .. sequence .. " (" .. kind .. ") did not compile: " .. tostring(load_error))
+            end
+            last_command_sequence = sequence
+        end
+        position = end_end + 1
+    end
+end
+
+-- last_command_sequence as of the previous ack written to command_ack.txt
+local acknowledged_sequence = 0
+
+local function write_command_ack(ramdisk_dir)
+    if (last_command_sequence == acknowledged_sequence) then
+        return
+    end
+    local tmp_path = ramdisk_dir .. "command_ack.txt.tmp"
+    local ack_file = io.open(tmp_path, "w")
+    ack_file:write(last_command_sequence)
+    ack_file:close()
+    os.rename(tmp_path, ramdisk_dir .. "command_ack.txt")
+    acknowledged_sequence = last_command_sequence
+end
+
+local function drain_command_queue(ramdisk_dir)
+    local queue_path = ramdisk_dir .. "command_queue.log"
+    local draining_path = ramdisk_dir .. "command_queue.draining"
+
+    run_command_file(draining_path)
+    os.remove(draining_path)
+
+    if (os.rename(queue_path, draining_path)) then
+        run_command_file(draining_path)
+    end
+end
 
 print("😈😈😈 LUA Daemon: loaded and ready... 😈😈😈")
 
 while true do
-    if (frame_count < EXECUTION_CADENCE) then
+    cadence_poll_count = cadence_poll_count + 1
+    if (cadence_poll_count >= CADENCE_POLL_FRAMES) then
+        cadence_poll_count = 0
+        execution_cadence = read_cadence(RAMDISK_DIR)
+    end
+
+    if (frame_count < execution_cadence) then
         frame_count = frame_count + 1
     else
-        -- only execute primary functionality once every EXECUTION_CADENCE frames
+        -- only execute primary functionality once every execution_cadence frames
         frame_count = 0 -- reset frame counter
+        snapshot_sequence = snapshot_sequence + 1
 
-        local RAMDISK_DIR = os.getenv("RAMDISK_DIR")
-        local LUA_PACKAGE_DIR = os.getenv("LUA_PACKAGE_DIR")
+        -- run everything the bot has queued since the previous tick first, so
+        -- this tick's snapshot already shows its writes
+        drain_command_queue(RAMDISK_DIR)
 
-        -- update LUAs `package.path` to include directory with lunajson
-        package.path = package.path .. ";" .. LUA_PACKAGE_DIR .. "?.lua"
-        local JSON = require("lunajson") -- load lunajson for JSON parsing
-
-        local ram_catalog_file = io.open(RAMDISK_DIR .. "ram_catalog.json", "r")
-        local RAM_CATALOG = JSON.decode(ram_catalog_file:read("*all"))
-        -- note keys are NOT sorted in order by their hex values
-        ram_catalog_file:close()
-
-        local ram_contents = "{"
-        for i, entry in ipairs(RAM_CATALOG.catalog) do
-            local ram_address = entry.address
-            local decimal_value = memory.readbyte(tonumber(ram_address))
-            local hex_value = string.format("%02X", decimal_value)
-            ram_contents = ram_contents .. '"' .. ram_address .. '": "0x' .. hex_value .. '",'
-        end
-         -- remove trailing comma and close JSON object
-        ram_contents = ram_contents:sub(1, -2) .. "}"
-
-        -- note that because LUA tables do not maintain order, the current solution
-        -- will not sort the ram_contents.json file by its hex key values
-        local ram_contents_file = io.open(RAMDISK_DIR .. "ram_contents.json", "w")
-        ram_contents_file:write(ram_contents)
-        ram_contents_file:close()
-
-        -- execute any scripts the bot has dropped in execute.lua
-        local result = dofile(RAMDISK_DIR .. "execute.lua")
-        if (result) then
-             -- clear contents of execute.lua
-            io.open(RAMDISK_DIR .. "execute.lua","w"):close()
-            print("😈😈😈 Lua Daemon: executed script from bot 😈😈😈")
+        if (RAM_SNAPSHOT_FORMAT == "binary") then
+            write_binary_snapshot(RAMDISK_DIR)
+        elseif (RAM_SNAPSHOT_FORMAT == "delta") then
+            write_delta_snapshot(RAMDISK_DIR)
+        else
+            write_json_snapshot(RAMDISK_DIR)
         end
+
+        -- acknowledge the commands run this tick only now that the snapshot
+        -- shows them, so a reader waiting on a ticket never sees stale values
+        write_command_ack(RAMDISK_DIR)
     end
 
     emu.frameadvance() -- crucial for allowing the emulator to advance a frame
@@ -0,0 +1,77 @@
+-- Named procedures, loaded once by main_daemon.lua and run by "call" records
+-- in the command queue (see api/nes/procedures.py). A call names a procedure
+-- and passes integer arguments; a comma separated argument arrives as a list.
+-- Python validates every argument before queueing, so these stay minimal.
+
+local blocks = FFBOT.blocks
+
+local P = {}
+
+local PARTY_BASE = 0x6100
+local CHARACTER_SIZE = 64
+local PARTY_SIZE = 4
+local STATUS_OFFSET = 0x01
+local HP_OFFSET = 0x0A
+local MAX_HP_OFFSET = 0x0C
+
+local function character_base(slot)
+    return PARTY_BASE + (slot - 1) * CHARACTER_SIZE
+end
+
+local function read_word(address)
+    return memory.readbyte(address) + memory.readbyte(address + 1) * 256
+end
+
+local function write_word(address, value)
+    memory.writebyte(address, value % 256)
+    memory.writebyte(address + 1, math.floor(value / 256) % 256)
+end
+
+-- write values[i] to addresses[i]
+function P.write_bytes(addresses, values)
+    for i = 1, #addresses do
+        memory.writebyte(addresses[i], values[i])
+    end
+end
+
+-- set the current HP of the character in `slot` (1-4)
+function P.set_hp(slot, hp)
+    write_word(character_base(slot) + HP_OFFSET, hp)
+end
+
+-- restore every living character to max HP
+function P.heal_party()
+    for slot = 1, PARTY_SIZE do
+        local base = character_base(slot)
+        local status = memory.readbyte(base + STATUS_OFFSET)
+        -- status bits 0x01 (dead) and 0x02 (stone) aren't cured by HP
+        if (status % 4 == 0) then
+            write_word(base + HP_OFFSET, read_word(base + MAX_HP_OFFSET))
+        end
+    end
+end
+
+-- add `count` to the inventory byte at `address`, clamped to 0..`cap`
+function P.give_item(address, count, cap)
+    local value = memory.readbyte(address) + count
+    if (value > cap) then
+        value = cap
+    elseif (value < 0) then
+        value = 0
+    end
+    memory.writebyte(address, value)
+end
+
+function P.copy_block(src, dst, length)
+    blocks.copy(src, dst, length)
+end
+
+function P.swap_blocks(a, b, length)
+    blocks.swap(a, b, length)
+end
+
+function P.permute_blocks(bases, length, order)
+    blocks.permute(bases, length, order)
+end
+
+return P
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NES API hot paths, both as direct calls and over HTTP.
+
+Usage:
+  python scripts/python/benchmark/bench_api.py [--iterations N] [--alloc-iterations N]
+                                               [--output results.json] [--compare baseline.json]
+
+Runs against data/ram_catalog.json, data/bestiary.json and a synthetic
+ram_contents.json (seeded, so runs are comparable) on a temporary RAMdisk.
+Each of read_addresses (also as one 64-byte range), write_addresses, order_party, get_names,
+get_monsters_by_location, get_monsters_here and get_locations_by_monster is timed as a direct
+function call and through `create_app().test_client()`, reporting ops/sec,
+p50/p99 latency and tracemalloc allocations per call. Repeat polls of
+/nes/read are also timed as a conditional request (If-None-Match, answered
+with a 304) and as a `since` read of the current snapshot version, and
+loading the compiled catalog and bestiary index is timed both from the
+precompiled artifacts and from the JSON files.
+
+Writes only append to the command queue (no daemon is running), so this
+measures the API side of a write, not the time until it is applied; see
+bench_write_latency.py for that. order_party has no HTTP route, so its HTTP
+row uses the equivalent /nes/blocks permute.
+
+Results are saved as JSON with --output; pass a previous file to --compare
+to flag benchmarks whose p50 got more than --tolerance slower (the exit
+status is the number of regressions).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import compare_results, measure, measure_allocations, print_results, save_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NES API hot paths')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--alloc-iterations', type=int, default=200)
+    parser.add_argument('--output', default=None, help='save results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='p50 slowdown reported as a regression')
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+        shutil.copy(REPO_ROOT / 'data' / 'bestiary.json', ramdisk + 'bestiary.json')
+
+        # modules read RAMDISK_DIR at import time, so set it before importing them
+        os.environ['RAMDISK_DIR'] = ramdisk
+        os.environ['RAM_SNAPSHOT_FORMAT'] = 'json'
+
+        from api.nes.app import create_app
+        from api.nes.read import read_addresses
+        from api.nes.write import write_addresses
+        from api.nes.order import order_party
+        from api.nes.names import get_names
+        from api.nes.bestiary import get_monsters_by_location, get_locations_by_monster
+        from api.nes.zones import get_monsters_here
+        from api.nes.read import _build_ram_catalog, compile_ram_catalog_artifact
+        from api.nes.bestiary import _build_bestiary, _index_bestiary, compile_bestiary_artifact
+        from api.nes.catalog import compile_catalog
+        from api.utils import fastjson
+
+        # as ffbot.sh does on start
+        compile_ram_catalog_artifact(ramdisk + 'ram_catalog.json')
+        compile_bestiary_artifact(ramdisk + 'bestiary.json')
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            catalog = json.load(f)['catalog']
+        with open(ramdisk + 'bestiary.json', 'r') as f:
+            bestiary = json.load(f)
+
+        rng = random.Random(0)
+        ram_contents = {entry['address']: '0x%02X' % rng.randrange(256) for entry in catalog}
+        # JSON in the same shape the Lua daemon writes
+        with open(ramdisk + 'ram_contents.json', 'w') as f:
+            f.write('{' + ','.join(f'"{a}": "{v}"' for a, v in ram_contents.items()) + '}')
+
+        all_addresses = list(dict.fromkeys(entry['address'] for entry in catalog if entry.get('type')))
+        few_addresses = all_addresses[:8]
+        location = next(iter(bestiary))
+        monsters = sorted({m for ms in bestiary.values() for m in ms})[:3]
+        # free-form names resolved through the location index
+        loose_locations = ["Castle of Ordeal 2F", "marsh cave", "castl of ordel 3f"]
+        # plural, misspelled and spelled-out names resolved through the trigram index
+        fuzzy_monsters = ["Wolves", "Cockatrice", "Frost Giant"]
+        writes = [{"0x006110": 10}, {"0x006BE4": 50}]
+        party_bases = ["0x006100", "0x006140", "0x006180", "0x0061C0"]
+        party_range = "0x006100-0x00613F"
+
+        client = create_app().test_client()
+
+        def post(url, payload):
+            def call():
+                response = client.post(url, json=payload)
+                assert response.status_code == 200, response.get_data(as_text=True)
+            return call
+
+        def revalidate(url, payload):
+            # the snapshot never changes here, so the first response's ETag stays current
+            etag = client.post(url, json=payload).headers['ETag']
+            def call():
+                response = client.post(url, json=payload, headers={'If-None-Match': etag})
+                assert response.status_code == 304, response.status_code
+            return call
+
+        version = int(client.post('/nes/read', json={'addresses': few_addresses}).headers['X-Snapshot-Version'])
+
+        def direct(fn, *fn_args):
+            def call():
+                result, status = fn(*fn_args)
+                assert status == 200, result
+            return call
+
+        def load(build, path):
+            def call():
+                build(path)
+            return call
+
+        def load_json(build, path):
+            def call():
+                with open(path, 'rb') as f:
+                    build(fastjson.load(f))
+            return call
+
+        cases = {
+            'direct read_addresses (8)': direct(read_addresses, few_addresses),
+            'direct read_addresses (catalog)': direct(read_addresses, all_addresses),
+            'direct read_addresses (range 64)': direct(read_addresses, [party_range]),
+            'direct write_addresses': direct(write_addresses, writes),
+            'direct order_party': direct(order_party, 2, 4, 3, 1),
+            'direct get_names': direct(get_names),
+            'direct get_monsters_by_location': direct(get_monsters_by_location, location),
+            'direct get_monsters_by_location (loose, 3)': direct(get_monsters_by_location, loose_locations),
+            'direct get_monsters_here': direct(get_monsters_here),
+            'direct get_locations_by_monster': direct(get_locations_by_monster, monsters),
+            'direct get_locations_by_monster (fuzzy)': direct(get_locations_by_monster, fuzzy_monsters),
+            'load ram_catalog (artifact)': load(_build_ram_catalog, ramdisk + 'ram_catalog.json'),
+            'load ram_catalog (json)': load_json(compile_catalog, ramdisk + 'ram_catalog.json'),
+            'load bestiary (artifact)': load(_build_bestiary, ramdisk + 'bestiary.json'),
+            'load bestiary (json)': load_json(_index_bestiary, ramdisk + 'bestiary.json'),
+            'http /nes/read (8)': post('/nes/read', {'addresses': few_addresses}),
+            'http /nes/read (catalog)': post('/nes/read', {'addresses': all_addresses}),
+            'http /nes/read (range 64)': post('/nes/read', {'addresses': [party_range]}),
+            'http /nes/read (catalog), If-None-Match': revalidate('/nes/read', {'addresses': all_addresses}),
+            'http /nes/read (catalog), since unchanged': post('/nes/read', {'addresses': all_addresses, 'since': version}),
+            'http /nes/write': post('/nes/write', {'addresses': writes}),
+            'http /nes/blocks permute': post('/nes/blocks', {'op': 'permute', 'bases': party_bases, 'length': 64, 'order': [2, 4, 3, 1]}),
+            'http /nes/names/get': post('/nes/names/get', {}),
+            'http /nes/names/get, If-None-Match': revalidate('/nes/names/get', {}),
+            'http /nes/bestiary/get-monsters-by-location': post('/nes/bestiary/get-monsters-by-location', {'location': location}),
+            'http /nes/bestiary/here': post('/nes/bestiary/here', {}),
+            'http /nes/bestiary/get-locations-by-monster': post('/nes/bestiary/get-locations-by-monster', {'monsters': monsters}),
+        }
+
+        results = {}
+        # the write paths echo every command to the console; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, fn in cases.items():
+                results[name] = measure(fn, args.iterations)
+                results[name].update(measure_allocations(fn, args.alloc_iterations))
+
+        title = f'NES API hot paths ({len(all_addresses)} catalog addresses, {args.iterations} iterations)'
+        print_results(title, results)
+
+        if args.output:
+            save_results(args.output, title, results, {'iterations': args.iterations, 'alloc_iterations': args.alloc_iterations})
+            print(f"Saved results to {args.output}")
+        regressions = 0
+        if args.compare:
+            regressions = compare_results(args.compare, results, args.tolerance)
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+    sys.exit(regressions)
+
+
+if __name__ == '__main__':
+    main()
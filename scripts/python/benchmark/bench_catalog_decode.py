@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the compiled RAM catalog decoder.
+
+Usage:
+  python scripts/python/benchmark/bench_catalog_decode.py [--iterations N]
+
+Decodes every entry in data/ram_catalog.json against a synthetic snapshot and
+compares:
+  - the previous dict-of-dicts decoder (hex-string keyed lookups and a
+    per-value int() parse), reproduced here as a reference
+  - CompiledCatalog.decode over all catalog rows (JSON and binary snapshots)
+  - read_addresses end to end for every decodable address
+The compiled decoder's output is checked against the reference before timing.
+No emulator is required.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import measure, print_results
+
+
+def build_reference_entries(ram_catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """The catalog shape read.py used before compile_catalog() existed."""
+    lookups = {item['key']: {'default': item.get('default'), 'map': item.get('map', {})} for item in ram_catalog['lookups']}
+    entries: Dict[str, Any] = {}
+    for entry in ram_catalog['catalog']:
+        if entry.get('type') == 'number':
+            entries[entry['address']] = {'weight': entry.get('weight')}
+        elif entry.get('type') == 'lookup':
+            entries[entry['address']] = {'lookup': lookups.get(entry.get('lookup'))}
+        else:
+            entries[entry['address']] = {}
+    return entries
+
+
+def reference_decode(entries: Dict[str, Any], ram_contents: Dict[str, str], addresses: List[str]) -> List[Any]:
+    values = []
+    for address in addresses:
+        entry = entries[address]
+        raw = ram_contents.get(address)
+        if entry.get('lookup') is not None:
+            lookup = entry['lookup']
+            mapped = lookup['map'].get(raw)
+            values.append(mapped if mapped is not None else lookup.get('default'))
+        elif 'weight' in entry:
+            weight = int(entry['weight']) if entry.get('weight') is not None else 1
+            values.append(str(int(raw, 16) * weight))
+        else:
+            values.append(None)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compiled RAM catalog decoding')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+
+        # modules read RAMDISK_DIR at import time, so set it before importing them
+        os.environ['RAMDISK_DIR'] = ramdisk
+
+        from api.nes import snapshot
+        from api.nes.binary_snapshot import load_binary_snapshot, regions_from_ram_contents, write_binary_snapshot
+        from api.nes.catalog import compile_catalog
+        from api.nes.read import read_addresses
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            ram_catalog = json.load(f)
+
+        rng = random.Random(0)
+        ram_contents = {entry['address']: '0x%02X' % rng.randrange(256) for entry in ram_catalog['catalog']}
+        with open(ramdisk + 'ram_contents.json', 'w') as f:
+            json.dump(ram_contents, f)
+        write_binary_snapshot(ramdisk + 'ram_snapshot.bin', regions_from_ram_contents(ram_contents))
+
+        json_contents = snapshot.load_json_snapshot(ramdisk + 'ram_contents.json')
+        binary_contents = load_binary_snapshot(ramdisk + 'ram_snapshot.bin')
+
+        catalog = compile_catalog(ram_catalog)
+        entries = build_reference_entries(ram_catalog)
+        all_addresses = catalog.addresses
+        rows = catalog.rows(all_addresses)
+        offsets = catalog.offsets[rows]
+
+        expected = reference_decode(entries, ram_contents, all_addresses)
+        assert catalog.decode(rows, json_contents.gather(offsets)) == expected, "compiled decode differs from reference (json)"
+        assert catalog.decode(rows, binary_contents.gather(offsets)) == expected, "compiled decode differs from reference (binary)"
+
+        decodable = [a for a in all_addresses if entries[a]]
+
+        results = {
+            'compile catalog': measure(lambda: compile_catalog(ram_catalog), max(1, args.iterations // 10)),
+            'reference decode (dict of dicts)': measure(lambda: reference_decode(entries, ram_contents, all_addresses), args.iterations),
+            'compiled decode (json snapshot)': measure(lambda: catalog.decode(rows, json_contents.gather(offsets)), args.iterations),
+            'compiled decode (binary snapshot)': measure(lambda: catalog.decode(rows, binary_contents.gather(offsets)), args.iterations),
+        }
+
+        for name in ('json', 'binary'):
+            snapshot._SNAPSHOT_CACHE = snapshot.create_snapshot_cache(name, ramdisk)
+            results[f'read_addresses ({name})'] = measure(lambda: read_addresses(decodable), args.iterations)
+
+        print_results(f'RAM catalog decode ({len(all_addresses)} catalog entries, {args.iterations} iterations)', results)
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the delta RAM snapshot format against full JSON snapshots.
+
+Usage:
+  python scripts/python/benchmark/bench_delta_snapshot.py [--iterations N] [--changes N]
+
+Replays a synthetic game session through the pure-Python stand-in daemon:
+every tick changes `--changes` random catalog bytes. For each tick the script
+times what the daemon writes plus what the NES API does to pick it up:
+  - json:  rewrite ram_contents.json, then re-parse it on the next read
+  - delta: append one delta line (or write a keyframe), then apply it
+Before timing, the delta reader's contents are checked against the full
+snapshot after every tick of a separate replay. No emulator is required.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import measure, print_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare delta and full JSON RAM snapshots')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--changes', type=int, default=4, help='catalog bytes changed per tick')
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+
+        # modules read RAMDISK_DIR at import time, so set it before importing them
+        os.environ['RAMDISK_DIR'] = ramdisk
+
+        from api.nes import snapshot
+        from api.nes.delta_snapshot import DeltaSnapshotWriter
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            catalog = json.load(f)['catalog']
+        addresses = list(dict.fromkeys(entry['address'] for entry in catalog))
+
+        rng = random.Random(0)
+        values = [rng.randrange(256) for _ in addresses]
+
+        def advance():
+            for _ in range(args.changes):
+                values[rng.randrange(len(values))] = rng.randrange(256)
+
+        # correctness: the delta reader must track the full snapshot exactly
+        writer = DeltaSnapshotWriter(ramdisk, addresses, keyframe_interval=10)
+        cache = snapshot.create_snapshot_cache('delta', ramdisk)
+        for tick in range(100):
+            advance()
+            writer.tick(values, frame=tick)
+            expected = {a: '0x%02X' % v for a, v in zip(addresses, values)}
+            assert dict(cache.get().contents) == expected, f"delta reader diverged at tick {tick}"
+
+        json_path = ramdisk + 'ram_contents.json'
+        json_cache = snapshot.create_snapshot_cache('json', ramdisk)
+
+        def json_tick():
+            advance()
+            # same shape (and write path) as the Lua daemon's JSON writer
+            with open(json_path + '.tmp', 'w') as f:
+                f.write('{' + ','.join('"%s": "0x%02X"' % (a, v) for a, v in zip(addresses, values)) + '}')
+            os.replace(json_path + '.tmp', json_path)
+            json_cache.get()
+
+        writer = DeltaSnapshotWriter(ramdisk, addresses)
+        delta_cache = snapshot.create_snapshot_cache('delta', ramdisk)
+
+        def delta_tick():
+            advance()
+            writer.tick(values)
+            delta_cache.get()
+
+        results = {
+            'json: write + reload per tick': measure(json_tick, args.iterations),
+            'delta: write + apply per tick': measure(delta_tick, args.iterations),
+            'json: get() between ticks': measure(json_cache.get, args.iterations),
+            'delta: get() between ticks': measure(delta_cache.get, args.iterations),
+        }
+
+        print_results(
+            f'RAM snapshot deltas ({len(addresses)} catalog addresses, {args.changes} changes/tick, {args.iterations} iterations)',
+            results,
+        )
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
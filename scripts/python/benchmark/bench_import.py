@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark NES API start-up: import time and memory.
+
+Usage:
+  python scripts/python/benchmark/bench_import.py [--runs N] [--top N]
+                                                  [--output results.json] [--compare baseline.json]
+
+Imports each module in a fresh interpreter with `-X importtime`, `--runs`
+times, and reports the median and worst wall time, peak RSS and the number
+of modules loaded, followed by the slowest direct imports of the last run:
+  - api.nes.app:   what `python -m api.nes.app` loads (Flask routes only)
+  - api.nes.tools: the LangChain tool wrappers used by the LLM client
+Importing api.nes.app must not load LangChain; the exit status is 1 if it
+does, otherwise the number of regressions found by --compare.
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import compare_results, print_results, save_results
+
+MODULES = ["api.nes.app", "api.nes.tools"]
+
+_PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(sys.modules), 'langchain' in sys.modules)
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_once(module, env):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed, rss_kib, modules, langchain = completed.stdout.split()
+    # direct imports of `module` (one nesting level down): cumulative microseconds
+    top = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match and len(match.group(3)) == 3:
+            top[match.group(4)] = int(match.group(2))
+    return float(elapsed), int(rss_kib), int(modules), langchain == 'True', top
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark NES API import time and memory')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest direct imports to list per module')
+    parser.add_argument('--output', default=None, help='save results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='p50 slowdown reported as a regression')
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+        env = dict(os.environ, RAMDISK_DIR=ramdisk, PYTHONDONTWRITEBYTECODE='1')
+
+        results = {}
+        slowest = {}
+        loads_langchain = {}
+        for module in MODULES:
+            runs = [_import_once(module, env) for _ in range(args.runs)]
+            seconds = [run[0] for run in runs]
+            median = statistics.median(seconds)
+            results[module] = {
+                "iterations": args.runs,
+                "seconds": sum(seconds),
+                "mean_us": statistics.mean(seconds) * 1_000_000,
+                "p50_us": median * 1_000_000,
+                "p99_us": max(seconds) * 1_000_000,
+                "ops_per_sec": 1 / median,
+                "rss_kib": max(run[1] for run in runs),
+                "modules": runs[-1][2],
+            }
+            loads_langchain[module] = runs[-1][3]
+            slowest[module] = sorted(runs[-1][4].items(), key=lambda item: -item[1])[:args.top]
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+    title = f'Import time ({args.runs} runs each, fresh interpreter)'
+    print_results(title, results)
+    for module in MODULES:
+        result = results[module]
+        print(f"  {module}: {result['rss_kib'] / 1024:.1f} MiB peak RSS, {result['modules']} modules,"
+              f" LangChain {'loaded' if loads_langchain[module] else 'not loaded'}")
+        for name, microseconds in slowest[module]:
+            print(f"      {microseconds / 1000:8.1f} ms  {name}")
+
+    if args.output:
+        save_results(args.output, title, results, {'runs': args.runs})
+        print(f"Saved results to {args.output}")
+    regressions = 0
+    if args.compare:
+        regressions = compare_results(args.compare, results, args.tolerance)
+
+    if loads_langchain['api.nes.app']:
+        print("api.nes.app imports LangChain")
+        sys.exit(1)
+    sys.exit(regressions)
+
+
+if __name__ == '__main__':
+    main()
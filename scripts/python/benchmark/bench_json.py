@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON backends available to api/utils/fastjson.py.
+
+Usage:
+  python scripts/python/benchmark/bench_json.py [--iterations N] [--output results.json] [--compare baseline.json]
+
+For each installed backend (orjson, msgspec, json):
+  - snapshot parse: a ram_contents.json for every catalog address, as the
+    Lua daemon writes it, parsed from bytes
+  - response encode: the result of reading every catalog address, encoded
+    with sorted keys as the Flask provider does
+and, end to end, /nes/read of the whole catalog through Flask's default JSON
+provider against `FastJSONProvider` (api/utils/flask_json.py).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import compare_results, measure, print_results, save_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fast JSON backends')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--output', default=None, help='save results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='p50 slowdown reported as a regression')
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+
+        # modules read RAMDISK_DIR at import time, so set it before importing them
+        os.environ['RAMDISK_DIR'] = ramdisk
+        os.environ['RAM_SNAPSHOT_FORMAT'] = 'json'
+
+        from flask.json.provider import DefaultJSONProvider
+        from api.utils import fastjson
+        from api.utils.flask_json import FastJSONProvider
+        from api.nes.app import create_app
+        from api.nes.read import read_addresses
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            catalog = json.load(f)['catalog']
+
+        rng = random.Random(0)
+        ram_contents = {entry['address']: '0x%02X' % rng.randrange(256) for entry in catalog}
+        # JSON in the same shape the Lua daemon writes
+        snapshot = ('{' + ','.join(f'"{a}": "{v}"' for a, v in ram_contents.items()) + '}').encode('utf-8')
+        with open(ramdisk + 'ram_contents.json', 'wb') as f:
+            f.write(snapshot)
+
+        all_addresses = list(dict.fromkeys(entry['address'] for entry in catalog if entry.get('type')))
+        response, status = read_addresses(all_addresses)
+        assert status == 200, response
+
+        cases = {}
+        for name, (loads, dumps_bytes) in fastjson.BACKENDS.items():
+            cases[f'{name} snapshot parse'] = lambda loads=loads: loads(snapshot)
+            cases[f'{name} response encode'] = lambda dumps_bytes=dumps_bytes: dumps_bytes(response, True)
+
+        default_app = create_app()
+        default_app.json = DefaultJSONProvider(default_app)
+        fast_app = create_app()
+        assert isinstance(fast_app.json, FastJSONProvider)
+
+        for label, app in (('default provider', default_app), (f'FastJSONProvider ({fastjson.BACKEND})', fast_app)):
+            client = app.test_client()
+
+            def post(client=client):
+                result = client.post('/nes/read', json={'addresses': all_addresses})
+                assert result.status_code == 200, result.get_data(as_text=True)
+            cases[f'http /nes/read (catalog), {label}'] = post
+
+        results = {name: measure(fn, args.iterations) for name, fn in cases.items()}
+
+        title = f'JSON backends ({len(snapshot)} byte snapshot, {args.iterations} iterations, using {fastjson.BACKEND})'
+        print_results(title, results)
+        missing = [name for name in ('orjson', 'msgspec') if name not in fastjson.BACKENDS]
+        if missing:
+            print(f"Not installed: {', '.join(missing)}")
+
+        if args.output:
+            save_results(args.output, title, results, {'iterations': args.iterations, 'backends': list(fastjson.BACKENDS)})
+            print(f"Saved results to {args.output}")
+        regressions = 0
+        if args.compare:
+            regressions = compare_results(args.compare, results, args.tolerance)
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+    sys.exit(regressions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON and binary (memory-mapped) RAM snapshot formats.
+
+Usage:
+  python scripts/python/benchmark/bench_snapshot_formats.py [--iterations N]
+
+The script builds a synthetic snapshot covering every address in
+data/ram_catalog.json, writes it in both formats to a temporary directory
+(using the pure-Python stand-in writer for the binary format) and times:
+  - loading a fresh snapshot (what happens once per daemon tick)
+  - a full-catalog `read_addresses` against a warm snapshot
+  - a full-catalog `read_addresses` that has to reload the snapshot first
+No emulator is required.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import measure, print_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON and binary RAM snapshot read paths')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+
+        # modules read RAMDISK_DIR at import time, so set it before importing them
+        os.environ['RAMDISK_DIR'] = ramdisk
+
+        from api.nes import snapshot
+        from api.nes.binary_snapshot import load_binary_snapshot, regions_from_ram_contents, write_binary_snapshot
+        from api.nes.read import read_addresses
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            catalog = json.load(f)['catalog']
+        addresses = [entry['address'] for entry in catalog if entry.get('type')]
+
+        rng = random.Random(0)
+        ram_contents = {entry['address']: '0x%02X' % rng.randrange(256) for entry in catalog}
+
+        # JSON in the same shape the Lua daemon writes
+        json_path = ramdisk + 'ram_contents.json'
+        with open(json_path, 'w') as f:
+            f.write('{' + ','.join(f'"{a}": "{v}"' for a, v in ram_contents.items()) + '}')
+        binary_path = ramdisk + 'ram_snapshot.bin'
+        write_binary_snapshot(binary_path, regions_from_ram_contents(ram_contents), sequence=1, frame=60)
+
+        json_cache = snapshot.create_snapshot_cache('json', ramdisk)
+        binary_cache = snapshot.create_snapshot_cache('binary', ramdisk)
+
+        def read_with(cache, reload):
+            def run():
+                if reload:
+                    cache.invalidate()
+                result, status = read_addresses(addresses)
+                assert status == 200, result
+            return run
+
+        results = {
+            'load json snapshot': measure(lambda: snapshot.load_json_snapshot(json_path), args.iterations),
+            'map binary snapshot': measure(lambda: load_binary_snapshot(binary_path), args.iterations),
+        }
+
+        for name, cache in (('json', json_cache), ('binary', binary_cache)):
+            snapshot._SNAPSHOT_CACHE = cache
+            results[f'read_addresses warm ({name})'] = measure(read_with(cache, reload=False), args.iterations)
+            results[f'read_addresses reload ({name})'] = measure(read_with(cache, reload=True), args.iterations)
+
+        # both formats must decode to the same values
+        snapshot._SNAPSHOT_CACHE = json_cache
+        json_result = read_addresses(addresses)
+        snapshot._SNAPSHOT_CACHE = binary_cache
+        binary_result = read_addresses(addresses)
+        assert json_result == binary_result, "JSON and binary snapshots decoded differently"
+
+        print_results(f'RAM snapshot formats ({len(addresses)} catalog addresses, {args.iterations} iterations)', results)
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark write -> visible latency and write throughput end to end.
+
+Usage:
+  python scripts/python/benchmark/bench_write_latency.py [--formats json,binary,delta]
+                                                         [--fps N] [--iterations N] [--threads N] [--seconds N]
+
+Runs the pure-Python stand-in daemon (api/nes/standin_daemon.py) on a
+temporary RAMdisk at `--fps` frames per second, then for each snapshot format:
+  - latency: `write_addresses` followed by `read_addresses(min_version=ticket)`,
+    i.e. the time until a write is visible to readers
+  - throughput: `--threads` writers issuing single-byte writes for `--seconds`,
+    counted once the daemon has applied the last one
+Every read is checked against the value written. No emulator is required.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+# number of heals: a plain number in the catalog, so reads return what was written
+_ADDRESS = "0x006039"
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_format(args):
+    ramdisk = tempfile.mkdtemp(prefix='ffbot-bench-') + '/'
+    try:
+        shutil.copy(REPO_ROOT / 'data' / 'ram_catalog.json', ramdisk + 'ram_catalog.json')
+
+        # modules read RAMDISK_DIR and the format at import time, so set them first
+        os.environ['RAMDISK_DIR'] = ramdisk
+        os.environ['RAM_SNAPSHOT_FORMAT'] = args.format
+
+        from api.nes.standin_daemon import StandinDaemon, catalog_addresses
+        from api.nes.write import write_addresses
+        from api.nes.read import read_addresses
+        from api.nes.command_queue import wait_for
+
+        with open(ramdisk + 'ram_catalog.json', 'r') as f:
+            addresses = catalog_addresses(json.load(f))
+        daemon = StandinDaemon(ramdisk, addresses, snapshot_format=args.format, fps=args.fps).start()
+
+        # the NES API does this on every request; start out at the fast cadence
+        from api.nes.cadence import note_activity
+        note_activity()
+        time.sleep(0.5)
+
+        # write_addresses echoes every batch to the console; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies = []
+            for i in range(args.iterations):
+                value = i % 100
+                start = time.perf_counter()
+                result, status = write_addresses([{_ADDRESS: value}])
+                assert status == 200, result
+                result, status = read_addresses([_ADDRESS], min_version=result['ticket'])
+                latencies.append(time.perf_counter() - start)
+                assert status == 200, result
+                assert int(result['addresses'][_ADDRESS]) == value, (result, value)
+
+            counts = [0] * args.threads
+            tickets = [0] * args.threads
+            deadline = time.perf_counter() + args.seconds
+
+            def writer(index):
+                while time.perf_counter() < deadline:
+                    result, status = write_addresses([{_ADDRESS: index}])
+                    assert status == 200, result
+                    tickets[index] = result['ticket']
+                    counts[index] += 1
+
+            start = time.perf_counter()
+            threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert wait_for(max(tickets), 10), "daemon did not apply every write"
+            elapsed = time.perf_counter() - start
+            daemon.stop()
+
+        ms = [latency * 1000 for latency in latencies]
+        print(
+            f"  {args.format:<6}  write->visible p50 {_percentile(ms, 0.5):7.2f} ms"
+            f"  p99 {_percentile(ms, 0.99):7.2f} ms  mean {statistics.mean(ms):7.2f} ms"
+            f"  | {sum(counts) / elapsed:8.0f} writes/s applied ({args.threads} writers)"
+        )
+    finally:
+        shutil.rmtree(ramdisk, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure write -> visible latency against the stand-in daemon')
+    parser.add_argument('--formats', default='json,binary,delta')
+    parser.add_argument('--format', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--fps', type=float, default=60.0)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.format:
+        run_format(args)
+        return
+
+    print(f'Write -> visible latency (stand-in daemon at {args.fps:g} fps, {args.iterations} iterations)')
+    for snapshot_format in args.formats.split(','):
+        # one process per format: the snapshot format is fixed at import time
+        subprocess.run(
+            [sys.executable, __file__, '--format', snapshot_format, '--fps', str(args.fps),
+             '--iterations', str(args.iterations), '--threads', str(args.threads), '--seconds', str(args.seconds)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+"""
+Minimal timing helpers shared by the benchmark scripts in this folder.
+"""
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(fn: Callable[[], Any], iterations: int = 1000, warmup: int = 50) -> Dict[str, float]:
+    """
+    Call `fn` `warmup` times untimed, then `iterations` times timed.
+
+    Returns a dict with the total seconds, mean / p50 / p99 microseconds per
+    call and operations per second.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(iterations):
+        call_start = clock()
+        fn()
+        samples.append(clock() - call_start)
+    elapsed = clock() - start
+
+    return {
+        "iterations": iterations,
+        "seconds": elapsed,
+        "mean_us": (elapsed / iterations) * 1_000_000,
+        "p50_us": _percentile(samples, 0.50) * 1_000_000,
+        "p99_us": _percentile(samples, 0.99) * 1_000_000,
+        "ops_per_sec": iterations / elapsed if elapsed else float('inf'),
+    }
+
+
+def measure_allocations(fn: Callable[[], Any], iterations: int = 100, warmup: int = 10) -> Dict[str, float]:
+    """
+    Trace `iterations` calls of `fn` with tracemalloc (in a separate pass, as
+    tracing slows every allocation down).
+
+    Returns the mean peak bytes allocated during a call and the mean bytes
+    still held after it returns.
+    """
+    for _ in range(warmup):
+        fn()
+
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        retained_total = 0
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            after, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+            retained_total += after - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_alloc_bytes": peak_total / iterations,
+        "retained_bytes": retained_total / iterations,
+    }
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Print one line per benchmark: name, latency, throughput and allocations when measured."""
+    print(title)
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"  {name.ljust(width)}  {result['mean_us']:10.2f} us/op  {result['ops_per_sec']:12.0f} ops/s"
+        if 'p50_us' in result:
+            line += f"  p50 {result['p50_us']:9.2f} us  p99 {result['p99_us']:9.2f} us"
+        if 'peak_alloc_bytes' in result:
+            line += f"  {result['peak_alloc_bytes'] / 1024:9.1f} KiB/op"
+        print(line)
+
+
+def save_results(path: str, title: str, results: Dict[str, Dict[str, float]], parameters: Optional[Dict[str, Any]] = None) -> None:
+    """Write `results` to `path` as JSON, with enough context to compare runs later."""
+    with open(path, 'w') as f:
+        json.dump({
+            "title": title,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": parameters or {},
+            "results": results,
+        }, f, indent=2)
+
+
+def compare_results(baseline_path: str, results: Dict[str, Dict[str, float]], tolerance: float = 0.10) -> int:
+    """
+    Print each benchmark's p50 change against a file written by `save_results`
+    and return how many got slower by more than `tolerance` (a fraction).
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)['results']
+
+    print(f"Compared with {baseline_path}:")
+    regressions = 0
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p50_us'):
+            print(f"  {name.ljust(width)}  (no baseline)")
+            continue
+        change = result['p50_us'] / before['p50_us'] - 1
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"  {name.ljust(width)}  p50 {before['p50_us']:9.2f} -> {result['p50_us']:9.2f} us  ({change:+.0%}){flag}")
+    return regressions
+
+
+__all__ = ["measure", "measure_allocations", "print_results", "save_results", "compare_results"]
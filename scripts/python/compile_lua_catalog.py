@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compile data/ram_catalog.json into the Lua module loaded by the LUA daemon.
+
+Usage:
+  python scripts/python/compile_lua_catalog.py [catalog.json] [output.lua] [--max-gap N]
+
+Defaults to data/ram_catalog.json and $RAMDISK_DIR/ram_catalog.lua. ffbot.sh
+runs this on every start, so edits to the catalog are picked up automatically.
+`--max-gap` lets ranges absorb up to N unrequested bytes between addresses,
+trading a few extra bytes read for fewer `memory.readbyterange` calls.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from load_env import load_env
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from api.nes.lua_catalog import generate_lua_catalog
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description='Compile ram_catalog.json into a Lua module for the LUA daemon')
+    parser.add_argument('catalog', nargs='?', default=str(REPO_ROOT / 'data' / 'ram_catalog.json'))
+    parser.add_argument('output', nargs='?', default=None)
+    parser.add_argument('--max-gap', type=int, default=0)
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        ramdisk = os.environ.get('RAMDISK_DIR')
+        if not ramdisk:
+            print("RAMDISK_DIR environment variable is not set and no output path was given", file=sys.stderr)
+            sys.exit(2)
+        output = os.path.join(ramdisk, 'ram_catalog.lua')
+
+    try:
+        with open(args.catalog, 'r') as f:
+            ram_catalog = json.load(f)
+    except Exception as e:
+        print(f"Failed to load {args.catalog}: {e}", file=sys.stderr)
+        sys.exit(3)
+
+    lua_source = generate_lua_catalog(ram_catalog, max_gap=args.max_gap, source=os.path.basename(args.catalog))
+
+    with open(output, 'w') as f:
+        f.write(lua_source)
+    print(f"Compiled {args.catalog} -> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compile ram_catalog.json and bestiary.json into the binary artifacts the NES
+and LLM APIs load instead of parsing and indexing the JSON (see
+api/nes/artifacts.py).
+
+Usage:
+  python scripts/python/compile_static_data.py [directory]
+
+Defaults to $RAMDISK_DIR. Writes ram_catalog.bin and bestiary.bin next to
+the JSON files in that directory. ffbot.sh runs this on every start, after
+copying the JSON files to the RAMDisk. An artifact is only used while the
+JSON it was compiled from is unchanged, so editing the JSON afterwards is
+safe: the APIs fall back to it until this is run again.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from load_env import load_env
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description='Compile ram_catalog.json and bestiary.json into binary artifacts')
+    parser.add_argument('directory', nargs='?', default=None)
+    args = parser.parse_args()
+
+    directory = args.directory or os.environ.get('RAMDISK_DIR')
+    if not directory:
+        print("RAMDISK_DIR environment variable is not set and no directory was given", file=sys.stderr)
+        sys.exit(2)
+
+    # imported after load_env: the API modules read RAMDISK_DIR when imported
+    from api.nes.read import compile_ram_catalog_artifact
+    from api.nes.bestiary import compile_bestiary_artifact
+
+    for filename, compile_artifact in (
+        ('ram_catalog.json', compile_ram_catalog_artifact),
+        ('bestiary.json', compile_bestiary_artifact),
+    ):
+        source = os.path.join(directory, filename)
+        try:
+            output = compile_artifact(source)
+        except Exception as e:
+            print(f"Failed to compile {source}: {e}", file=sys.stderr)
+            sys.exit(3)
+        print(f"Compiled {source} -> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,10 +10,16 @@ import os
 import sys
 from pathlib import Path
 
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
 def main():
     from load_env import load_env
     load_env()
 
+    from api.nes.layout import ENEMIES
+
     ramdisk = os.environ.get("RAMDISK_DIR")
     if not ramdisk:
         print("RAMDISK_DIR environment variable is not set", file=sys.stderr)
@@ -44,13 +50,12 @@ def main():
                 s = s[2:]
             addr_to_val[int(k, 16)] = s[-2:]
 
-    # Start address for first line
-    start = int("0x006BD3", 16)
+    # One line per enemy block
     lines = []
-    cur = start
-    for line_idx in range(9):
+    cur = ENEMIES.base
+    for line_idx in range(ENEMIES.count):
         tokens = []
-        for i in range(20):
+        for i in range(ENEMIES.stride):
             val = addr_to_val.get(cur)
             if val is None:
                 # If missing, use two spaces placeholder
@@ -61,7 +66,7 @@ def main():
             cur += 1
         lines.append(" ".join(tokens))
 
-    # Print exactly 9 lines
+    # Print one line per enemy slot
     for l in lines:
         print(l)
 
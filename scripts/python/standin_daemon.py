@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Run the pure-Python stand-in for the LUA daemon, for working without FCEUX.
+
+Usage:
+  python scripts/python/standin_daemon.py [--format json|binary|delta] [--fps N] [--cadence N]
+                                          [--fixture FILE] [--trace FILE] [--frames N]
+
+Serves the RAMdisk protocol in $RAMDISK_DIR (or --ramdisk) until interrupted,
+so the NES API and LLM API can be run against it as usual. RAM starts as
+zeros unless --fixture names a 64KB dump, a ram_snapshot.bin or a
+ram_contents.json; --trace replays recorded writes (see
+api/nes/standin_daemon.py for the format).
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from load_env import load_env
+
+# Ensure repo root is on sys.path so `api` package is importable
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description='Emulate the LUA daemon RAMdisk protocol without an emulator')
+    parser.add_argument('--ramdisk', default=None, help='defaults to $RAMDISK_DIR')
+    parser.add_argument('--catalog', default=str(REPO_ROOT / 'data' / 'ram_catalog.json'))
+    parser.add_argument('--format', default=None, choices=['json', 'binary', 'delta'], help='defaults to $RAM_SNAPSHOT_FORMAT')
+    parser.add_argument('--fps', type=float, default=60.0, help='frames per second, 0 for unthrottled')
+    parser.add_argument('--cadence', type=int, default=60, help='frames per tick when no daemon_cadence.txt is published')
+    parser.add_argument('--fixture', default=None)
+    parser.add_argument('--trace', default=None)
+    parser.add_argument('--frames', type=int, default=None, help='stop after N frames')
+    args = parser.parse_args()
+
+    ramdisk = args.ramdisk or os.environ.get('RAMDISK_DIR')
+    if not ramdisk:
+        print("RAMDISK_DIR environment variable is not set and no --ramdisk was given", file=sys.stderr)
+        sys.exit(2)
+    ramdisk = os.path.join(ramdisk, '')
+    # api.nes modules read RAMDISK_DIR at import time
+    os.environ['RAMDISK_DIR'] = ramdisk
+
+    from api.nes.standin_daemon import StandinDaemon, catalog_addresses, load_ram_fixture, load_trace
+
+    try:
+        with open(args.catalog, 'r') as f:
+            addresses = catalog_addresses(json.load(f))
+        ram = load_ram_fixture(args.fixture) if args.fixture else None
+        trace = load_trace(args.trace) if args.trace else None
+    except Exception as e:
+        print(f"Failed to load stand-in inputs: {e}", file=sys.stderr)
+        sys.exit(3)
+
+    snapshot_format = args.format or os.environ.get('RAM_SNAPSHOT_FORMAT', 'json').lower()
+    daemon = StandinDaemon(
+        ramdisk,
+        addresses,
+        snapshot_format=snapshot_format,
+        ram=ram,
+        trace=trace,
+        fps=args.fps,
+        cadence=args.cadence,
+    )
+
+    print(f"Stand-in daemon serving {ramdisk} ({snapshot_format} snapshots, {args.fps:g} fps)")
+    try:
+        daemon.run(args.frames)
+    except KeyboardInterrupt:
+        pass
+    print(f"Stand-in daemon stopped after {daemon.frame} frames, {daemon.sequence} ticks")
+
+
+if __name__ == '__main__':
+    main()
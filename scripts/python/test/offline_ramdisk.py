@@ -0,0 +1,37 @@
+"""
+Temporary RAMdisk for the tests that import the NES API.
+
+The api.nes modules read RAMDISK_DIR when they are first imported, so a test
+module imports this one before any of them. On first import it creates a
+temporary directory holding copies of data/ram_catalog.json and
+data/bestiary.json, points RAMDISK_DIR at it (with the default "json"
+RAM_SNAPSHOT_FORMAT) and puts the repository root on sys.path; every test
+module run in the same process (e.g. under pytest) shares it. It is removed when the process exits.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DATA_DIR = REPO_ROOT / 'data'
+
+# trailing slash: the API joins file names straight onto it
+RAMDISK_DIR = tempfile.mkdtemp(prefix='ffbot-test-') + '/'
+for _filename in ('ram_catalog.json', 'bestiary.json'):
+    shutil.copy(DATA_DIR / _filename, RAMDISK_DIR + _filename)
+os.environ['RAMDISK_DIR'] = RAMDISK_DIR
+os.environ['RAM_SNAPSHOT_FORMAT'] = 'json'
+atexit.register(shutil.rmtree, RAMDISK_DIR, True)
+
+
+def ramdisk_path(filename: str) -> str:
+    """`filename` on the test RAMdisk."""
+    return RAMDISK_DIR + filename
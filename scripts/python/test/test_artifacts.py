@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Checks that the compiled catalog and bestiary index loaded from their
+precompiled artifacts (ram_catalog.bin, bestiary.bin) answer exactly as the
+ones built from data/ram_catalog.json and data/bestiary.json, and that an
+artifact is only used while it matches its JSON file.
+
+Usage:
+  python scripts/python/test/test_artifacts.py
+
+Also collected by pytest. Works on copies in a temporary directory.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+import numpy as np
+
+from api.nes import artifacts
+from api.nes.artifacts import load_artifact
+from api.nes.bestiary import BESTIARY_ARTIFACT_KIND, _build_bestiary, _match_monster, compile_bestiary_artifact
+from api.nes.read import RAM_CATALOG_ARTIFACT_KIND, _build_ram_catalog, compile_ram_catalog_artifact
+from api.utils import fastjson
+
+
+LOCATIONS = [
+    "(marsh_cave,b1)", "Castle of Ordeal 2F", "marsh cave", "castl of ordel 3f",
+    "Chaos Shrine", "ice cave b2", "(4,4)", "(0,3)", "nowhere at all",
+]
+MONSTERS = ["Imp", "Wolves", "Cockatrice", "Frost Giant", "FrGiant", "nothing like it"]
+
+
+def copy_data(directory: str, filename: str) -> str:
+    path = os.path.join(directory, filename)
+    shutil.copy(offline_ramdisk.DATA_DIR / filename, path)
+    return path
+
+
+def build_both(directory: str, filename: str, compile_artifact, build):
+    """(value loaded from the artifact, value built from the JSON) for `filename`."""
+    path = copy_data(directory, filename)
+    from_json = build(path)
+    compile_artifact(path)
+    return build(path), from_json
+
+
+def test_catalog_artifact_decodes_as_json():
+    with tempfile.TemporaryDirectory() as directory:
+        packed, built = build_both(directory, 'ram_catalog.json', compile_ram_catalog_artifact, _build_ram_catalog)
+        # the lookup tables are read in place from the mapping
+        assert not packed.lookup_tables.flags.writeable
+        assert packed.addresses == built.addresses
+
+        rows = np.arange(len(built))
+        rng = np.random.default_rng(0)
+        for raw in (rng.integers(0, 256, len(rows)), np.full(len(rows), -1)):
+            raw = raw.astype(np.int32)
+            assert packed.decode(rows, raw) == built.decode(rows, raw)
+        for lookup_id in range(len(built.lookup_keys)):
+            assert packed.lookup_table(lookup_id).tolist() == built.lookup_table(lookup_id).tolist()
+
+
+def test_bestiary_artifact_answers_as_json():
+    with tempfile.TemporaryDirectory() as directory:
+        packed, built = build_both(directory, 'bestiary.json', compile_bestiary_artifact, _build_bestiary)
+        assert list(packed.bestiary) == list(built.bestiary)
+        for key, monsters in built.bestiary.items():
+            assert packed.bestiary[key] == monsters
+        assert dict(packed.reverse_bestiary.items()) == built.reverse_bestiary
+        assert dict(packed.monster_names.items()) == built.monster_names
+        assert packed.bestiary.get("(not a key)") is None
+
+        for location in LOCATIONS:
+            assert packed.location_index.lookup(location) == built.location_index.lookup(location), location
+        for monster in MONSTERS:
+            assert _match_monster(monster, packed) == _match_monster(monster, built), monster
+
+
+def test_bestiary_artifact_holds_no_header_data():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_data(directory, 'bestiary.json')
+        compile_bestiary_artifact(path)
+        artifact = load_artifact(path, BESTIARY_ARTIFACT_KIND)
+        assert artifact is not None
+        assert artifact.objects == {}
+
+
+def test_unchanged_source_is_not_hashed():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_data(directory, 'ram_catalog.json')
+        compile_ram_catalog_artifact(path)
+        digest = artifacts.source_digest
+        artifacts.source_digest = None  # any call would fail
+        try:
+            assert load_artifact(path, RAM_CATALOG_ARTIFACT_KIND) is not None
+        finally:
+            artifacts.source_digest = digest
+
+
+def test_touched_source_is_hashed():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_data(directory, 'ram_catalog.json')
+        compile_ram_catalog_artifact(path)
+        # same contents, new mtime: still usable once the digest matches
+        os.utime(path, ns=(1, 1))
+        assert load_artifact(path, RAM_CATALOG_ARTIFACT_KIND) is not None
+
+
+def test_edited_source_falls_back_to_json():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_data(directory, 'bestiary.json')
+        compile_bestiary_artifact(path)
+        with open(path, 'rb') as f:
+            bestiary = fastjson.loads(f.read())
+        bestiary["(test_location)"] = ["Imp"]
+        with open(path, 'wb') as f:
+            f.write(fastjson.dumps_bytes(bestiary))
+        assert load_artifact(path, BESTIARY_ARTIFACT_KIND) is None
+        assert _build_bestiary(path).bestiary["(test_location)"] == ["Imp"]
+
+
+def test_corrupt_artifact_is_ignored():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_data(directory, 'bestiary.json')
+        artifact = compile_bestiary_artifact(path)
+        with open(artifact, 'r+b') as f:
+            f.truncate(64)
+        assert load_artifact(path, BESTIARY_ARTIFACT_KIND) is None
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
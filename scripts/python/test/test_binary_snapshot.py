@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Checks that a binary snapshot (ram_snapshot.bin) written by
+`write_binary_snapshot` reads back through `load_binary_snapshot` exactly as
+the same RAM read from ram_contents.json (`JsonRamContents`).
+
+Usage:
+  python scripts/python/test/test_binary_snapshot.py
+
+Also collected by pytest. Works in a temporary directory.
+"""
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+import numpy as np
+
+from api.nes.binary_snapshot import load_binary_snapshot, regions_from_ram_contents, write_binary_snapshot
+from api.nes.snapshot import JsonRamContents
+from api.utils import fastjson
+from offline_ramdisk import DATA_DIR
+
+
+def catalog_ram(seed: int) -> JsonRamContents:
+    """ram_contents.json as the daemon writes it, with random bytes for every catalog address."""
+    with open(DATA_DIR / 'ram_catalog.json', 'rb') as f:
+        addresses = [entry['address'] for entry in fastjson.loads(f.read())['catalog']]
+    rng = random.Random(seed)
+    return JsonRamContents({address: "0x%02X" % rng.randrange(256) for address in addresses})
+
+
+def write_both(directory: str, ram: JsonRamContents, sequence: int = 7, frame: int = 420):
+    """(binary snapshot read back, ram_contents.json read back) for `ram`."""
+    path = os.path.join(directory, 'ram_snapshot.bin')
+    write_binary_snapshot(path, regions_from_ram_contents(ram), sequence, frame)
+    with open(os.path.join(directory, 'ram_contents.json'), 'wb') as f:
+        f.write(fastjson.dumps_bytes(ram))
+    with open(os.path.join(directory, 'ram_contents.json'), 'rb') as f:
+        return load_binary_snapshot(path), JsonRamContents(fastjson.loads(f.read()))
+
+
+def test_binary_round_trip_matches_json():
+    with tempfile.TemporaryDirectory() as directory:
+        binary, json_contents = write_both(directory, catalog_ram(0))
+        assert (binary.sequence, binary.frame) == (7, 420)
+        for address, value in json_contents.items():
+            assert binary[address] == binary.get(address) == value, address
+            assert binary.byte(address) == json_contents.byte(address), address
+
+        offsets = np.array([int(address, 16) for address in json_contents] + [0x2000, 0x5FFF], dtype=np.int64)
+        assert binary.gather(offsets).tolist() == json_contents.gather(offsets).tolist()
+
+
+def test_uncaptured_addresses_read_as_missing():
+    with tempfile.TemporaryDirectory() as directory:
+        binary, _ = write_both(directory, catalog_ram(1))
+        # PPU registers sit between the two captured regions
+        assert binary.get("0x002000") is None
+        assert binary.byte("0x002000") is None
+        assert "0x002000" not in binary
+        # captured addresses that were not in ram_contents.json read as zero
+        assert binary["0x000001"] == "0x00"
+
+
+def test_truncated_snapshot_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ram_snapshot.bin')
+        write_binary_snapshot(path, regions_from_ram_contents(catalog_ram(2)))
+        with open(path, 'r+b') as f:
+            f.truncate(100)
+        try:
+            load_binary_snapshot(path)
+        except ValueError:
+            return
+        raise AssertionError("a truncated snapshot was loaded")
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
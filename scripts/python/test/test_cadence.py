@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Checks that two `CadenceController`s sharing one daemon_cadence.txt (the NES
+API and the LLM API) never cut each other's fast deadline short.
+
+Usage:
+  python scripts/python/test/test_cadence.py
+
+Also checks which NES API requests count as activity. Collected by pytest.
+Uses temporary directories (see offline_ramdisk.py) and a fake clock, so no
+RAMdisk or daemon is needed.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes import app as nes_app
+from api.nes.cadence import CadenceController
+from offline_ramdisk import ramdisk_path
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def published_until(path: str) -> int:
+    with open(path, 'r') as f:
+        return int(f.read().split()[2])
+
+
+def make_pair(directory: str):
+    path = str(Path(directory) / 'daemon_cadence.txt')
+    clock = FakeClock()
+    nes = CadenceController(path, 4, 60, 5, clock=clock)
+    llm = CadenceController(path, 4, 60, 5, clock=clock)
+    return path, clock, nes, llm
+
+
+def test_activity_does_not_shorten_a_hold():
+    with tempfile.TemporaryDirectory() as directory:
+        path, clock, nes, llm = make_pair(directory)
+        with llm.hold():
+            held = published_until(path)
+            assert held >= clock.now + 600
+            clock.now += 30
+            nes.note_activity()
+            assert published_until(path) == held
+
+
+def test_release_drops_own_hold():
+    with tempfile.TemporaryDirectory() as directory:
+        path, clock, nes, llm = make_pair(directory)
+        with llm.hold():
+            nes.note_activity()
+            clock.now += 30
+        assert published_until(path) == clock.now + 5
+        # the NES API extends again once the idle timeout is the later deadline
+        clock.now += 2
+        nes.note_activity()
+        assert published_until(path) == clock.now + 5
+
+
+def test_release_keeps_another_process_hold():
+    with tempfile.TemporaryDirectory() as directory:
+        path, clock, nes, llm = make_pair(directory)
+        llm_hold = llm.hold()
+        llm_hold.__enter__()
+        clock.now += 10
+        with nes.hold():
+            nes_deadline = published_until(path)
+            # the LLM hold ends first: the later NES hold stays published
+            llm_hold.__exit__(None, None, None)
+            assert published_until(path) == nes_deadline
+        assert published_until(path) == clock.now + 5
+
+
+def test_activity_extends_an_expiring_deadline():
+    with tempfile.TemporaryDirectory() as directory:
+        path, clock, nes, llm = make_pair(directory)
+        nes.note_activity()
+        first = published_until(path)
+        clock.now += 3
+        llm.note_activity()
+        assert published_until(path) == first + 3
+
+
+def test_only_game_requests_note_activity():
+    with open(ramdisk_path('ram_contents.json'), 'w') as f:
+        f.write('{"0x006BE4": "0x32", "0x006102": "0x8A"}')
+    calls = []
+    note_activity = nes_app.note_activity
+    nes_app.note_activity = lambda: calls.append(True)
+    try:
+        client = nes_app.create_app().test_client()
+        read = {'addresses': ['0x006BE4']}
+
+        # preflights, UI polls and admin calls leave the cadence alone
+        client.options('/nes/read')
+        client.post('/nes/names/get', json={})
+        client.post('/nes/bestiary/get-monsters-by-location', json={'location': '(4,4)'})
+        client.get('/nes/admin/reload')
+        assert calls == []
+
+        response = client.post('/nes/read', json=read)
+        assert response.status_code == 200
+        assert len(calls) == 1
+
+        # a 304 revalidation does not either
+        response = client.post('/nes/read', json=read, headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+        assert len(calls) == 1
+
+        client.post('/nes/batch', json={'operations': []})
+        client.post('/nes/blocks', json={})
+        client.post('/nes/write', json={})
+        assert len(calls) == 4
+    finally:
+        nes_app.note_activity = note_activity
+        os.remove(ramdisk_path('ram_contents.json'))
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
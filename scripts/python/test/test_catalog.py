@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Checks that `read_addresses`, which decodes through the compiled catalog,
+answers exactly as the original per-address lookups over the parsed
+data/ram_catalog.json, for every catalog address and random RAM contents.
+
+Usage:
+  python scripts/python/test/test_catalog.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+import random
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.read import read_addresses
+from api.nes.snapshot import JsonRamContents, RamSnapshot
+from api.utils import fastjson
+from offline_ramdisk import DATA_DIR
+
+with open(DATA_DIR / 'ram_catalog.json', 'rb') as _f:
+    RAM_CATALOG = fastjson.loads(_f.read())
+
+# enemy type address -> its "exists?" flag, as in read.py
+EXISTS_BY_TYPE_ADDRESS = {
+    "0x006BE4": "0x006BDF", "0x006BF8": "0x006BF3", "0x006C0C": "0x006C07",
+    "0x006C20": "0x006C1B", "0x006C34": "0x006C2F", "0x006C48": "0x006C43",
+    "0x006C5C": "0x006C57", "0x006C70": "0x006C6B", "0x006C84": "0x006C7F",
+}
+
+
+def json_read(addresses, ram_contents):
+    """read_addresses as it was before the catalog was compiled: dict lookups per address."""
+    lookups = {item['key']: item for item in RAM_CATALOG['lookups']}
+    entries = {entry['address']: entry for entry in RAM_CATALOG['catalog']}
+    values = {}
+    for address in addresses:
+        entry = entries[address]
+        if entry.get('type') == 'lookup' and entry.get('lookup') in lookups:
+            lookup = lookups[entry['lookup']]
+            value = lookup['map'].get(ram_contents.get(address), lookup.get('default'))
+            if value == "Imp" and ram_contents.get(EXISTS_BY_TYPE_ADDRESS.get(address)) == "0x00":
+                value = ""
+            values[address] = value
+        elif entry.get('type') == 'number':
+            raw = ram_contents.get(address)
+            if raw is None:
+                return ("Game memory not in expected format. Perhaps a RAM address I have been trained on is not available for lookup.", 500)
+            values[address] = str(int(raw, 16) * int(entry.get('weight') or 1))
+        else:
+            return ("RAM Catalog entry has unexpected format.", 500)
+    return ({"addresses": values}, 200)
+
+
+def random_ram(rng: random.Random, addresses):
+    ram = {address: "0x%02X" % rng.randrange(256) for address in addresses}
+    # leave some enemy slots empty, so Imps have to be confirmed
+    for exists in EXISTS_BY_TYPE_ADDRESS.values():
+        if rng.random() < 0.5:
+            ram[exists] = "0x00"
+    return JsonRamContents(ram)
+
+
+def decodable_addresses():
+    return [entry['address'] for entry in RAM_CATALOG['catalog'] if entry.get('type') in ('number', 'lookup')]
+
+
+def test_compiled_read_matches_json_catalog():
+    rng = random.Random(0)
+    addresses = decodable_addresses()
+    everything = [entry['address'] for entry in RAM_CATALOG['catalog']]
+    for version in range(1, 21):
+        ram = random_ram(rng, everything)
+        snapshot = RamSnapshot(version, ram)
+        assert read_addresses(addresses, snapshot=snapshot) == json_read(addresses, ram)
+        subset = rng.sample(addresses, 10)
+        assert read_addresses(subset, snapshot=snapshot) == json_read(subset, ram)
+
+
+def test_compiled_read_reports_the_same_errors():
+    addresses = decodable_addresses()
+    ram = random_ram(random.Random(1), addresses)
+    snapshot = RamSnapshot(1, ram)
+
+    unknown = [entry['address'] for entry in RAM_CATALOG['catalog'] if entry.get('type') not in ('number', 'lookup')]
+    assert unknown
+    assert read_addresses(addresses[:3] + unknown[:1], snapshot=snapshot) == json_read(addresses[:3] + unknown[:1], ram)
+
+    number = next(entry['address'] for entry in RAM_CATALOG['catalog'] if entry.get('type') == 'number')
+    missing = JsonRamContents({address: value for address, value in ram.items() if address != number})
+    assert read_addresses([number], snapshot=RamSnapshot(2, missing)) == json_read([number], missing)
+
+    result, status = read_addresses(["0x00001C", "0x7FFFFF"], snapshot=snapshot)
+    assert status == 400 and "0x7FFFFF" in result
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Checks the command queue's input parsing and write batching: only bytes
+(0..255) and RAM addresses (0..0xFFFF) are accepted, a batch keeps the last
+value written to an address, and every record gets the next sequence number.
+
+Usage:
+  python scripts/python/test/test_command_queue.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+import os
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes import command_queue
+from api.nes.command_queue import RECORD_END, RECORD_HEADER, WriteBatch, enqueue, parse_address, parse_value
+
+
+def read_queue() -> str:
+    with open(command_queue.QUEUE_PATH, 'r') as f:
+        return f.read()
+
+
+def test_parse_value_accepts_bytes():
+    for value, expected in ((0, 0), (255, 255), ("0xFF", 255), ("0x0a", 10), ("10", 10), (" 7 ", 7)):
+        assert parse_value(value) == expected, value
+
+
+def test_parse_value_rejects_values_outside_a_byte():
+    for value in (256, -1, 1000, "0x100", "256", "-1", "0xFFFF"):
+        assert parse_value(value) is None, value
+
+
+def test_parse_value_rejects_non_numbers():
+    for value in (True, False, None, "", "ten", "0x", 1.5, [1]):
+        assert parse_value(value) is None, value
+
+
+def test_parse_address_range():
+    assert parse_address("0x006110") == 0x6110
+    assert parse_address(0xFFFF) == 0xFFFF
+    for address in (0x10000, -1, "0x10000", True, "address"):
+        assert parse_address(address) is None, address
+
+
+def test_write_batch_keeps_last_value_per_address():
+    batch = WriteBatch()
+    assert batch.set("0x006110", 10) is None
+    assert batch.set("0x006111", "0x02") is None
+    assert batch.set(0x6110, "0x14") is None
+    assert len(batch) == 2
+    assert batch.to_call() == f"write_bytes {0x6110},{0x6111} 20,2"
+
+
+def test_write_batch_reports_invalid_writes():
+    batch = WriteBatch()
+    assert "must be a byte" in batch.set("0x006110", 256)
+    assert "Invalid address" in batch.set("0x1000000", 1)
+    assert len(batch) == 0
+
+
+def test_enqueue_numbers_records_in_order():
+    first = enqueue("script", "memory.writebyte(0x006110, 1)")
+    second = WriteBatch()
+    second.set("0x006110", 2)
+    second = second.submit()
+    try:
+        assert second == first + 1
+        queue = read_queue()
+        header = RECORD_HEADER.format(seq=first, kind="script")
+        assert header + "memory.writebyte(0x006110, 1)\n" + RECORD_END.format(seq=first) in queue
+        assert RECORD_HEADER.format(seq=second, kind="call") + f"write_bytes {0x6110}, 2,\n" in queue
+        assert queue.index(header) < queue.index(RECORD_HEADER.format(seq=second, kind="call"))
+    finally:
+        os.remove(command_queue.QUEUE_PATH)
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Checks that delta snapshots (ram_keyframe.json plus ram_deltas.log) written by
+`DeltaSnapshotWriter` read back through `DeltaSnapshotReader` as the same RAM
+a full ram_contents.json would hold (`JsonRamContents`), tick after tick and
+across keyframes, and that the reader reports what changed.
+
+Usage:
+  python scripts/python/test/test_delta_snapshot.py
+
+Also collected by pytest. Works in a temporary directory.
+"""
+from __future__ import annotations
+
+import random
+import tempfile
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+import numpy as np
+
+from api.nes.delta_snapshot import DeltaSnapshotReader, DeltaSnapshotWriter, values_from_ram_contents
+from api.nes.snapshot import JsonRamContents
+from api.utils import fastjson
+from offline_ramdisk import DATA_DIR
+
+with open(DATA_DIR / 'ram_catalog.json', 'rb') as _f:
+    ADDRESSES = list(dict.fromkeys(entry['address'] for entry in fastjson.loads(_f.read())['catalog']))
+OFFSETS = np.array([int(address, 16) for address in ADDRESSES], dtype=np.int64)
+
+
+def ticks(count: int, seed: int):
+    """`count` successive ram_contents.json dicts, each changing a few catalog bytes."""
+    rng = random.Random(seed)
+    values = [rng.randrange(256) for _ in ADDRESSES]
+    for _ in range(count):
+        for i in rng.sample(range(len(values)), rng.randrange(4)):
+            values[i] = rng.randrange(256)
+        yield {address: "0x%02X" % value for address, value in zip(ADDRESSES, values)}
+
+
+def assert_same_ram(reader: DeltaSnapshotReader, ram_contents) -> None:
+    expected = JsonRamContents(ram_contents)
+    assert dict(reader.contents) == expected
+    assert reader.contents.gather(OFFSETS).tolist() == expected.gather(OFFSETS).tolist()
+
+
+def test_delta_round_trip_matches_json():
+    with tempfile.TemporaryDirectory() as directory:
+        directory += '/'
+        writer = DeltaSnapshotWriter(directory, ADDRESSES, keyframe_interval=5)
+        reader = DeltaSnapshotReader(directory, JsonRamContents)
+        history = []
+        for frame, ram_contents in enumerate(ticks(23, 0)):
+            writer.tick(values_from_ram_contents(ADDRESSES, ram_contents), frame)
+            reader.refresh()
+            assert (reader.sequence, reader.frame) == (writer.sequence, frame)
+            assert_same_ram(reader, ram_contents)
+            if history:
+                assert reader.changed == {a for a in ADDRESSES if ram_contents[a] != history[-1][a]}
+            history.append(ram_contents)
+
+        # sequence numbers start at 1: history[n] is tick n + 1
+        for sequence in (3, 10, 20):
+            changed = {a for a in ADDRESSES if any(later[a] != history[sequence - 1][a] for later in history[sequence:])}
+            assert set(reader.changed_since(sequence)) == changed, sequence
+
+
+def test_reader_catches_up_across_keyframes():
+    with tempfile.TemporaryDirectory() as directory:
+        directory += '/'
+        writer = DeltaSnapshotWriter(directory, ADDRESSES, keyframe_interval=4)
+        reader = DeltaSnapshotReader(directory, JsonRamContents)
+        for frame, ram_contents in enumerate(ticks(30, 1)):
+            writer.tick(values_from_ram_contents(ADDRESSES, ram_contents), frame)
+            # the API only reads now and then: several ticks land between refreshes
+            if frame % 7 == 6:
+                reader.refresh()
+                assert reader.sequence == writer.sequence
+                assert_same_ram(reader, ram_contents)
+        reader.refresh()
+        assert_same_ram(reader, ram_contents)
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Checks the fuzzy monster-name index: bounded edit distance, trigram search
+with abbreviations, the same answers from an index packed for an artifact,
+and `get_locations_by_monster` resolving plurals, misspellings and
+spelled-out names from data/bestiary.json.
+
+Usage:
+  python scripts/python/test/test_fuzzy.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.bestiary import _load_bestiary, get_locations_by_monster
+from api.nes.fuzzy import TrigramIndex, edit_distance
+
+KEYS = ["imp", "grimp", "wolf", "grwolf", "frwolf", "frgiant", "giant", "coctrice", "sahag", "rsahag"]
+QUERIES = ["imp", "imps", "wolf", "frostwolf", "frostgiant", "giamt", "cockatrice", "sahagin", "zzzz", "", "r"]
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("giant", "giant", 0) == 0
+    # anything beyond the bound reads as bound + 1
+    assert edit_distance("abcdef", "uvwxyz", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_search_ranks_closest_first():
+    index = TrigramIndex(KEYS)
+    assert index.search("grwolf")[0] == ("grwolf", 0, 1.0)
+    assert index.search("giamt")[0].key == "giant"
+    assert index.search("cockatrice")[0].key == "coctrice"
+    assert index.search("zzzz") == []
+    assert index.search("") == []
+    assert [match.key for match in index.search("grwolf", limit=2)] == ["grwolf", "frwolf"]
+    assert index.search("grwolf", limit=1, max_distance=0) == [("grwolf", 0, 1.0)]
+
+
+def test_search_matches_abbreviations():
+    index = TrigramIndex(KEYS)
+    # "frgiant" keeps the letters of "frostgiant" in order: half the 3 dropped, at least 1
+    assert index.search("frostgiant")[0][:2] == ("frgiant", 1)
+    assert index.search("frostwolf")[0][:2] == ("frwolf", 1)
+
+
+def test_packed_index_answers_the_same():
+    index = TrigramIndex(KEYS)
+    arrays = {}
+    index.to_arrays(arrays, "monsters")
+    packed = TrigramIndex.from_arrays(arrays, "monsters")
+    assert list(packed.keys) == index.keys
+    for query in QUERIES:
+        assert packed.search(query) == index.search(query), query
+
+
+def test_every_monster_finds_itself():
+    index = _load_bestiary()
+    names = list(index.monster_names.values())
+    result, status = get_locations_by_monster(names)
+    assert status == 200
+    for key, name in index.monster_names.items():
+        singular = name[:-1] if name.lower().endswith('s') and name.lower() not in ("cerebus", "chaos") else name
+        assert result["matches"][singular][0] == {"monster": name, "distance": 0}, name
+        assert result["locations"][singular] == index.reverse_bestiary[key], name
+
+
+def test_misspelled_monsters_are_found():
+    index = _load_bestiary()
+    for key, name in index.monster_names.items():
+        # results are keyed by the name without a trailing "s"
+        if len(key) < 6 or key.endswith('s'):
+            continue
+        # drop one letter from the middle
+        typo = key[:3] + key[4:]
+        result, _ = get_locations_by_monster([typo])
+        assert name in [match["monster"] for match in result["matches"][typo]], (typo, name)
+
+
+def test_locations_by_monster_names():
+    index = _load_bestiary()
+    result, status = get_locations_by_monster(["Wolves", "Frost Giant", "IMP", "zzzzzz", 3])
+    assert status == 200
+    locations, matches = result["locations"], result["matches"]
+    # keyed by the name without its trailing "s", as the frontend does
+    assert locations["Wolve"] == index.reverse_bestiary["wolf"]
+    assert matches["Frost Giant"][0] == {"monster": "FrGiant", "distance": 1}
+    assert locations["IMP"] == index.reverse_bestiary["imp"]
+    assert locations["zzzzzz"] == ["monster not found"] and matches["zzzzzz"] == []
+    assert locations["3"] == ["monster not found"]
+    assert get_locations_by_monster("Imp")[1] == 400
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Checks the struct layouts for the party and enemy blocks: every field byte
+of every slot is the address data/ram_catalog.json describes for it, and
+`get_party` / `get_enemies` decode random RAM exactly as reading those
+addresses one by one through `read_addresses` does.
+
+Usage:
+  python scripts/python/test/test_layout.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+import random
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.layout import ENEMIES, PARTY, get_enemies, get_party
+from api.nes.read import read_addresses
+from api.nes.snapshot import JsonRamContents, RamSnapshot
+from api.utils import fastjson
+from offline_ramdisk import DATA_DIR
+
+with open(DATA_DIR / 'ram_catalog.json', 'rb') as _f:
+    CATALOG = {entry['address']: entry for entry in fastjson.loads(_f.read())['catalog']}
+
+
+def field_addresses(layout, slot: int, field):
+    first = layout.slot_base(slot) + field.offset
+    return ["0x%06X" % address for address in range(first, first + field.size)]
+
+
+def random_snapshot(seed: int) -> RamSnapshot:
+    rng = random.Random(seed)
+    ram = {}
+    for layout in (PARTY, ENEMIES):
+        for addresses in layout.block_addresses():
+            ram.update({address: "0x%02X" % rng.randrange(256) for address in addresses})
+    for slot in range(1, ENEMIES.count + 1):
+        # every enemy exists, so read_addresses never blanks an Imp
+        ram[ENEMIES.address(slot, "exists")] = "0x01"
+    return RamSnapshot(seed, JsonRamContents(ram))
+
+
+def test_fields_sit_at_their_catalog_addresses():
+    for layout in (PARTY, ENEMIES):
+        for slot in range(1, layout.count + 1):
+            for field in layout.fields:
+                addresses = field_addresses(layout, slot, field)
+                assert layout.address(slot, field.name) == addresses[0]
+                for position, address in enumerate(addresses):
+                    entry = CATALOG.get(address)
+                    assert entry is not None, (layout.name, slot, field.name, address)
+                    if field.lookup is not None:
+                        assert entry.get('lookup') == field.lookup, (layout.name, slot, field.name, address)
+                    else:
+                        # multi-byte numbers are little-endian: byte N weighs 256**N
+                        assert entry['type'] == 'number' and int(entry.get('weight') or 1) == 256 ** position, (layout.name, slot, field.name, address)
+
+
+def test_block_offsets():
+    assert [PARTY.slot_base(slot) for slot in range(1, 5)] == [0x6100, 0x6140, 0x6180, 0x61C0]
+    assert [ENEMIES.slot_base(slot) for slot in (1, 2, 9)] == [0x6BD3, 0x6BE7, 0x6C73]
+    assert PARTY.address(2, "hp") == "0x00614A"
+    assert ENEMIES.address(9, "type") == "0x006C84"
+    assert [len(addresses) for addresses in PARTY.block_addresses()] == [64] * 4
+
+
+def test_layouts_decode_as_read_addresses():
+    for seed in range(5):
+        snapshot = random_snapshot(seed)
+        party, _ = get_party(snapshot)
+        enemies, _ = get_enemies(snapshot)
+        for layout, records in ((PARTY, party["party"]), (ENEMIES, enemies["enemies"])):
+            assert [record["slot"] for record in records] == list(range(1, layout.count + 1))
+            for record in records:
+                for field in layout.fields:
+                    addresses = field_addresses(layout, record["slot"], field)
+                    values, status = read_addresses(addresses, snapshot=snapshot)
+                    assert status == 200
+                    read = [values["addresses"][address] for address in addresses]
+                    if field.lookup is not None:
+                        expected = ''.join(read)
+                    elif field.flags is not None:
+                        raw = snapshot.contents.byte(addresses[0])
+                        expected = [flag for bit, flag in enumerate(field.flags) if raw & (1 << bit)]
+                    else:
+                        expected = sum(int(value) for value in read)
+                    assert record[field.name] == expected, (layout.name, record["slot"], field.name)
+
+
+def test_missing_bytes_decode_to_none():
+    contents = dict(random_snapshot(0).contents)
+    del contents[PARTY.address(3, "hp")]
+    party, _ = get_party(RamSnapshot(99, JsonRamContents(contents)))
+    assert party["party"][2]["hp"] is None
+    assert party["party"][2]["max_hp"] is not None
+    assert party["party"][1]["hp"] is not None
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Checks the bestiary location index: every key finds itself, free-form names
+resolve to the key they mean (case, punctuation and floor spelling, partial
+names, misspellings and aliases), overworld cells only match exactly, and an
+index packed for an artifact answers the same.
+
+Usage:
+  python scripts/python/test/test_location_index.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.bestiary import _load_bestiary, get_monsters_by_location
+from api.nes.location_index import LocationIndex, location_tokens
+
+# free-form name -> the bestiary key it means
+RESOLVED = {
+    "Castle of Ordeal 2F": "(castle_of_ordeal,2f)",
+    "castle-of-ordeal (2nd floor)": "(castle_of_ordeal,2f)",
+    "castle_of_ordeal,F2": "(castle_of_ordeal,2f)",
+    "Marsh Cave 3B": "(marsh_cave,b3)",
+    "marsh cave basement 3": "(marsh_cave,b3)",
+    "ice cave b2": "(ice_cave,b2)",
+    "4, 4": "(4,4)",
+    "sea": "(ocean)",
+}
+# resolved only past the exact steps (see location_index.py)
+FUZZY = {
+    "marsh": "(marsh_cave,b1)",
+    "castl of ordel 3f": "(castle_of_ordeal,3f)",
+    "Chaos Shrine": "(temple_of_fiends_present,1f)",
+}
+UNKNOWN = ["(0,3)", "3, 8", "earth cave b9", "nowhere at all", ""]
+
+
+def test_location_tokens():
+    assert location_tokens("(castle_of_ordeal,2f)") == ["castle", "of", "ordeal", "2f"]
+    assert location_tokens("Castle of Ordeal, 2nd floor") == location_tokens("castle_of_ordeal,F2")
+    assert location_tokens("basement 3") == location_tokens("3B") == ["b3"]
+
+
+def test_every_key_finds_itself():
+    index = _load_bestiary().location_index
+    for key in index.keys:
+        assert index.lookup(key) == key
+        assert index.lookup(key.upper().replace('_', ' '), exact=True) == key, key
+
+
+def test_free_form_names_resolve():
+    index = _load_bestiary().location_index
+    for name, key in RESOLVED.items():
+        assert index.lookup(name) == key, name
+        assert index.lookup(name, exact=True) == key, name
+    for name, key in FUZZY.items():
+        assert index.lookup(name) == key, name
+        assert index.lookup(name, exact=True) is None, name
+    for name in UNKNOWN:
+        assert index.lookup(name) is None, name
+
+
+def test_packed_index_answers_the_same():
+    index = _load_bestiary().location_index
+    built = LocationIndex(index.keys)
+    arrays = {}
+    built.to_arrays(arrays, "location_index")
+    packed = LocationIndex.from_arrays(arrays, "location_index")
+    for name in [*RESOLVED, *FUZZY, *UNKNOWN, *index.keys]:
+        assert packed.lookup(name) == built.lookup(name), name
+
+
+def test_monsters_by_location_names():
+    bestiary = _load_bestiary().bestiary
+    result, status = get_monsters_by_location("Castle of Ordeal 2F")
+    assert status == 200
+    assert result == {"monsters": bestiary["(castle_of_ordeal,2f)"], "location": "(castle_of_ordeal,2f)"}
+
+    result, status = get_monsters_by_location(["marsh", "nowhere at all"])
+    assert status == 200
+    assert result["locations"] == {"marsh": "(marsh_cave,b1)", "nowhere at all": None}
+    assert result["monsters"]["marsh"] == bestiary["(marsh_cave,b1)"]
+    assert get_monsters_by_location(["marsh", 3])[1] == 400
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
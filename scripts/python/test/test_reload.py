@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Checks that the RAM history and the watch engine move onto a reloaded
+ram_catalog.json: addresses it adds are accepted, samples and watches of the
+addresses it keeps carry over, and watches on addresses it drops are removed
+with an event.
+
+Usage:
+  python scripts/python/test/test_reload.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+import copy
+import os
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.catalog import compile_catalog
+from api.nes.history import get_history, history
+from api.nes.reloadable import reload_static_data
+from api.nes.snapshot import JsonRamContents, RamSnapshot, get_ram_snapshot
+from api.nes.watch import WatchEngine
+from api.utils import fastjson
+from offline_ramdisk import DATA_DIR, ramdisk_path
+
+# not in data/ram_catalog.json
+NEW_ADDRESS = "0x007FF0"
+# in it, and dropped by `edited_catalog()`
+DROPPED_ADDRESS = "0x000028"
+
+
+def edited_catalog():
+    """(data/ram_catalog.json, a copy without DROPPED_ADDRESS and with NEW_ADDRESS)."""
+    with open(DATA_DIR / 'ram_catalog.json', 'rb') as f:
+        original = fastjson.loads(f.read())
+    edited = copy.deepcopy(original)
+    edited['catalog'] = [entry for entry in edited['catalog'] if entry['address'] != DROPPED_ADDRESS]
+    edited['catalog'].append({"address": NEW_ADDRESS, "type": "number", "description": "Test byte", "weight": "1"})
+    return original, edited
+
+
+def write_json(filename: str, value) -> None:
+    with open(ramdisk_path(filename), 'wb') as f:
+        f.write(fastjson.dumps_bytes(value))
+
+
+def stats(address: str):
+    result, status = history({'query': 'stats', 'addresses': [address]})
+    assert status == 200, result
+    return result
+
+
+def test_history_follows_catalog_reload():
+    original, edited = edited_catalog()
+    # subscribed to the snapshot cache from here on
+    get_history()
+    try:
+        write_json('ram_contents.json', {"0x000027": "0x05"})
+        get_ram_snapshot()
+        assert stats("0x000027")["last"] == 5
+        assert history({'query': 'stats', 'addresses': [NEW_ADDRESS]})[1] == 400
+
+        write_json('ram_catalog.json', edited)
+        reload_static_data()
+        # recorded before the reload: kept for old addresses, not captured for new ones
+        assert stats("0x000027")["last"] == 5
+        assert stats(NEW_ADDRESS)["samples"] == 0
+        assert history({'query': 'stats', 'addresses': [DROPPED_ADDRESS]})[1] == 400
+
+        write_json('ram_contents.json', {"0x000027": "0x06", NEW_ADDRESS: "0x07"})
+        get_ram_snapshot()
+        assert stats(NEW_ADDRESS)["last"] == 7
+        assert stats("0x000027")["change"] == 1
+    finally:
+        write_json('ram_catalog.json', original)
+        reload_static_data()
+        os.remove(ramdisk_path('ram_contents.json'))
+
+
+def test_watches_follow_catalog_reload():
+    original, edited = edited_catalog()
+    engine = WatchEngine(compile_catalog(original))
+    events = engine.subscribe()
+    kept, _ = engine.add({'addresses': ["0x00001C"], 'op': '==', 'value': 'in battle'})
+    dropped, _ = engine.add({'addresses': [DROPPED_ADDRESS], 'mode': 'change'})
+    assert engine.add({'addresses': [NEW_ADDRESS], 'mode': 'change'})[1] == 400
+
+    engine.use_catalog(compile_catalog(edited))
+    removed = events.get(timeout=0)
+    assert removed["watch"] == dropped["watch"] and DROPPED_ADDRESS in removed["removed"]
+    assert events.get(timeout=0) is None
+    assert [watch["watch"] for watch in engine.list()] == [kept["watch"]]
+
+    added, status = engine.add({'addresses': [NEW_ADDRESS], 'mode': 'change'})
+    assert status == 200
+    in_battle = engine.catalog.lookup_raw_values(engine.catalog.index["0x00001C"], 'in battle')[0]
+    engine.on_snapshot(RamSnapshot(1, JsonRamContents({"0x00001C": "0x00", NEW_ADDRESS: "0x01"})))
+    engine.on_snapshot(RamSnapshot(2, JsonRamContents({"0x00001C": hex(in_battle), NEW_ADDRESS: "0x02"})))
+    fired = {events.get(timeout=0)["watch"], events.get(timeout=0)["watch"]}
+    assert fired == {kept["watch"], added["watch"]}
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
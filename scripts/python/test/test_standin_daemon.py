@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Checks the command queue end to end against the stand-in daemon: queued
+records are applied once, in sequence order, on the next tick; a batch's
+merged writes land as one call; and the acknowledged sequence lets
+`wait_for()` return for every ticket issued before the tick.
+
+Usage:
+  python scripts/python/test/test_standin_daemon.py
+
+Also collected by pytest. Uses the temporary RAMdisk of offline_ramdisk.py.
+"""
+from __future__ import annotations
+
+import os
+
+# sets RAMDISK_DIR and puts the repo root on sys.path: import before `api`
+import offline_ramdisk
+
+from api.nes.command_queue import WriteBatch, applied_sequence, enqueue, enqueue_call, wait_for
+from api.nes.standin_daemon import StandinDaemon
+from api.utils import fastjson
+from offline_ramdisk import RAMDISK_DIR, ramdisk_path
+
+# character 1 HP (low, high) and max HP (low, high), all in data/ram_catalog.json
+ADDRESSES = ["0x00610A", "0x00610B", "0x00610C", "0x00610D"]
+
+
+def daemon(**options) -> StandinDaemon:
+    return StandinDaemon(RAMDISK_DIR, ADDRESSES, **options)
+
+
+def published() -> dict:
+    with open(ramdisk_path('ram_contents.json'), 'rb') as f:
+        return fastjson.loads(f.read())
+
+
+def cleanup() -> None:
+    for filename in ('ram_contents.json', 'command_ack.txt', 'command_queue.draining'):
+        try:
+            os.remove(ramdisk_path(filename))
+        except FileNotFoundError:
+            pass
+
+
+def test_queue_drains_in_order():
+    standin = daemon()
+    try:
+        first = enqueue("script", "memory.writebyte(0x00610A, 1)")
+        batch = WriteBatch()
+        batch.set("0x00610A", 5)
+        batch.set("0x00610B", 6)
+        batch.set("0x00610A", 50)
+        second = batch.submit()
+        third = enqueue("script", "memory.writebyte(0x00610B, 7)")
+        assert first < second < third
+        assert applied_sequence() < first
+        assert not wait_for(first, timeout=0)
+
+        standin.tick()
+        # later records win; the batch only wrote its last value for 0x00610A
+        assert (standin.ram[0x610A], standin.ram[0x610B]) == (50, 7)
+        assert published()["0x00610A"] == "0x32"
+        assert applied_sequence() == third
+        assert all(wait_for(ticket, timeout=0) for ticket in (first, second, third))
+    finally:
+        cleanup()
+
+
+def test_records_are_applied_once():
+    standin = daemon()
+    try:
+        enqueue_call("set_hp", [1, 300])
+        standin.tick()
+        assert (standin.ram[0x610A], standin.ram[0x610B]) == (300 % 256, 300 // 256)
+
+        # a tick with nothing queued re-runs nothing and keeps the ack
+        standin.ram[0x610A] = 9
+        acknowledged = applied_sequence()
+        standin.tick()
+        assert standin.ram[0x610A] == 9
+        assert applied_sequence() == acknowledged
+
+        later = enqueue("script", "memory.writebyte(0x00610C, 0x63)")
+        assert not wait_for(later, timeout=0)
+        standin.tick()
+        assert standin.ram[0x610C] == 0x63 and applied_sequence() == later
+    finally:
+        cleanup()
+
+
+def test_wait_for_a_running_daemon():
+    standin = daemon(fps=0, cadence=1).start()
+    try:
+        ticket = enqueue_call("set_hp", [1, 42])
+        assert wait_for(ticket, timeout=5)
+        assert published()["0x00610A"] == "0x2A"
+    finally:
+        standin.stop()
+        cleanup()
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f"ok  {name}")
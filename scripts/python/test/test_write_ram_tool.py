@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-CLI helper to test the `write_addresses_tool` from `api/nes/write.py`.
+CLI helper to test the `write_addresses_tool` from `api/nes/tools.py`.
 
 Usage:
   python scripts/python/test/test_write_ram_tool.py '[{"0x006BE4": 50}, {"0x006BE5": 0}]'
@@ -22,7 +22,7 @@ if str(repo_root) not in sys.path:
 
 try:
     # import the tool we want to exercise
-    from api.nes.write import write_addresses_tool
+    from api.nes.tools import write_addresses_tool
 except Exception as e:  # pragma: no cover - helpful error when import fails
     print(f"Failed to import write_addresses_tool: {e}", file=sys.stderr)
     sys.exit(2)